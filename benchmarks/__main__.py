@@ -0,0 +1,142 @@
+"""Run the offline benchmarks against the fake Discord API.
+
+    python -m benchmarks                          # every scenario
+    python -m benchmarks open_500 --latency 0.05  # one scenario with 50ms per REST call
+    python -m benchmarks --scale 0.1 --json out.json --compare baseline.json
+
+Every scenario runs in its own process with a throwaway DATA_DIR, so settings, the database and
+peak memory never leak between them.
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import math
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import tracemalloc
+
+from benchmarks.scenarios import SCENARIOS
+
+COMPARED = ("throughput", "p50_ms", "p99_ms", "rest_calls", "peak_rss_mb")
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    # Nearest rank
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+def run_child(args):
+    """Run one scenario in this process and print its report as JSON."""
+    from benchmarks import scenarios
+
+    if args.tracemalloc:
+        tracemalloc.start()
+    rate_limit = tuple(float(part) for part in args.rate_limit.split("/")) if args.rate_limit else None
+    # The cogs print a line per ticket and join; keep the report readable
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        result, fake = asyncio.run(scenarios.run(args.scenarios[0], args.scale, args.latency, args.jitter, rate_limit))
+
+    report = {
+        "scenario": result.name,
+        "ops": len(result.latencies),
+        "seconds": result.seconds,
+        "throughput": len(result.latencies) / result.seconds if result.seconds else 0.0,
+        "p50_ms": percentile(result.latencies, 0.50) * 1000,
+        "p99_ms": percentile(result.latencies, 0.99) * 1000,
+        "rest_calls": sum(fake.calls.values()),
+        "rest_by_endpoint": dict(fake.calls.most_common()),
+        "rate_limited": sum(fake.rate_limited.values()),
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        **result.extra,
+    }
+    if args.tracemalloc:
+        report["peak_traced_mb"] = tracemalloc.get_traced_memory()[1] / 1024**2
+    print(json.dumps(report))
+
+
+def run_scenario(name, args):
+    _, env = SCENARIOS[name]
+    command = [
+        sys.executable, "-m", "benchmarks", name, "--child",
+        "--scale", str(args.scale), "--latency", str(args.latency), "--jitter", str(args.jitter),
+    ]
+    if args.rate_limit:
+        command += ["--rate-limit", args.rate_limit]
+    if args.tracemalloc:
+        command.append("--tracemalloc")
+    with tempfile.TemporaryDirectory() as data_dir:
+        output = subprocess.run(
+            command, env={**os.environ, **env, "DATA_DIR": data_dir},
+            capture_output=True, text=True, check=True,
+        ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def print_report(report, baseline=None):
+    line = (
+        f"{report['scenario']:<26} {report['ops']:>6} ops {report['seconds']:8.2f}s "
+        f"{report['throughput']:10.1f}/s  p50 {report['p50_ms']:8.2f}ms  p99 {report['p99_ms']:8.2f}ms  "
+        f"{report['rest_calls']:>6} REST ({report['rate_limited']} 429)  {report['peak_rss_mb']:6.1f} MiB"
+    )
+    print(line)
+    details = {
+        key: value for key, value in report.items()
+        if key not in COMPARED and key not in ("scenario", "ops", "seconds", "rate_limited")
+    }
+    for key, value in details.items():
+        print(f"    {key}: {round(value, 2) if isinstance(value, float) else value}")
+    if baseline:
+        changes = []
+        for key in COMPARED:
+            before, after = baseline.get(key), report.get(key)
+            if before:
+                changes.append(f"{key} {(after - before) / before:+.1%}")
+        print("    vs baseline: " + ", ".join(changes))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline benchmarks for the ticket bot.")
+    parser.add_argument("scenarios", nargs="*", metavar="scenario",
+                        help=f"scenarios to run (default: all of {', '.join(SCENARIOS)})")
+    parser.add_argument("--scale", type=float, default=1.0, help="multiply every scenario's size")
+    parser.add_argument("--latency", type=float, default=0.02, help="seconds added to every REST call")
+    parser.add_argument("--jitter", type=float, default=0.5, help="latency varies by up to this fraction")
+    parser.add_argument("--rate-limit", help="requests/seconds allowed per channel or guild route, e.g. 5/5")
+    parser.add_argument("--tracemalloc", action="store_true", help="also report peak traced Python allocations")
+    parser.add_argument("--json", help="write the reports to this file")
+    parser.add_argument("--compare", help="print changes against reports written earlier with --json")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenario(s): {', '.join(sorted(unknown))}")
+
+    if args.child:
+        run_child(args)
+        return
+
+    baseline = {}
+    if args.compare:
+        with open(args.compare) as fp:
+            baseline = {report["scenario"]: report for report in json.load(fp)}
+
+    reports = []
+    for name in args.scenarios or SCENARIOS:
+        report = run_scenario(name, args)
+        print_report(report, baseline.get(report["scenario"]))
+        reports.append(report)
+
+    if args.json:
+        with open(args.json, "w") as fp:
+            json.dump(reports, fp, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,415 @@
+"""An in-process stand-in for the Discord API, for driving the real cogs without a network.
+
+FakeDiscord replaces the bot's ``HTTPClient.request`` and answers the routes the cogs use from
+in-memory state, so real discord.py models (Guild, TextChannel, Message, ...) are built from its
+payloads exactly as they would be from Discord's. Mutations are echoed back as gateway events on
+the next loop iteration, like the real gateway does after a REST response. Latency and per-route
+rate limits (logged the way discord.py logs a 429) can be injected.
+"""
+import asyncio
+import collections
+import datetime
+import itertools
+import json
+import logging
+import random
+import re
+import time
+
+import discord
+
+from config import TICKET_CATEGORY_NAME, CLOSED_CATEGORY_NAME
+
+log = logging.getLogger("discord.http")
+
+BOT_USER_ID = 10**17
+FIRST_MEMBER_ID = 2 * 10**17
+ROLE_IDS = {"Admin": 1, "Support Team": 2}
+CATEGORY_TYPE = 4
+TEXT_TYPE = 0
+ADMINISTRATOR = 1 << 3
+
+
+def user_payload(user_id, name):
+    return {"id": str(user_id), "username": name, "discriminator": "0", "avatar": None, "global_name": None}
+
+
+def member_payload(user_id, name, role_ids=()):
+    return {
+        "user": user_payload(user_id, name),
+        "roles": [str(role_id) for role_id in role_ids],
+        "joined_at": "2024-01-01T00:00:00+00:00",
+        "deaf": False,
+        "mute": False,
+        "flags": 0,
+    }
+
+
+def overwrite_payload(target_id, target_type, allow=0, deny=0):
+    return {"id": str(target_id), "type": target_type, "allow": str(allow), "deny": str(deny)}
+
+
+class FakeResponse:
+    """Just enough of an aiohttp response for discord.HTTPException."""
+
+    def __init__(self, status, reason):
+        self.status = status
+        self.reason = reason
+
+
+class RouteBucket:
+    def __init__(self, rate, per):
+        self.rate = rate
+        self.per = per
+        self.tokens = rate
+        self.updated = time.monotonic()
+
+    def retry_after(self):
+        """Take a request slot, returning 0 or the seconds to wait before retrying."""
+        now = time.monotonic()
+        self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate / self.per)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) * self.per / self.rate
+
+
+class FakeDiscord:
+    def __init__(self, latency=0.0, jitter=0.0, rate_limit=None, seed=0):
+        self.latency = latency
+        self.jitter = jitter
+        # (requests, seconds) allowed per major route (channel, guild or webhook), like Discord's buckets
+        self.rate_limit = rate_limit
+        self.random = random.Random(seed)
+        self.state = None
+        self.guilds = {}
+        self.channels = {}
+        self.messages = collections.defaultdict(dict)  # channel id -> {message id: payload}, oldest first
+        self.pins = collections.defaultdict(list)
+        self.members = {}                              # (guild id, user id) -> member payload
+        self.calls = collections.Counter()
+        self.rate_limited = collections.Counter()
+        self._buckets = {}
+        self._last_id = 0
+        self._role_ids = itertools.count(1000)
+        self._routes = {
+            ("POST", "/guilds/{guild_id}/channels"): self.create_channel,
+            ("PATCH", "/channels/{channel_id}"): self.edit_channel,
+            ("DELETE", "/channels/{channel_id}"): self.delete_channel,
+            ("PUT", "/channels/{channel_id}/permissions/{target}"): self.edit_permissions,
+            ("POST", "/channels/{channel_id}/messages"): self.send_message,
+            ("GET", "/channels/{channel_id}/messages"): self.logs_from,
+            ("PATCH", "/channels/{channel_id}/messages/{message_id}"): self.edit_message,
+            ("DELETE", "/channels/{channel_id}/messages/{message_id}"): self.delete_message,
+            ("POST", "/channels/{channel_id}/messages/bulk-delete"): self.delete_messages,
+            ("GET", "/channels/{channel_id}/messages/pins"): self.pins_from,
+            ("PUT", "/channels/{channel_id}/messages/pins/{message_id}"): self.pin_message,
+            ("POST", "/guilds/{guild_id}/roles"): self.create_role,
+            ("GET", "/guilds/{guild_id}/members/{user_id}"): self.get_member,
+        }
+        self._patterns = {}
+
+    # Setup
+
+    def attach(self, bot):
+        """Route the bot's REST calls here; call before adding cogs so their wrappers see it."""
+        self.state = bot._connection
+        self.state.user = discord.ClientUser(state=self.state, data={**user_payload(BOT_USER_ID, "ticket-bot"), "bot": True})
+        bot.http.request = self.request
+
+    def snowflake(self, when=None):
+        """Return a new, strictly increasing ID timestamped now (or at when)."""
+        new = discord.utils.time_snowflake(when or discord.utils.utcnow())
+        if when is None:
+            new = self._last_id = max(new, self._last_id + 1)
+        return new
+
+    def add_guild(self, name="benchmark", members=0, text_channels=0, tickets=0, closed_tickets=0):
+        """Create a guild and return the discord.Guild built from its GUILD_CREATE payload.
+
+        text_channels plain channels are spread over categories of 50; tickets open and closed_tickets
+        closed ticket channels, each owned by one of the members, go into the ticket categories.
+        """
+        guild_id = self.snowflake()
+        roles = [{"id": str(guild_id), "name": "@everyone", "permissions": "0", "position": 0}]
+        for role_name, offset in ROLE_IDS.items():
+            roles.append({"id": str(guild_id + offset), "name": role_name, "permissions": "0", "position": offset})
+        bot_role = {"id": str(guild_id + 3), "name": "ticket-bot", "permissions": str(ADMINISTRATOR), "position": 3}
+        roles.append(bot_role)
+
+        payload = {
+            "id": str(guild_id),
+            "name": name,
+            "owner_id": str(BOT_USER_ID),
+            "roles": roles,
+            "members": [member_payload(BOT_USER_ID, "ticket-bot", [guild_id + 3])],
+            "member_count": members + 1,
+            "channels": [],
+            "emojis": [],
+            "stickers": [],
+            "features": [],
+        }
+        self.guilds[guild_id] = payload
+        self.members[(guild_id, BOT_USER_ID)] = payload["members"][0]
+        for i in range(members):
+            member = member_payload(FIRST_MEMBER_ID + i, f"member{i}")
+            self.members[(guild_id, FIRST_MEMBER_ID + i)] = member
+            payload["members"].append(member)
+
+        for start in range(0, text_channels, 50):
+            category = self._channel(guild_id, f"category-{start // 50}", CATEGORY_TYPE)
+            for i in range(start, min(start + 50, text_channels)):
+                self._channel(guild_id, f"channel-{i}", TEXT_TYPE, parent_id=category["id"])
+
+        open_category = self._channel(guild_id, TICKET_CATEGORY_NAME, CATEGORY_TYPE)
+        closed_category = self._channel(guild_id, CLOSED_CATEGORY_NAME, CATEGORY_TYPE)
+        for number in range(1, tickets + closed_tickets + 1):
+            owner_id = FIRST_MEMBER_ID + (number - 1) % max(members, 1)
+            is_open = number <= tickets
+            self._channel(
+                guild_id, f"ticket-{number:04}-member", TEXT_TYPE,
+                parent_id=(open_category if is_open else closed_category)["id"],
+                overwrites=[
+                    overwrite_payload(guild_id, 0, deny=discord.Permissions(view_channel=True).value),
+                    overwrite_payload(owner_id, 1, allow=discord.Permissions(
+                        view_channel=True, send_messages=is_open, read_message_history=True
+                    ).value),
+                ],
+            )
+        payload["channels"] = [channel for channel in self.channels.values() if channel["guild_id"] == str(guild_id)]
+
+        guild = discord.Guild(data=payload, state=self.state)
+        self.state._add_guild(guild)
+        return guild
+
+    def member(self, guild, index):
+        """Return a discord.Member for the index-th generated member, as an event payload would carry it."""
+        data = self.members[(guild.id, FIRST_MEMBER_ID + index)]
+        return discord.Member(data=data, guild=guild, state=self.state)
+
+    def seed_messages(self, channel_id, count, authors, start=None):
+        """Add count historical messages to a channel without dispatching any events."""
+        start = start or discord.utils.utcnow() - datetime.timedelta(days=1)
+        channel = self.channels[channel_id]
+        for i in range(count):
+            message_id = self.snowflake(start + datetime.timedelta(milliseconds=i))
+            author = authors[i % len(authors)]
+            self.messages[channel_id][message_id] = self._message(
+                channel, message_id, author, f"Message {i} " + "lorem ipsum " * (i % 20)
+            )
+        channel["last_message_id"] = str(max(self.messages[channel_id]))
+
+    # The request entry point
+
+    async def request(self, route, *, files=None, form=None, **kwargs):
+        endpoint = f"{route.method} {route.path}"
+        self.calls[endpoint] += 1
+        await self._throttle(route)
+        if self.latency:
+            await asyncio.sleep(self.latency * (1 + self.random.uniform(-self.jitter, self.jitter)))
+
+        handler = self._routes.get((route.method, route.path))
+        if handler is None:
+            raise NotImplementedError(f"FakeDiscord has no handler for {endpoint}")
+        payload = kwargs.get("json")
+        if form:
+            payload = json.loads(next(part["value"] for part in form if part["name"] == "payload_json"))
+        return handler(self._parameters(route), payload or {}, kwargs.get("params") or {}, files or [])
+
+    async def _throttle(self, route):
+        if not self.rate_limit:
+            return
+        key = route.channel_id or route.guild_id or route.webhook_id
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = RouteBucket(*self.rate_limit)
+        while True:
+            retry_after = bucket.retry_after()
+            if not retry_after:
+                return
+            self.rate_limited[f"{route.method} {route.path}"] += 1
+            log.warning(
+                "We are being rate limited. %s %s responded with 429. Retrying in %.2f seconds.",
+                route.method, route.url, retry_after,
+            )
+            await asyncio.sleep(retry_after)
+
+    def _parameters(self, route):
+        pattern = self._patterns.get(route.path)
+        if pattern is None:
+            pattern = self._patterns[route.path] = re.compile(
+                re.sub(r"\\{(\w+)\\}", r"(?P<\1>[^/]+)", re.escape(route.path)) + "$"
+            )
+        path = route.url[len(route.BASE):]
+        return {key: int(value) for key, value in pattern.match(path).groupdict().items()}
+
+    def _dispatch(self, event, data):
+        # The gateway echoes a change shortly after the REST call that made it returns
+        asyncio.get_running_loop().call_soon(getattr(self.state, f"parse_{event}"), data)
+
+    def _not_found(self, what):
+        raise discord.NotFound(FakeResponse(404, "Not Found"), f"Unknown {what}")
+
+    # Payload builders
+
+    def _channel(self, guild_id, name, channel_type, parent_id=None, overwrites=(), topic=None):
+        channel_id = self.snowflake()
+        channel = {
+            "id": str(channel_id),
+            "guild_id": str(guild_id),
+            "type": channel_type,
+            "name": name,
+            "position": len(self.channels),
+            "parent_id": str(parent_id) if parent_id else None,
+            "permission_overwrites": list(overwrites),
+            "topic": topic,
+            "nsfw": False,
+            "last_message_id": None,
+            "rate_limit_per_user": 0,
+        }
+        self.channels[channel_id] = channel
+        return channel
+
+    def _message(self, channel, message_id, author, content, payload=None, attachments=()):
+        payload = payload or {}
+        guild_id = int(channel["guild_id"])
+        member = self.members.get((guild_id, int(author["id"])))
+        return {
+            "id": str(message_id),
+            "channel_id": channel["id"],
+            "guild_id": channel["guild_id"],
+            "author": author,
+            "member": {key: value for key, value in member.items() if key != "user"} if member else None,
+            "content": content,
+            "timestamp": discord.utils.snowflake_time(message_id).isoformat(),
+            "edited_timestamp": None,
+            "tts": False,
+            "mention_everyone": False,
+            "mentions": [],
+            "mention_roles": [],
+            "attachments": list(attachments),
+            "embeds": payload.get("embeds", []),
+            "components": payload.get("components", []),
+            "pinned": False,
+            "type": 0,
+            "flags": 0,
+        }
+
+    # Route handlers
+
+    def create_channel(self, params, payload, query, files):
+        guild_id = params["guild_id"]
+        channel = self._channel(
+            guild_id, payload["name"], payload.get("type", TEXT_TYPE), payload.get("parent_id"),
+            [overwrite_payload(o["id"], o["type"], o["allow"], o["deny"]) for o in payload.get("permission_overwrites", [])],
+            payload.get("topic"),
+        )
+        self._dispatch("channel_create", dict(channel))
+        return dict(channel)
+
+    def edit_channel(self, params, payload, query, files):
+        channel = self.channels.get(params["channel_id"]) or self._not_found("Channel")
+        for key in ("name", "topic", "position"):
+            if key in payload:
+                channel[key] = payload[key]
+        if "parent_id" in payload:
+            channel["parent_id"] = str(payload["parent_id"]) if payload["parent_id"] else None
+        if "permission_overwrites" in payload:
+            channel["permission_overwrites"] = [
+                overwrite_payload(o["id"], o["type"], o["allow"], o["deny"]) for o in payload["permission_overwrites"]
+            ]
+        self._dispatch("channel_update", dict(channel))
+        return dict(channel)
+
+    def delete_channel(self, params, payload, query, files):
+        channel = self.channels.pop(params["channel_id"], None) or self._not_found("Channel")
+        self.messages.pop(params["channel_id"], None)
+        self._dispatch("channel_delete", channel)
+        return channel
+
+    def edit_permissions(self, params, payload, query, files):
+        channel = self.channels.get(params["channel_id"]) or self._not_found("Channel")
+        target = str(params["target"])
+        channel["permission_overwrites"] = [o for o in channel["permission_overwrites"] if o["id"] != target]
+        channel["permission_overwrites"].append(overwrite_payload(target, payload["type"], payload["allow"], payload["deny"]))
+        self._dispatch("channel_update", dict(channel))
+
+    def send_message(self, params, payload, query, files):
+        channel = self.channels.get(params["channel_id"]) or self._not_found("Channel")
+        message_id = self.snowflake()
+        attachments = [
+            {"id": str(self.snowflake()), "filename": file.filename, "size": 0,
+             "url": f"https://cdn.example/{message_id}/{file.filename}", "proxy_url": ""}
+            for file in files
+        ]
+        message = self._message(
+            channel, message_id, user_payload(BOT_USER_ID, "ticket-bot"), payload.get("content") or "",
+            payload, attachments,
+        )
+        self.messages[params["channel_id"]][message_id] = message
+        channel["last_message_id"] = str(message_id)
+        self._dispatch("message_create", dict(message))
+        return message
+
+    def logs_from(self, params, payload, query, files):
+        messages = self.messages.get(params["channel_id"], {})
+        limit = int(query.get("limit", 50))
+        ids = sorted(messages)
+        if "after" in query:
+            after = int(query["after"])
+            selected = [i for i in ids if i > after][:limit]
+        else:
+            before = int(query["before"]) if "before" in query else None
+            selected = [i for i in ids if before is None or i < before][-limit:]
+        # Discord returns newest first
+        return [messages[i] for i in reversed(selected)]
+
+    def edit_message(self, params, payload, query, files):
+        message = self.messages[params["channel_id"]].get(params["message_id"]) or self._not_found("Message")
+        for key in ("content", "embeds", "components"):
+            if key in payload:
+                message[key] = payload[key]
+        return dict(message)
+
+    def delete_message(self, params, payload, query, files):
+        if self.messages[params["channel_id"]].pop(params["message_id"], None) is None:
+            self._not_found("Message")
+        channel = self.channels[params["channel_id"]]
+        self._dispatch("message_delete", {
+            "id": str(params["message_id"]), "channel_id": channel["id"], "guild_id": channel["guild_id"],
+        })
+
+    def delete_messages(self, params, payload, query, files):
+        channel = self.channels.get(params["channel_id"]) or self._not_found("Channel")
+        for message_id in payload["messages"]:
+            self.messages[params["channel_id"]].pop(int(message_id), None)
+        self._dispatch("message_delete_bulk", {
+            "ids": [str(i) for i in payload["messages"]], "channel_id": channel["id"], "guild_id": channel["guild_id"],
+        })
+
+    def pins_from(self, params, payload, query, files):
+        messages = self.messages.get(params["channel_id"], {})
+        pinned_at = discord.utils.utcnow().isoformat()
+        return {
+            "items": [{"pinned_at": pinned_at, "message": messages[i]} for i in self.pins[params["channel_id"]] if i in messages],
+            "has_more": False,
+        }
+
+    def pin_message(self, params, payload, query, files):
+        self.pins[params["channel_id"]].append(params["message_id"])
+
+    def create_role(self, params, payload, query, files):
+        guild_id = params["guild_id"]
+        role = {
+            "id": str(next(self._role_ids)), "name": payload.get("name", "new role"),
+            "permissions": str(payload.get("permissions", 0)), "position": 1, "color": 0,
+            "hoist": False, "managed": False, "mentionable": False,
+        }
+        self.guilds[guild_id]["roles"].append(role)
+        self._dispatch("guild_role_create", {"guild_id": str(guild_id), "role": role})
+        return role
+
+    def get_member(self, params, payload, query, files):
+        member = self.members.get((params["guild_id"], params["user_id"]))
+        return member if member is not None else self._not_found("Member")
@@ -0,0 +1,98 @@
+"""Compare the resident memory of the "full" and "lean" memory profiles for one large guild.
+
+Builds a guild from a synthetic GUILD_CREATE payload holding every member, which is what the
+full profile ends up caching after chunking, and reports the RSS growth for each profile:
+
+    python -m benchmarks.member_memory --members 100000
+"""
+import argparse
+import json
+import subprocess
+import sys
+
+ROLE_COUNT = 20
+
+
+def rss_kb():
+    with open("/proc/self/status") as status:
+        for line in status:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1])
+    return 0
+
+
+def guild_payload(guild_id, member_count):
+    roles = [{"id": str(guild_id), "name": "@everyone", "permissions": "0", "position": 0}]
+    roles += [
+        {"id": str(guild_id + i), "name": f"role-{i}", "permissions": "0", "position": i}
+        for i in range(1, ROLE_COUNT)
+    ]
+    members = [
+        {
+            "user": {"id": str(10**17 + i), "username": f"member{i}", "discriminator": "0", "avatar": None},
+            "roles": [str(guild_id + 1 + i % (ROLE_COUNT - 1))],
+            "joined_at": "2024-01-01T00:00:00+00:00",
+            "deaf": False,
+            "mute": False,
+            "flags": 0,
+        }
+        for i in range(member_count)
+    ]
+    return {
+        "id": str(guild_id),
+        "name": "benchmark",
+        "owner_id": str(10**17),
+        "roles": roles,
+        "members": members,
+        "member_count": member_count,
+        "channels": [],
+        "emojis": [],
+        "stickers": [],
+        "features": [],
+    }
+
+
+def measure(profile, member_count):
+    """Return the RSS growth from loading the guild under one profile, and the total RSS after."""
+    import discord
+    from main import cache_options
+
+    intents = discord.Intents.default()
+    intents.members = True
+    intents.message_content = True
+    client = discord.Client(intents=intents, **cache_options(profile))
+
+    payload = guild_payload(10**18, member_count)
+    before = rss_kb()
+    guild = discord.Guild(data=payload, state=client._connection)
+    client._connection._add_guild(guild)
+    grown = rss_kb() - before
+    del payload
+    return {"profile": profile, "cached_members": len(guild.members), "growth_kb": grown, "rss_kb": rss_kb()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--members", type=int, default=100_000)
+    parser.add_argument("--profile", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.profile:
+        print(json.dumps(measure(args.profile, args.members)))
+        return
+
+    # One process per profile so neither measurement sees the other's freed-but-kept memory
+    for profile in ("full", "lean"):
+        output = subprocess.run(
+            [sys.executable, "-m", "benchmarks.member_memory", "--members", str(args.members), "--profile", profile],
+            capture_output=True, text=True, check=True,
+        ).stdout
+        result = json.loads(output)
+        print(
+            f"{profile:>5}: {result['cached_members']:>7} cached members, "
+            f"+{result['growth_kb'] / 1024:.1f} MiB for the guild, {result['rss_kb'] / 1024:.1f} MiB RSS in total"
+        )
+
+
+if __name__ == "__main__":
+    main()
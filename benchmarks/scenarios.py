@@ -0,0 +1,201 @@
+"""Benchmark scenarios. Each builds a fresh bot against FakeDiscord and returns a Result."""
+import asyncio
+import time
+
+import discord
+
+from benchmarks.fake_discord import FakeDiscord
+
+
+class Result:
+    def __init__(self, name):
+        self.name = name
+        self.latencies = []
+        self.seconds = 0.0
+        self.extra = {}
+
+    def timed(self, coro_factory):
+        """Wrap an operation so its latency is recorded."""
+        async def run(*args):
+            start = time.perf_counter()
+            try:
+                return await coro_factory(*args)
+            finally:
+                self.latencies.append(time.perf_counter() - start)
+        return run
+
+
+async def make_bot(fake):
+    from main import create_bot
+    from cogs.ticket_bot import TicketBot
+
+    bot = create_bot()
+    fake.attach(bot)
+    # What login would do: bind the client and its state to the running loop, so events dispatch
+    await bot._async_setup_hook()
+    cog = TicketBot(bot)
+    await bot.add_cog(cog)
+    return bot, cog
+
+
+async def settle():
+    """Let the echoed gateway events and listener tasks run."""
+    for _ in range(3):
+        await asyncio.sleep(0)
+
+
+async def index_10k(fake, scale):
+    """Index a guild with 10k channels, then look up members' open tickets against the old scan."""
+    result = Result("index_10k")
+    channels = int(10_000 * scale)
+    tickets = channels // 5
+    members = tickets
+    bot, cog = await make_bot(fake)
+    guild = fake.add_guild(members=members, text_channels=channels - 2 * tickets, tickets=tickets, closed_tickets=tickets)
+
+    start = time.perf_counter()
+    for _ in range(20):
+        rebuild_start = time.perf_counter()
+        cog.ticket_index.rebuild(guild)
+        result.latencies.append(time.perf_counter() - rebuild_start)
+    result.seconds = time.perf_counter() - start
+
+    member_ids = [fake.member(guild, i).id for i in range(members)]
+    start = time.perf_counter()
+    for member_id in member_ids:
+        cog.ticket_index.open_ticket_for(guild, member_id)
+    indexed = time.perf_counter() - start
+
+    # What every ticket request used to do: scan the open category's overwrites
+    start = time.perf_counter()
+    for member_id in member_ids[:200]:
+        discord.utils.find(
+            lambda c: c.category and c.category.name == "OPENED TICKETS"
+            and any(target.id == member_id for target in c.overwrites),
+            guild.text_channels,
+        )
+    scanned = (time.perf_counter() - start) / min(200, len(member_ids)) * len(member_ids)
+
+    result.extra = {
+        "channels": len(guild.channels),
+        "lookup_us": indexed / len(member_ids) * 1e6,
+        "legacy_scan_us": scanned / len(member_ids) * 1e6,
+    }
+    await bot.close()
+    return result
+
+
+async def open_500(fake, scale):
+    """500 members open a ticket at once, with a duplicate click from every tenth member."""
+    result = Result("open_500")
+    members = int(500 * scale)
+    bot, cog = await make_bot(fake)
+    guild = fake.add_guild(members=members)
+    await cog.reconcile_guild(guild)
+    await settle()
+    fake.calls.clear()
+
+    open_ticket = result.timed(cog.open_ticket)
+    clicks = [fake.member(guild, i) for i in range(members)]
+    clicks += clicks[::10]
+    start = time.perf_counter()
+    outcomes = await asyncio.gather(*(open_ticket(guild, member) for member in clicks))
+    result.seconds = time.perf_counter() - start
+    await settle()
+
+    result.extra = {
+        "created": sum(created for _, created in outcomes),
+        "coalesced": cog.coalesced_ticket_requests,
+        "distinct_channels": len({channel.id for channel, _ in outcomes}),
+    }
+    await bot.close()
+    return result
+
+
+async def transcript_20k(fake, scale):
+    """Post the transcript of a 20k-message ticket that predates the archive, then post the new part."""
+    result = Result("transcript_20k")
+    messages = int(20_000 * scale)
+    bot, cog = await make_bot(fake)
+    guild = fake.add_guild(members=10, tickets=1)
+    channel = next(c for c in guild.text_channels if c.name.startswith("ticket-"))
+    owner = fake.member(guild, 0)
+    authors = [fake.members[(guild.id, member.id)]["user"] for member in (fake.member(guild, i) for i in range(10))]
+    fake.seed_messages(channel.id, messages, authors)
+    # The channel in the guild cache was built before the history existed
+    channel.last_message_id = int(fake.channels[channel.id]["last_message_id"])
+    cog.ticket_index.rebuild(guild)
+    await settle()
+    fake.calls.clear()
+
+    post_transcript = result.timed(cog.post_transcript)
+    start = time.perf_counter()
+    await post_transcript(channel, owner)
+    await settle()
+    full_calls = fake.calls.copy()
+
+    # A repeat request after the conversation went on, while the bot was offline, only uploads the new part
+    fake.seed_messages(channel.id, max(messages // 100, 1), authors, start=discord.utils.utcnow())
+    channel.last_message_id = int(fake.channels[channel.id]["last_message_id"])
+    cog.message_archive.reconnected()
+    await post_transcript(channel, owner)
+    await settle()
+    result.seconds = time.perf_counter() - start
+    repeat_calls = fake.calls - full_calls
+
+    def summary(calls):
+        return {
+            "history_requests": calls["GET /channels/{channel_id}/messages"],
+            "uploads": calls["POST /channels/{channel_id}/messages"],
+            "channels_created": calls["POST /guilds/{guild_id}/channels"],
+            "total": sum(calls.values()),
+        }
+
+    checkpoint = await cog.transcript_checkpoints.get(channel.id)
+    result.extra = {
+        "messages": messages,
+        "parts": checkpoint.parts,
+        "full_export": summary(full_calls),
+        "repeat_export": summary(repeat_calls),
+    }
+    await bot.close()
+    return result
+
+
+async def join_burst_5k(fake, scale):
+    """5k members join at once; WELCOME_MODE decides between personal messages and the shared panel."""
+    from config import WELCOME_MODE
+
+    result = Result(f"join_burst_5k[{WELCOME_MODE}]")
+    members = int(5_000 * scale)
+    bot, cog = await make_bot(fake)
+    guild = fake.add_guild(members=members)
+    await cog.reconcile_guild(guild)
+    await settle()
+    fake.calls.clear()
+
+    on_member_join = result.timed(cog.on_member_join)
+    start = time.perf_counter()
+    await asyncio.gather(*(on_member_join(fake.member(guild, i)) for i in range(members)))
+    await cog.welcome_batcher.drain()
+    result.seconds = time.perf_counter() - start
+
+    result.extra = {"scheduled_deletions": len(cog.scheduler), "dropped_cosmetic": cog.rest_queue.dropped}
+    await bot.close()
+    return result
+
+
+SCENARIOS = {
+    "index_10k": (index_10k, {}),
+    "open_500": (open_500, {}),
+    "transcript_20k": (transcript_20k, {}),
+    "join_burst_5k": (join_burst_5k, {"WELCOME_MODE": "member"}),
+    "join_burst_5k_panel": (join_burst_5k, {"WELCOME_MODE": "panel", "WELCOME_BATCH_WINDOW": "0.2"}),
+}
+
+
+async def run(name, scale, latency, jitter, rate_limit):
+    scenario, _ = SCENARIOS[name]
+    fake = FakeDiscord(latency=latency, jitter=jitter, rate_limit=rate_limit)
+    result = await scenario(fake, scale)
+    return result, fake
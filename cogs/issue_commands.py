@@ -3,8 +3,6 @@ from discord.ext import commands
 from discord import app_commands
 from views.issue_selection import IssueSelectionView
 
-from config import TICKET_CATEGORY_NAME
-
 
 class IssueCommands(commands.Cog):
     """A class to manage issue-related commands."""
@@ -19,9 +17,8 @@ class IssueCommands(commands.Cog):
 
             ticket_bot_cog = self.bot.get_cog("TicketBot")
             if (
-                not interaction.channel.category
-                or interaction.channel.category.name != TICKET_CATEGORY_NAME
-                or not ticket_bot_cog.is_admin_or_support(interaction.user)
+                ticket_bot_cog.ticket_category_state(interaction.channel.category) != "open"
+                or not ticket_bot_cog.is_privileged(interaction)
             ):
                 await interaction.response.send_message(
                     "This command can only be used by Admin/Support Team members inside a ticket channel.",
@@ -1,72 +1,212 @@
 import asyncio
+import time
 import discord
 from discord.ext import commands
 from discord import app_commands
 import re
+from typing import Literal
 
 from config import TICKET_CATEGORY_NAME,CLOSED_CATEGORY_NAME,SUPPORT_ROLE_NAME,TEXT_CATEGORY_NAME,OPEN_TICKET_CHANNEL_NAME,TRANSCRIPT_CATEGORY_NAME
+from config import WELCOME_MODE,WELCOME_BATCH_WINDOW,WELCOME_BATCH_SIZE,WARM_POOL_SIZE
+from config import RECONCILE_CONCURRENCY,RECONCILE_INTERVAL,MEMBER_LRU_SIZE,MEMBER_LRU_TTL,CATEGORY_HEADROOM
+from config import ARCHIVE_DIR,ARCHIVE_AFTER,ARCHIVE_INTERVAL,ARCHIVE_CONCURRENCY,ARCHIVE_BATCH_SIZE
+from config import STALE_TICKET_AFTER,STALE_TICKET_WARNING,STALE_CLOSE_CONCURRENCY,BULK_CONCURRENCY
+from views.issue_selection import ISSUE_LINKS
 from views.ticket_controls import TicketControlView,CloseTicketView,ConfirmCloseTicketView
+from services.bot_metrics import BotMetrics
+from services.bulk_jobs import BulkJobs
+from services.category_pools import CategoryPools
+from services.channel_mutations import apply_channel_changes, with_send_messages
+from services.database import Database
+from services.guild_resources import GuildResources, category_key, channel_key, role_key
+from services.guild_settings import GuildSettings
+from services.interaction_router import InteractionRouter
+from services.member_cache import MemberCache
+from services.message_archive import MessageArchive
+from services.permissions import PermissionEngine
+from services.rest_queue import RestQueue, INTERACTIVE, STATE_CHANGE, COSMETIC
+from services.scheduler import ActionScheduler
+from services.single_flight import SingleFlight
+from services.stale_tickets import StaleTicketSweeper
+from services.ticket_archive import TicketArchive, TicketArchiver, last_activity
+from services.ticket_search import SearchTicket, TicketSearch
+from services.transcript_checkpoints import TranscriptCheckpoints
+from services.transcripts import export_transcript, history_entries
+from services.warm_pool import WarmPool, POOL_CHANNEL_NAME
+from services.welcome import WelcomeBatcher
+from services.ticket_counter import TicketCounter
+from services.ticket_index import TicketIndex
+from services.ticket_open_times import TicketOpenTimes
 
 class TicketBot(commands.Cog):
     """Main Ticket Bot Class for Multi-Server Support"""
 
     def __init__(self, bot):
         self.bot = bot
+        self.db = Database()
+        self.guild_settings = GuildSettings(self.db)
+        self.resources = GuildResources(self.guild_settings)
+        self.category_pools = CategoryPools(
+            self.resources, (TICKET_CATEGORY_NAME, CLOSED_CATEGORY_NAME, TRANSCRIPT_CATEGORY_NAME), CATEGORY_HEADROOM
+        )
+        self.permissions = PermissionEngine(self.guild_settings)
+        self.ticket_index = TicketIndex(self.ticket_category_state)
+        self.ticket_counter = TicketCounter(self.db)
+        self.ticket_open_times = TicketOpenTimes(self.db)
+        self.ticket_creations = SingleFlight()
+        self.transcript_checkpoints = TranscriptCheckpoints(self.db)
+        self.members = MemberCache(MEMBER_LRU_SIZE, MEMBER_LRU_TTL)
+        self.message_archive = MessageArchive(self.db, self.members)
+        self.rest_queue = RestQueue()
+        self.scheduler = ActionScheduler(bot, self.db, self.rest_queue)
+        self.welcome_batcher = WelcomeBatcher(self.send_welcome_batch, WELCOME_BATCH_WINDOW, WELCOME_BATCH_SIZE)
+        self.panel_setups = SingleFlight()
+        self.ticket_panels = {}
+        self.warm_pool = WarmPool(WARM_POOL_SIZE, self.create_pool_channel)
+        self.reconcile_task = None
+        self.ticket_archive = TicketArchive(self.db, ARCHIVE_DIR)
+        self.ticket_search = TicketSearch(self.db)
+        self.stale_tickets = StaleTicketSweeper(
+            self.guild_settings, self.ticket_index, self.warn_stale_ticket, self.close_stale_ticket,
+            STALE_TICKET_AFTER, STALE_TICKET_WARNING, STALE_CLOSE_CONCURRENCY,
+        )
+        self.bulk_jobs = BulkJobs(
+            self.db, self.run_bulk_item, self.report_bulk_job, BULK_CONCURRENCY, self.rest_queue.is_throttled
+        )
+        self.archiver = TicketArchiver(
+            bot, self.ticket_index, self.archive_ticket,
+            ARCHIVE_AFTER, ARCHIVE_INTERVAL, ARCHIVE_CONCURRENCY, ARCHIVE_BATCH_SIZE,
+        )
+        self.interaction_router = InteractionRouter(guard=self.check_privileged)
+        self.metrics = BotMetrics(bot, self.interaction_router, self.rest_queue, self.ticket_index)
+        self.interaction_router.observer = self.metrics.observe_handler
+        self.register_interaction_handlers()
+
+    async def cog_load(self):
+        self.rest_queue.install()
+        self.metrics.install()
+        self._tree_on_error = self.bot.tree.on_error
+        self.bot.tree.on_error = self.on_app_command_error
+        self.message_archive.start()
+
+    async def cog_unload(self):
+        if self.reconcile_task:
+            self.reconcile_task.cancel()
+        self.archiver.stop()
+        self.stale_tickets.stop()
+        self.bulk_jobs.stop()
+        self.warm_pool.stop()
+        self.category_pools.stop()
+        self.welcome_batcher.stop()
+        self.scheduler.stop()
+        await self.message_archive.stop()
+        self.rest_queue.uninstall()
+        self.metrics.uninstall()
+        self.bot.tree.on_error = self._tree_on_error
+        self.db.close()
 
     async def get_or_create_category(self, guild, category_name):
-        """Check if a category exists, and create it if it doesn't."""
-        category = discord.utils.get(guild.categories, name=category_name)
-        if not category:
-            category = await guild.create_category(category_name)
-        return category
-    
-    async def ensure_categories_exist(self, guild):
-        """Ensure both ticket and closed categories exist."""
-        ticket_category = await self.get_or_create_category(guild, TICKET_CATEGORY_NAME)
-        closed_category = await self.get_or_create_category(guild, CLOSED_CATEGORY_NAME)
-        return ticket_category, closed_category
+        """Return the category by its stored ID, adopting or creating it only the first time."""
+        return await self.resources.category(guild, category_name)
+
+    def ticket_category_state(self, category):
+        """Return "open" or "closed" for categories of the ticket pools and None for anything else."""
+        pool = self.category_pools.pool_of(category)
+        if pool == TICKET_CATEGORY_NAME:
+            return "open"
+        if pool == CLOSED_CATEGORY_NAME:
+            return "closed"
+        return None
+
+    async def create_in_pool(self, guild, pool, create):
+        """Create a channel with create(category) in a category of the pool that has room for it."""
+        category = await self.category_pools.acquire(guild, pool)
+        channel = None
+        try:
+            channel = await create(category)
+            return channel
+        finally:
+            self.category_pools.release(guild.id, category.id, channel)
+
+    async def move_to_pool(self, channel, pool, **changes):
+        """Move a channel into a category of the pool with one edit, returning the edited channel or None."""
+        category = await self.category_pools.acquire(channel.guild, pool)
+        updated = None
+        try:
+            updated = await self.rest_queue.submit(channel.guild.id, STATE_CHANGE, lambda: apply_channel_changes(
+                channel, category=category, **changes
+            ))
+            return updated
+        finally:
+            self.category_pools.release(channel.guild.id, category.id, updated)
+
+    async def get_or_create_support_role(self, guild):
+        """Return the support role, creating it if it doesn't exist."""
+        return await self.resources.role(
+            guild,
+            SUPPORT_ROLE_NAME,
+            permissions=discord.Permissions(permissions=0),
+            reason="Support role required for ticket management"
+        )
+
+    async def create_pool_channel(self, guild):
+        """Create a hidden ticket channel for the warm pool."""
+        support_role = await self.get_or_create_support_role(guild)
+        return await self.create_in_pool(guild, TICKET_CATEGORY_NAME, lambda category: guild.create_text_channel(
+            POOL_CHANNEL_NAME,
+            category=category,
+            overwrites={
+                guild.default_role: discord.PermissionOverwrite(view_channel=False),
+                support_role: discord.PermissionOverwrite(view_channel=True, send_messages=True,read_message_history=True),
+            },
+            reason="Warm pool ticket channel",
+        ))
+
+    async def claim_pool_channel(self, guild, channel_name, member, member_overwrite):
+        """Turn a pooled channel into a member's ticket with a single edit, or return None."""
+        channel = self.warm_pool.claim(guild)
+        if channel is None:
+            return None
+        overwrites = dict(channel.overwrites)
+        overwrites[member] = member_overwrite
+        try:
+            return await apply_channel_changes(channel, name=channel_name, overwrites=overwrites) or channel
+        except discord.NotFound:
+            return None
 
     async def create_ticket_channel(self, guild, member):
         """Create a ticket channel with unique numbering across all categories."""
-        ticket_category, closed_category = await self.ensure_categories_exist(guild)
-        support_role = discord.utils.get(guild.roles, name=SUPPORT_ROLE_NAME)
-        if not support_role:
-            support_role = await guild.create_role(
-            name=SUPPORT_ROLE_NAME,
-            permissions=discord.Permissions(permissions=0), 
-            reason="Support role required for ticket management"
+        next_ticket_number = await self.ticket_counter.allocate(
+            guild.id, floor=self.ticket_index.highest_number(guild.id)
         )
-        print(f"Created support role: {SUPPORT_ROLE_NAME}")
 
-        all_ticket_channels = [
-            channel for channel in guild.channels
-            if channel.category in [ticket_category, closed_category] and channel.name.startswith("ticket-")
-        ]
+        formatted_number = f"{next_ticket_number:04}"
+        sanitized_member_name = re.sub(r'[^a-zA-Z0-9_-]', '', member.name.lower())
+        channel_name = f"ticket-{formatted_number}-{sanitized_member_name}"
+        member_overwrite = discord.PermissionOverwrite(view_channel=True, send_messages=True,read_message_history=True)
 
-        ticket_numbers = []
-        for channel in all_ticket_channels:
-            try:
-                number = int(channel.name.split("-")[1])
-                ticket_numbers.append(number)
-            except ValueError:
-                continue 
+        channel = None
+        if self.warm_pool:
+            channel = await self.claim_pool_channel(guild, channel_name, member, member_overwrite)
 
-        next_ticket_number = max(ticket_numbers, default=0) + 1 
+        if channel is None:
+            support_role = await self.get_or_create_support_role(guild)
 
-        formatted_number = f"{next_ticket_number:04}"
+            overwrites = {
+                guild.default_role: discord.PermissionOverwrite(view_channel=False),
+                member: member_overwrite,
+                support_role: discord.PermissionOverwrite(view_channel=True, send_messages=True,read_message_history=True),
+            }
+            channel = await self.create_in_pool(guild, TICKET_CATEGORY_NAME, lambda category: guild.create_text_channel(
+                channel_name,
+                category=category,
+                overwrites=overwrites,
+            ))
 
-        overwrites = {
-            guild.default_role: discord.PermissionOverwrite(view_channel=False),
-            member: discord.PermissionOverwrite(view_channel=True, send_messages=True,read_message_history=True),
-            support_role: discord.PermissionOverwrite(view_channel=True, send_messages=True,read_message_history=True),
-        }
-        sanitized_member_name = re.sub(r'[^a-zA-Z0-9_-]', '', member.name.lower())
-        channel_name = f"ticket-{formatted_number}-{sanitized_member_name}"
-        channel = await guild.create_text_channel(
-            channel_name,
-            category=ticket_category,
-            overwrites=overwrites,
-        )
+        # Index right away so a second click does not wait for the gateway event
+        self.ticket_index.upsert(channel)
+        await self.message_archive.track_channel(channel, complete=True)
+        await self.ticket_open_times.record(channel)
 
        # Create an embed for the welcome message
         embed = discord.Embed(
@@ -83,6 +223,25 @@ class TicketBot(commands.Cog):
 
         return channel
 
+    @property
+    def coalesced_ticket_requests(self):
+        """Number of ticket requests that joined an in-flight creation instead of starting one."""
+        return self.ticket_creations.coalesced
+
+    async def open_ticket(self, guild, member):
+        """Return (channel, created) for a member's ticket, creating at most one at a time per member."""
+        existing_channel = self.ticket_index.open_ticket_for(guild, member.id)
+        if existing_channel:
+            return existing_channel, False
+
+        key = (guild.id, member.id)
+        created = not self.ticket_creations.in_flight(key)
+        channel = await self.ticket_creations.run(
+            key,
+            lambda: self.rest_queue.submit(guild.id, INTERACTIVE, lambda: self.create_ticket_channel(guild, member))
+        )
+        return channel, created
+
     @app_commands.command(name="create_ticket", description="Create a new ticket channel.")
     async def create_ticket_command(self, interaction: discord.Interaction):
         """Slash command to create a ticket."""
@@ -97,39 +256,25 @@ class TicketBot(commands.Cog):
                 )
                 return
 
-            ticket_category = await ticket_bot_cog.get_or_create_category(interaction.guild, TICKET_CATEGORY_NAME)
-            # Check for an existing ticket
-            existing_channel = discord.utils.find(
-                lambda c: (
-                    c.category == ticket_category
-                    and c.overwrites_for(interaction.user).view_channel
-                    and c.overwrites_for(interaction.user).send_messages
-                ),
-                interaction.guild.channels
-            )
+            channel, created = await ticket_bot_cog.open_ticket(interaction.guild, interaction.user)
 
-            if existing_channel:
+            if not created:
                 # Notify the user about the existing ticket
                 followup_message = await interaction.followup.send(
-                    f"You already have an open ticket: {existing_channel.mention}",
+                    f"You already have an open ticket: {channel.mention}",
                     ephemeral=True
                 )
                 # Delete the follow-up after 5 seconds
-                await asyncio.sleep(5)
-                await followup_message.delete()
+                await self.scheduler.delete_later(followup_message, 5)
                 return
 
-            # Create a new ticket channel
-            channel = await ticket_bot_cog.create_ticket_channel(interaction.guild, interaction.user)
-
             # Notify the user about the new ticket
             followup_message = await interaction.followup.send(
                 f"Ticket created successfully: {channel.mention}",
                 ephemeral=True
             )
             # Delete the follow-up after 5 seconds
-            await asyncio.sleep(5)
-            await followup_message.delete()
+            await self.scheduler.delete_later(followup_message, 5)
 
         except Exception as e:
             # Handle errors and notify the user
@@ -155,7 +300,7 @@ class TicketBot(commands.Cog):
                 )
                 return
 
-            if channel.category and channel.category.name == TICKET_CATEGORY_NAME:
+            if ticket_bot_cog.ticket_category_state(channel.category) == "open":
                 view = ConfirmCloseTicketView(ticket_bot_cog, channel)
                 await interaction.followup.send(
                     "Are you sure you would like to close this ticket?",
@@ -179,18 +324,15 @@ class TicketBot(commands.Cog):
 
 
     async def close_ticket_channel(self, channel, guild, closed_by_user):
-        """Move the ticket channel to the closed category and disable sending messages."""
-        closed_category = await self.get_or_create_category(guild, CLOSED_CATEGORY_NAME)
-        
-        await channel.edit(category=closed_category)
-
-        overwrites = channel.overwrites
-        for target, perms in overwrites.items():
-            if isinstance(target, discord.Member) or isinstance(target, discord.Role):
-                perms.send_messages = False
-                overwrites[target] = perms
-
-        await channel.edit(overwrites=overwrites)
+        """Move the ticket channel to a closed category and disable sending messages."""
+        updated = await self.move_to_pool(
+            channel,
+            CLOSED_CATEGORY_NAME,
+            overwrites=with_send_messages(channel.overwrites, False),
+            reason=f"Ticket closed by {closed_by_user}",
+        )
+        if updated:
+            self.ticket_index.upsert(updated)
 
         embed = discord.Embed(
             title="Ticket Closed",
@@ -206,6 +348,344 @@ class TicketBot(commands.Cog):
         await self.send_ticket_controls(channel, self)
 
 
+    async def warn_stale_ticket(self, channel_id, guild_id, closes_at):
+        """Tell a quiet ticket when it is going to be closed."""
+        channel = self.bot.get_channel(channel_id)
+        if channel is None or self.ticket_category_state(channel.category) != "open":
+            return False
+        embed = discord.Embed(
+            title="Inactive Ticket",
+            description=(
+                f"This ticket has had no messages for a while and will be closed <t:{int(closes_at)}:R>.\n"
+                "Send a message to keep it open."
+            ),
+            color=0xFFA500,
+        )
+        await self.rest_queue.submit(guild_id, STATE_CHANGE, lambda: channel.send(embed=embed))
+        return True
+
+    async def close_stale_ticket(self, channel_id, guild_id):
+        """Close a ticket that stayed quiet past its guild's limit."""
+        channel = self.bot.get_channel(channel_id)
+        if channel is None or self.ticket_category_state(channel.category) != "open":
+            return False
+        await self.close_ticket_channel(channel, channel.guild, channel.guild.me)
+        print(f"Closed inactive ticket {channel.name} in {channel.guild.name}.")
+        return True
+
+    @app_commands.command(name="stale_tickets", description="Close open tickets automatically after a period without messages.")
+    @app_commands.describe(
+        close_after_hours="Hours without messages before a ticket is closed (0 turns this off)",
+        warn_before_hours="Hours before closing to post a warning (0 for no warning)",
+    )
+    @app_commands.default_permissions(administrator=True)
+    @app_commands.guild_only()
+    async def stale_tickets_command(
+        self, interaction: discord.Interaction, close_after_hours: float, warn_before_hours: float = None
+    ):
+        """Slash command to configure the inactive-ticket sweeper for this server."""
+        try:
+            if warn_before_hours is None:
+                warn_before = self.stale_tickets.limits(interaction.guild.id)[1]
+            else:
+                warn_before = max(0.0, warn_before_hours) * 3600
+            close_after = max(0.0, close_after_hours) * 3600
+            await self.stale_tickets.configure(interaction.guild.id, close_after, warn_before)
+
+            if close_after:
+                warning = f", with a warning {warn_before / 3600:g} hour(s) before" if warn_before else ""
+                message = f"Open tickets will be closed after {close_after_hours:g} hour(s) without messages{warning}."
+            else:
+                message = "Open tickets will no longer be closed automatically."
+            await interaction.response.send_message(message, ephemeral=True)
+        except Exception as e:
+            await interaction.response.send_message(
+                "An error occurred while updating the inactive ticket settings.", ephemeral=True
+            )
+            print(f"Error updating inactive ticket settings: {e}")
+
+    bulk_tickets = app_commands.Group(
+        name="bulk_tickets",
+        description="Close, export or delete many tickets at once.",
+        default_permissions=discord.Permissions(administrator=True),
+        guild_only=True,
+    )
+
+    def bulk_targets(self, guild, state, older_than_hours, newer_than_hours, owner):
+        """Return the IDs of the guild's tickets matching a bulk command's filters, oldest first."""
+        now = time.time()
+        targets = []
+        for channel_id in self.ticket_index.channel_ids(guild.id, None if state == "all" else state):
+            channel = guild.get_channel(channel_id)
+            if channel is None:
+                continue
+            age = now - self.ticket_open_times.get(channel)
+            if older_than_hours and age < older_than_hours * 3600:
+                continue
+            if newer_than_hours and age > newer_than_hours * 3600:
+                continue
+            if owner and owner.id not in self.ticket_index.ticket_entry(guild.id, channel_id)[3]:
+                continue
+            targets.append(channel)
+        return [channel.id for channel in sorted(targets, key=self.ticket_open_times.get)]
+
+    def bulk_job_status(self, job):
+        handled = job.done + job.failed
+        failed = f", {job.failed} failed" if job.failed else ""
+        status = {"running": "in progress", "done": "finished", "cancelled": "cancelled"}[job.status]
+        return f"Bulk {job.action} #{job.id} {status}: {handled}/{job.total} ticket(s){failed}."
+
+    async def start_bulk_job(self, interaction, action, state, older_than_hours, newer_than_hours, owner):
+        try:
+            targets = self.bulk_targets(interaction.guild, state, older_than_hours, newer_than_hours, owner)
+            if not targets:
+                await interaction.response.send_message("No tickets match those filters.", ephemeral=True)
+                return
+
+            await interaction.response.send_message(
+                f"Starting bulk {action} of {len(targets)} ticket(s). "
+                "Progress is posted in this channel; stop it with `/bulk_tickets cancel`.",
+                ephemeral=True,
+            )
+            # A regular message rather than the interaction response, which can only be edited for 15 minutes.
+            # It goes out before the job is stored, so a job nobody can follow never resumes after a restart.
+            message = await interaction.channel.send(f"Starting bulk {action} of {len(targets)} ticket(s)…")
+            job = await self.bulk_jobs.create(interaction.guild.id, action, interaction.user.id, targets, message)
+            self.bulk_jobs.start(job)
+        except Exception as e:
+            print(f"Error starting bulk {action}: {e}")
+            error = f"An error occurred while starting the bulk {action}; no tickets were changed."
+            if interaction.response.is_done():
+                await interaction.followup.send(error, ephemeral=True)
+            else:
+                await interaction.response.send_message(error, ephemeral=True)
+
+    @bulk_tickets.command(name="close", description="Close open tickets in bulk.")
+    @app_commands.describe(
+        older_than_hours="Only tickets opened at least this many hours ago",
+        newer_than_hours="Only tickets opened within this many hours",
+        owner="Only tickets opened by this member",
+    )
+    async def bulk_close_command(
+        self, interaction: discord.Interaction,
+        older_than_hours: float = 0.0, newer_than_hours: float = 0.0, owner: discord.User = None,
+    ):
+        """Slash command to close every open ticket matching the filters."""
+        await self.start_bulk_job(interaction, "close", "open", older_than_hours, newer_than_hours, owner)
+
+    @bulk_tickets.command(name="transcript", description="Export the transcripts of many tickets.")
+    @app_commands.describe(
+        state="Which tickets to export",
+        older_than_hours="Only tickets opened at least this many hours ago",
+        newer_than_hours="Only tickets opened within this many hours",
+        owner="Only tickets opened by this member",
+    )
+    async def bulk_transcript_command(
+        self, interaction: discord.Interaction, state: Literal["open", "closed", "all"] = "all",
+        older_than_hours: float = 0.0, newer_than_hours: float = 0.0, owner: discord.User = None,
+    ):
+        """Slash command to export the transcript of every ticket matching the filters."""
+        await self.start_bulk_job(interaction, "transcript", state, older_than_hours, newer_than_hours, owner)
+
+    @bulk_tickets.command(name="delete", description="Delete tickets in bulk. This cannot be undone.")
+    @app_commands.describe(
+        state="Which tickets to delete",
+        older_than_hours="Only tickets opened at least this many hours ago",
+        newer_than_hours="Only tickets opened within this many hours",
+        owner="Only tickets opened by this member",
+    )
+    async def bulk_delete_command(
+        self, interaction: discord.Interaction, state: Literal["open", "closed", "all"] = "closed",
+        older_than_hours: float = 0.0, newer_than_hours: float = 0.0, owner: discord.User = None,
+    ):
+        """Slash command to delete every ticket matching the filters."""
+        await self.start_bulk_job(interaction, "delete", state, older_than_hours, newer_than_hours, owner)
+
+    @bulk_tickets.command(name="cancel", description="Stop a running bulk job.")
+    async def bulk_cancel_command(self, interaction: discord.Interaction, job_id: int):
+        """Slash command to cancel a bulk job; tickets it already handled stay handled."""
+        try:
+            job = await self.bulk_jobs.get(job_id)
+            if job is None or job.guild_id != interaction.guild.id or job.finished:
+                await interaction.response.send_message(f"There is no running bulk job #{job_id}.", ephemeral=True)
+                return
+            await self.bulk_jobs.cancel(job)
+            await interaction.response.send_message(self.bulk_job_status(job), ephemeral=True)
+        except Exception as e:
+            if not interaction.response.is_done():
+                await interaction.response.send_message(
+                    "An error occurred while cancelling the bulk job.", ephemeral=True
+                )
+            print(f"Error cancelling bulk job: {e}")
+
+    async def run_bulk_item(self, job, channel_id):
+        """Apply a bulk job's action to one ticket, skipping tickets that changed since the job started."""
+        guild = self.bot.get_guild(job.guild_id)
+        channel = guild.get_channel(channel_id) if guild else None
+        if channel is None:
+            return
+        if job.action == "close":
+            if self.ticket_category_state(channel.category) == "open":
+                requester = await self.members.fetch(guild, job.requested_by) or guild.me
+                await self.close_ticket_channel(channel, guild, requester)
+        elif job.action == "transcript":
+            requester = await self.members.fetch(guild, job.requested_by) or guild.me
+            await self.post_transcript(channel, requester)
+        elif job.action == "delete":
+            await self.rest_queue.submit(
+                guild.id, STATE_CHANGE, lambda: channel.delete(reason=f"Bulk delete #{job.id}")
+            )
+
+    async def report_bulk_job(self, job):
+        """Edit a bulk job's progress message."""
+        channel = self.bot.get_channel(job.progress_channel_id) if job.progress_channel_id else None
+        if channel is None:
+            return
+        message = channel.get_partial_message(job.progress_message_id)
+        # Intermediate updates may be skipped while the guild is busy; the final one may not
+        await self.rest_queue.submit(
+            channel.guild.id,
+            STATE_CHANGE if job.finished else COSMETIC,
+            lambda: message.edit(content=self.bulk_job_status(job)),
+            route=("channels", channel.id),
+        )
+
+    def search_ticket(self, channel):
+        """Describe an indexed ticket channel for the search index."""
+        number, _, state, owner_ids = self.ticket_index.ticket_entry(channel.guild.id, channel.id)
+        return SearchTicket(
+            channel_id=channel.id,
+            guild_id=channel.guild.id,
+            number=number,
+            name=channel.name,
+            owner_ids=owner_ids,
+            opened_at=self.ticket_open_times.get(channel),
+            closed_at=last_activity(channel) if state == "closed" else None,
+        )
+
+    async def record_issue(self, channel, issue):
+        """Remember the issue picked in a ticket so searches can filter on it."""
+        if self.ticket_index.is_ticket(channel):
+            await self.ticket_search.set_issue(channel.guild.id, channel.id, channel.name, issue)
+
+    @app_commands.command(name="search_tickets", description="Search the transcripts of this server's tickets.")
+    @app_commands.describe(query="Words to look for", owner="Only tickets opened by this member", issue="Only tickets with this issue")
+    @app_commands.guild_only()
+    async def search_tickets_command(
+        self, interaction: discord.Interaction, query: str, owner: discord.User = None, issue: str = None
+    ):
+        """Slash command to find past tickets by what was said in them."""
+        try:
+            if not self.is_privileged(interaction):
+                await interaction.response.send_message(
+                    "Only Admin/Support Team members can search tickets.", ephemeral=True
+                )
+                return
+
+            results = await self.ticket_search.search(
+                interaction.guild.id, query, owner_id=owner.id if owner else None, issue=issue
+            )
+            if not results:
+                await interaction.response.send_message("No tickets match that search.", ephemeral=True)
+                return
+
+            embed = discord.Embed(title=f"Tickets matching “{query[:200]}”", color=0x5865F2)
+            for result in results:
+                channel = interaction.guild.get_channel(result.channel_id)
+                where = channel.mention if channel else "channel deleted"
+                owners = ", ".join(f"<@{owner_id}>" for owner_id in result.owner_ids) or "unknown"
+                details = [f"{where} · {owners}", f"<t:{int(result.created_at)}:d>"]
+                if result.issue:
+                    details.append(result.issue)
+                embed.add_field(
+                    name=f"#{result.number:04} {result.name}" if result.number is not None else result.name,
+                    value=f"{' · '.join(details)}\n{result.snippet[:800]}",
+                    inline=False,
+                )
+            await interaction.response.send_message(embed=embed, ephemeral=True)
+        except Exception as e:
+            if not interaction.response.is_done():
+                await interaction.response.send_message(
+                    "An error occurred while searching tickets.", ephemeral=True
+                )
+            print(f"Error searching tickets: {e}")
+
+    @search_tickets_command.autocomplete("issue")
+    async def issue_autocomplete(self, interaction: discord.Interaction, current: str):
+        current = current.lower()
+        return [
+            app_commands.Choice(name=issue, value=issue)
+            for issue in ISSUE_LINKS if current in issue.lower()
+        ][:25]
+
+    async def archive_ticket(self, channel):
+        """Store a closed ticket's transcript in the local archive, then delete it and its transcript channel."""
+        entry = self.ticket_index.ticket_entry(channel.guild.id, channel.id)
+        if entry is None:
+            return None
+        number, _, _, owner_ids = entry
+
+        await self.message_archive.sync_channel(channel)
+        # Deleting the channel is final, so anything the archive cannot vouch for stops here
+        if not await self.message_archive.is_synced(channel):
+            raise RuntimeError(f"the archive of {channel.name} is missing messages; not deleting it")
+        entries = self.ticket_search.indexed(
+            self.search_ticket(channel), self.message_archive.entries(channel.id), replace=True
+        )
+        export = await export_transcript(entries, channel.name, compress=False)
+        try:
+            ticket = await self.ticket_archive.store(
+                channel, number, owner_ids, export, opened_at=self.ticket_open_times.get(channel)
+            )
+        finally:
+            export.close()
+
+        checkpoint = await self.transcript_checkpoints.get(channel.id)
+        transcript_channel = channel.guild.get_channel(checkpoint.transcript_channel_id) if checkpoint else None
+        for target in (transcript_channel, channel):
+            if target is None:
+                continue
+            try:
+                await self.rest_queue.submit(
+                    channel.guild.id, STATE_CHANGE, lambda target=target: target.delete(reason="Archived closed ticket")
+                )
+            except discord.NotFound:
+                pass
+        await self.transcript_checkpoints.forget(channel.id)
+        await self.message_archive.forget_channel(channel.id)
+        return ticket
+
+    @app_commands.command(name="archived_ticket", description="Download the transcript of an archived ticket.")
+    @app_commands.guild_only()
+    async def archived_ticket_command(self, interaction: discord.Interaction, number: int):
+        """Slash command to fetch an archived ticket's transcript by its number."""
+        try:
+            if not self.is_privileged(interaction):
+                await interaction.response.send_message(
+                    "Only Admin/Support Team members can read archived tickets.", ephemeral=True
+                )
+                return
+
+            ticket = await self.ticket_archive.find(interaction.guild.id, number)
+            if ticket is None:
+                await interaction.response.send_message(f"No archived ticket #{number:04}.", ephemeral=True)
+                return
+
+            owners = ", ".join(f"<@{owner_id}>" for owner_id in ticket.owner_ids) or "unknown"
+            await interaction.response.send_message(
+                f"`{ticket.name}` ({ticket.message_count} messages, owner: {owners}), "
+                f"closed <t:{int(ticket.closed_at)}:R>.",
+                file=self.ticket_archive.to_file(ticket),
+                ephemeral=True,
+                allowed_mentions=discord.AllowedMentions.none(),
+            )
+        except Exception as e:
+            if not interaction.response.is_done():
+                await interaction.response.send_message(
+                    "An error occurred while reading the archived ticket.", ephemeral=True
+                )
+            print(f"Error reading archived ticket: {e}")
+
     async def send_ticket_controls(self,channel, bot):
         """Send the ticket controls to the channel."""
         embed = discord.Embed(
@@ -216,46 +696,314 @@ class TicketBot(commands.Cog):
         await channel.send(embed=embed, view=view)
 
     def is_admin_or_support(self,user):
-        """Check if the user has the Admin or Support Team role."""
-        required_roles = ["Admin", SUPPORT_ROLE_NAME]
-        user_roles = [role.name for role in user.roles]
-        return any(role in user_roles for role in required_roles)
+        """Check if the user has one of the guild's privileged (Admin or Support Team) roles."""
+        return self.permissions.is_privileged(user)
+
+    def is_privileged(self, interaction):
+        """is_admin_or_support for the interaction's user, computed once per interaction."""
+        if "is_privileged" not in interaction.extras:
+            interaction.extras["is_privileged"] = self.is_admin_or_support(interaction.user)
+        return interaction.extras["is_privileged"]
+
+    @app_commands.command(name="ticket_access", description="Allow or deny a role access to the ticket controls.")
+    @app_commands.default_permissions(administrator=True)
+    @app_commands.guild_only()
+    async def ticket_access_command(self, interaction: discord.Interaction, role: discord.Role, allowed: bool):
+        """Slash command to configure which roles count as Admin/Support Team."""
+        try:
+            if allowed:
+                await self.permissions.grant(role)
+            else:
+                await self.permissions.revoke(role)
+            await interaction.response.send_message(
+                f"{role.mention} can {'now' if allowed else 'no longer'} use the ticket controls.",
+                ephemeral=True
+            )
+        except Exception as e:
+            await interaction.response.send_message(
+                "An error occurred while updating ticket access.",
+                ephemeral=True
+            )
+            print(f"Error updating ticket access: {e}")
+
+    async def index_guild(self, guild):
+        """Rebuild a guild's category pools, ticket index, number counter seed and privileged roles from the cache."""
+        self.category_pools.rebuild(guild)
+        index = self.ticket_index.rebuild(guild)
+        self.stale_tickets.rebuild(guild)
+        await self.permissions.rebuild(guild)
+        await self.ticket_counter.seed(guild.id, index.highest_number)
+        if self.warm_pool:
+            self.warm_pool.adopt(guild, self.category_pools.categories(guild, TICKET_CATEGORY_NAME))
+            self.warm_pool.refill(guild)
+
+    async def reconcile_guild(self, guild):
+        """Make sure everything the bot needs in a guild exists and return a list of what changed."""
+        resources = [
+            (category_key(name), lambda name=name: self.get_or_create_category(guild, name))
+            for name in (TEXT_CATEGORY_NAME, TICKET_CATEGORY_NAME, CLOSED_CATEGORY_NAME, TRANSCRIPT_CATEGORY_NAME)
+        ]
+        resources.append((role_key(SUPPORT_ROLE_NAME), lambda: self.get_or_create_support_role(guild)))
+        resources.append((channel_key(OPEN_TICKET_CHANNEL_NAME), lambda: self.get_or_create_open_ticket_channel(guild)))
+
+        changes = []
+        for key, resolve in resources:
+            if self.resources.cached(guild, key) is not None:
+                continue
+            await resolve()
+            changes.append(f"{'created' if self.resources.pop_created(guild.id, key) else 'adopted'} {key}")
+
+        if WELCOME_MODE == "panel":
+            open_tickets_channel = await self.get_or_create_open_ticket_channel(guild)
+            if open_tickets_channel.id not in self.ticket_panels:
+                await self.ensure_ticket_panel(open_tickets_channel)
+                changes.append("checked ticket panel")
+        if self.warm_pool:
+            self.warm_pool.refill(guild)
+        return changes
+
+    async def reconcile_all(self):
+        """Reconcile every guild with a bounded number of guilds in flight at once."""
+        start = time.perf_counter()
+        semaphore = asyncio.Semaphore(RECONCILE_CONCURRENCY)
+
+        async def reconcile(guild):
+            async with semaphore:
+                try:
+                    changes = await self.reconcile_guild(guild)
+                except Exception as e:
+                    print(f"Failed to reconcile {guild.name}: {e}")
+                    return
+                if changes:
+                    print(f"Reconciled {guild.name}: {', '.join(changes)}")
+
+        await asyncio.gather(*(reconcile(guild) for guild in self.bot.guilds))
+        print(f"Reconciled {len(self.bot.guilds)} guild(s) in {time.perf_counter() - start:.1f}s.")
+
+    async def reconcile_periodically(self):
+        while True:
+            await self.reconcile_all()
+            if RECONCILE_INTERVAL <= 0:
+                return
+            await asyncio.sleep(RECONCILE_INTERVAL)
 
     @commands.Cog.listener()
-    async def on_member_join(self, member):
-        """Handle a member joining and ensure 'Open Tickets' is set up under the 'Tickets' category."""
-        guild = member.guild
+    async def on_ready(self):
+        """Build the ticket index for every guild from the channel cache, then start reconciliation."""
+        # Events may have been missed since the last session, so archived channels need a fresh sync
+        self.message_archive.reconnected()
+        for guild in self.bot.guilds:
+            await self.index_guild(guild)
+        print(f"Indexed tickets for {len(self.bot.guilds)} guild(s).")
+
+        # Persisted deletions need the channel cache, which is empty until now
+        self.scheduler.start()
+        # on_ready fires again after reconnects; the periodic task covers those
+        if self.reconcile_task is None:
+            self.reconcile_task = asyncio.create_task(self.reconcile_periodically())
+        self.archiver.start()
+        self.stale_tickets.start()
+        for job in await self.bulk_jobs.unfinished():
+            # Jobs of guilds on other shards are resumed by the cluster that has them
+            if self.bot.get_guild(job.guild_id):
+                self.bulk_jobs.start(job)
 
-        # Check if the category exists by name
-        ticket_category = discord.utils.get(guild.categories, name=TEXT_CATEGORY_NAME)
+    @commands.Cog.listener()
+    async def on_guild_join(self, guild):
+        print(f"Joined new guild: {guild.name}")
+        await self.index_guild(guild)
+        try:
+            changes = await self.reconcile_guild(guild)
+            print(f"Set up {guild.name}: {', '.join(changes) or 'nothing to do'}")
+        except Exception as e:
+            print(f"Failed to set up {guild.name}: {e}")
+
+    @commands.Cog.listener()
+    async def on_guild_remove(self, guild):
+        self.ticket_index.forget_guild(guild.id)
+        self.category_pools.forget_guild(guild.id)
+        self.stale_tickets.forget_guild(guild.id)
+        self.members.forget_guild(guild.id)
+
+    @commands.Cog.listener()
+    async def on_raw_member_remove(self, payload):
+        self.members.forget(payload.guild_id, payload.user.id)
+
+    @commands.Cog.listener()
+    async def on_guild_channel_create(self, channel):
+        self.category_pools.track(channel)
+        self.ticket_index.upsert(channel)
+        self.stale_tickets.observe(channel)
+
+    @commands.Cog.listener()
+    async def on_guild_channel_update(self, before, after):
+        self.category_pools.track(after)
+        self.ticket_index.upsert(after)
+        self.stale_tickets.observe(after)
+
+    @commands.Cog.listener()
+    async def on_guild_channel_delete(self, channel):
+        self.category_pools.untrack(channel)
+        self.ticket_index.remove(channel)
+        self.stale_tickets.forget(channel.id)
+        self.warm_pool.discard(channel)
+        await self.resources.forget(channel.guild.id, channel.id)
+        await self.scheduler.forget_channel(channel.id)
+        await self.ticket_open_times.forget(channel.id)
+
+    @commands.Cog.listener()
+    async def on_guild_role_delete(self, role):
+        await self.resources.forget(role.guild.id, role.id)
+        await self.permissions.revoke(role)
+
+    @commands.Cog.listener()
+    async def on_guild_role_create(self, role):
+        await self.permissions.role_changed(role)
 
-        # If the category doesn't exist, create it
-        if not ticket_category:
-            ticket_category = await guild.create_category(TEXT_CATEGORY_NAME)
-            print(f"Created '{TEXT_CATEGORY_NAME}' category.")
+    @commands.Cog.listener()
+    async def on_guild_role_update(self, before, after):
+        await self.permissions.role_changed(after, before)
+
+    @commands.Cog.listener()
+    async def on_message(self, message):
+        """Archive messages posted in ticket channels and keep their idle clocks current."""
+        if message.guild and self.ticket_index.is_ticket(message.channel):
+            self.message_archive.record_message(message)
+            # The bot's own warnings and controls do not count as activity
+            if message.author.id != self.bot.user.id:
+                self.stale_tickets.touch(message.channel, message.created_at.timestamp())
+
+    @commands.Cog.listener()
+    async def on_raw_message_edit(self, payload):
+        if payload.guild_id and self.ticket_index.is_ticket_id(payload.guild_id, payload.channel_id):
+            self.message_archive.record_edit(payload.message)
+
+    @commands.Cog.listener()
+    async def on_raw_message_delete(self, payload):
+        if payload.guild_id and self.ticket_index.is_ticket_id(payload.guild_id, payload.channel_id):
+            self.message_archive.record_delete(payload.message_id, payload.channel_id, payload.guild_id)
+
+    @commands.Cog.listener()
+    async def on_raw_bulk_message_delete(self, payload):
+        if payload.guild_id and self.ticket_index.is_ticket_id(payload.guild_id, payload.channel_id):
+            for message_id in payload.message_ids:
+                self.message_archive.record_delete(message_id, payload.channel_id, payload.guild_id)
 
-        open_tickets_channel = discord.utils.get(ticket_category.channels, name=OPEN_TICKET_CHANNEL_NAME)
-        if not open_tickets_channel:
+    async def get_or_create_open_ticket_channel(self, guild):
+        """Return the open-ticket channel, creating it and its category if needed."""
+        text_category = await self.get_or_create_category(guild, TEXT_CATEGORY_NAME)
+
+        async def create():
             overwrites = {
                 guild.default_role: discord.PermissionOverwrite(
                     view_channel=True, 
                     send_messages=False,
-                    read_message_history=False
+                    # In panel mode everyone needs the history to see the shared panel
+                    read_message_history=WELCOME_MODE == "panel"
                 )
             }
-            open_tickets_channel = await ticket_category.create_text_channel(
+            open_tickets_channel = await text_category.create_text_channel(
                 name=OPEN_TICKET_CHANNEL_NAME,
                 topic="This channel allows users to create support tickets.",
                 overwrites=overwrites
             )
             print(f"Created channel under '{TEXT_CATEGORY_NAME}' category.")
+            return open_tickets_channel
+
+        return await self.resources.resolve(
+            guild,
+            channel_key(OPEN_TICKET_CHANNEL_NAME),
+            lambda: discord.utils.get(text_category.channels, name=OPEN_TICKET_CHANNEL_NAME),
+            create,
+        )
+
+    def ticket_panel_view(self):
+        view = discord.ui.View(timeout=None)
+        view.add_item(
+            discord.ui.Button(
+                label="📩Open a Ticket",
+                style=discord.ButtonStyle.blurple,
+                custom_id="create_ticket"
+            )
+        )
+        return view
+
+    async def ensure_ticket_panel(self, channel):
+        """Make sure the shared "Open a Ticket" panel is pinned in the open-ticket channel."""
+        if channel.id in self.ticket_panels:
+            return
+        await self.panel_setups.run(channel.id, lambda: self._setup_ticket_panel(channel))
+
+    async def _setup_ticket_panel(self, channel):
+        guild = channel.guild
+        if not channel.overwrites_for(guild.default_role).read_message_history:
+            await channel.set_permissions(
+                guild.default_role,
+                view_channel=True,
+                send_messages=False,
+                read_message_history=True
+            )
 
-        await open_tickets_channel.set_permissions(
+        # Discord caps pins at 50 per channel, so one page covers them all
+        async for message in channel.pins(limit=50):
+            if message.author == guild.me and any(
+                child.custom_id == "create_ticket" for row in message.components for child in row.children
+            ):
+                self.ticket_panels[channel.id] = message.id
+                return
+
+        embed = discord.Embed(
+            title="Open a Ticket",
+            description="Click 📩 button below to report an issue and receive support from our support team",
+            color=0x00ff00
+        )
+        panel = await channel.send(embed=embed, view=self.ticket_panel_view())
+        try:
+            await panel.pin(reason="Ticket panel")
+        except discord.HTTPException as e:
+            print(f"Could not pin the ticket panel in {guild.name}: {e}")
+        self.ticket_panels[channel.id] = panel.id
+        print(f"Posted the ticket panel in {guild.name}.")
+
+    async def send_welcome_batch(self, guild, members, overflow):
+        """Greet a batch of new members with a single message pointing at the ticket panel."""
+        open_tickets_channel = await self.get_or_create_open_ticket_channel(guild)
+        await self.ensure_ticket_panel(open_tickets_channel)
+
+        mentions = " ".join(member.mention for member in members)
+        if overflow:
+            mentions += f" and {overflow} more"
+        message = await self.rest_queue.submit(
+            guild.id,
+            COSMETIC,
+            lambda: open_tickets_channel.send(
+                content=f"Welcome {mentions}!",
+                embed=discord.Embed(
+                    description="KINDLY LOOK ABOVE AND CLICK THE OPEN TICKET BUTTON TO GET HELP FROM ADMIN",
+                    color=0xFF4500,
+                ),
+            ),
+            route=("channels", open_tickets_channel.id),
+        )
+        if message:
+            await self.scheduler.delete_later(message, 60)
+
+    @commands.Cog.listener()
+    async def on_member_join(self, member):
+        """Handle a member joining and ensure 'Open Tickets' is set up under the 'Tickets' category."""
+        if WELCOME_MODE == "panel":
+            # Greet joins in batches next to one shared panel instead of per-member overwrites and buttons
+            self.welcome_batcher.add(member)
+            return
+
+        open_tickets_channel = await self.get_or_create_open_ticket_channel(member.guild)
+
+        await self.rest_queue.submit(member.guild.id, STATE_CHANGE, lambda: open_tickets_channel.set_permissions(
             member,
             view_channel=True, 
             send_messages=False, 
             read_message_history=True
-        )
+        ))
 
         embed = discord.Embed(
             title="Open a Ticket",
@@ -278,310 +1026,347 @@ class TicketBot(commands.Cog):
         )
     )
         
-        primary_message = await open_tickets_channel.send(
+        primary_message = await self.rest_queue.submit(member.guild.id, STATE_CHANGE, lambda: open_tickets_channel.send(
             content=f"Welcome {member.mention}! Please use the button below to create a ticket.",
             embed=embed,
             view=view,
+        ))
+
+        # Send the secondary embed; it is only a reminder, so it is skipped under rate-limit pressure
+        secondary_message = await self.rest_queue.submit(
+            member.guild.id,
+            COSMETIC,
+            lambda: open_tickets_channel.send(embed=secondary_embed),
+            route=("channels", open_tickets_channel.id),
         )
 
-        # Send the secondary embed
-        secondary_message = await open_tickets_channel.send(embed=secondary_embed)
-
-        await asyncio.sleep(60)
         if secondary_message:
-            await secondary_message.delete()
-        if primary_message:
-            await primary_message.delete()
+            await self.scheduler.delete_later(secondary_message, 60)
+        await self.scheduler.delete_later(primary_message, 60)
 
         # Log the event
         print(f"Sent a personalized message to {member.name} in '{OPEN_TICKET_CHANNEL_NAME}' channel.")
 
+    async def check_privileged(self, interaction):
+        """Let Admin/Support Team members through and tell everyone else they cannot use the control."""
+        if self.is_privileged(interaction):
+            return True
+        await interaction.response.send_message(
+            "You do not have permission to use this control.", ephemeral=True
+        )
+        return False
+
+    def register_interaction_handlers(self):
+        """Map button custom_ids to their handlers."""
+        self.interaction_router.register("transcript", self.handle_transcript, privileged=True)
+        self.interaction_router.register("open_ticket", self.handle_open_ticket, privileged=True)
+        self.interaction_router.register("delete_ticket", self.handle_delete_ticket, privileged=True)
+        self.interaction_router.register("confirm_delete", self.handle_confirm_delete, privileged=True)
+        self.interaction_router.register("cancel_delete", self.handle_cancel_delete, privileged=True)
+        self.interaction_router.register_prefix("create_ticket", self.handle_create_ticket)
+        self.interaction_router.register("close_ticket", self.handle_close_ticket)
+        self.interaction_router.register("close_ticket_confirm", self.handle_close_ticket_confirm)
+        self.interaction_router.register("close_ticket_cancel", self.handle_close_ticket_cancel)
+
     @commands.Cog.listener()
-    async def on_interaction(self, interaction):
-        """Handle button interactions."""
-        guild = interaction.guild
-        member = interaction.user
-        try:
-            # Extract custom_id
-            custom_id = interaction.data["custom_id"]
+    async def on_app_command_completion(self, interaction, command):
+        self.metrics.observe_command(interaction)
 
-            if not custom_id:
-                return
-            
-            if custom_id in ["transcript", "open_ticket", "delete_ticket","confirm_delete","cancel_delete"]:
-                if not self.is_admin_or_support(interaction.user):
-                    await interaction.response.send_message(
-                        "You do not have permission to use this control.", ephemeral=True
-                    )
-                    return
-            
-            if custom_id == "transcript":
-                try:
-                    await interaction.response.send_message(
-                        "Generating the ticket transcript...", ephemeral=True
-                    )
+    async def on_app_command_error(self, interaction, error):
+        self.metrics.observe_command(interaction, failed=True)
+        await self._tree_on_error(interaction, error)
 
-                    transcript = []
-                    async for message in interaction.channel.history(limit=None, oldest_first=True):
-                        # Ignore bot messages
-                        # if message.author.bot:
-                        #     continue
-
-                        # Format the timestamp, author, and content
-                        timestamp = message.created_at.strftime("%Y-%m-%d %H:%M:%S")
-                        roles = [role.name for role in message.author.roles if role.name != "@everyone"]
-                        roles_str = f" ({', '.join(roles)})" if roles else ""
-                        author = f"{message.author.name}#{message.author.discriminator}{roles_str}"
-                        
-                        content = message.clean_content or "[No Text Content]"
-
-                        # Append the base message to the transcript
-                        transcript.append(f"[{timestamp}] **{author}**: {content}")
-
-                        # Handle attachments
-                        for attachment in message.attachments:
-                            transcript.append(f"[{timestamp}] **{author}**: [Attachment] {attachment.url}")
-
-                        # # Handle embeds
-                        # for embed in message.embeds:
-                        #     embed_data = embed.to_dict()
-                        #     embed_title = embed_data.get("title", "[No Title]")
-                        #     embed_description = embed_data.get("description", "[No Description]")
-                        #     embed_url = embed_data.get("url", None)
-
-                        #     embed_content = f"[Embed] **{embed_title}**: {embed_description}"
-                        #     if embed_url:
-                        #         embed_content += f" (URL: {embed_url})"
-                        #     transcript.append(f"[{timestamp}] **{author}**: {embed_content}")
-
-                    # Format the transcript as a readable string
-                            
-                    transcript_content = "\n".join(transcript)
-
-                    # Get or create the transcript category
-                    transcript_category = await self.get_or_create_category(interaction.guild, TRANSCRIPT_CATEGORY_NAME)
-
-                    transcript_channel_name = f"{interaction.channel.name}_transcript"
-                    existing_channel = discord.utils.find(
-                        lambda c: c.name == transcript_channel_name and c.category == transcript_category,
-                        interaction.guild.channels
-                    )
+    @commands.Cog.listener()
+    async def on_interaction(self, interaction):
+        """Route button interactions to their handlers."""
+        self.members.remember(interaction.user)
+        await self.interaction_router.dispatch(interaction)
+
+    async def post_transcript(self, channel, user):
+        """Export a ticket's new messages to its transcript channel, which user gets to read.
+
+        Returns the transcript channel and whether anything was posted (False when it was up to date).
+        """
+        checkpoint = await self.transcript_checkpoints.get(channel.id)
+        transcript_channel = None
+        if checkpoint:
+            transcript_channel = channel.guild.get_channel(checkpoint.transcript_channel_id)
+        if transcript_channel is None:
+            # The previous transcript channel is gone, so export everything again
+            checkpoint = None
+
+        transcript_channel_name = f"{channel.name}_transcript"
+        if transcript_channel is None:
+            existing_channel = discord.utils.find(
+                lambda c: c.name == transcript_channel_name
+                and self.category_pools.pool_of(c.category) == TRANSCRIPT_CATEGORY_NAME,
+                channel.guild.text_channels
+            )
 
-                    if not existing_channel:
-                        transcript_channel = await interaction.guild.create_text_channel(
-                            name=transcript_channel_name,
-                            category=transcript_category,
-                            overwrites={
-                                interaction.guild.default_role: discord.PermissionOverwrite(view_channel=False),
-                                interaction.user: discord.PermissionOverwrite(view_channel=True, send_messages=False),
-                            },
-                            topic=f"Transcript of {interaction.channel.name}",
-                        )
-                    else:
-                        transcript_channel = existing_channel
-
-                    chunks = [transcript_content[i:i+2000] for i in range(0, len(transcript_content), 2000)]
-
-                    readme_embed = discord.Embed(
-                        title="Transcript Overview",
-                        description=(
-                            f"This is the transcript for `{interaction.channel.name}`.\n"
-                            f"**Generated by:** {interaction.user.mention}\n"
-                            f"**Original Channel:** {interaction.channel.mention}\n\n"
-                            "Below, you'll find the full transcript of the conversation."
-                        ),
-                        color=0x5865F2,
-                    )
-                    await transcript_channel.send(embed=readme_embed)
-                    for chunk in chunks:
-                        await transcript_channel.send(chunk)
+            if not existing_channel:
+                transcript_channel = await self.create_in_pool(
+                    channel.guild,
+                    TRANSCRIPT_CATEGORY_NAME,
+                    lambda category: channel.guild.create_text_channel(
+                        name=transcript_channel_name,
+                        category=category,
+                        overwrites={
+                            channel.guild.default_role: discord.PermissionOverwrite(view_channel=False),
+                            user: discord.PermissionOverwrite(view_channel=True, send_messages=False),
+                        },
+                        topic=f"Transcript of {channel.name}",
+                    ),
+                )
+            else:
+                transcript_channel = existing_channel
 
-                    # Notify the user
-                    await interaction.followup.send(
-                        f"The transcript has been generated in {transcript_channel.mention}.", ephemeral=True
-                    )
+        if self.ticket_index.is_ticket(channel):
+            # Render from the local archive, fetching only what it has not seen yet
+            await self.message_archive.sync_channel(channel)
+            entries = self.message_archive.entries(
+                channel.id, after_id=checkpoint.last_message_id if checkpoint else 0
+            )
+            # Index what is exported so /search_tickets finds it
+            entries = self.ticket_search.indexed(
+                self.search_ticket(channel), entries, replace=checkpoint is None
+            )
+        else:
+            entries = history_entries(
+                channel,
+                after=discord.Object(id=checkpoint.last_message_id) if checkpoint else None,
+                members=self.members,
+            )
+        export = await export_transcript(
+            entries,
+            f"{transcript_channel_name}_part{checkpoint.parts + 1}" if checkpoint else transcript_channel_name,
+            size_limit=channel.guild.filesize_limit,
+        )
 
-                except Exception as e:
-                    await interaction.followup.send(
-                        "An error occurred while generating the transcript.", ephemeral=True
-                    )
-                    print(f"Error generating transcript: {e}")
+        if checkpoint and not export.message_count:
+            export.close()
+            return transcript_channel, False
+
+        if checkpoint:
+            readme_embed = discord.Embed(
+                title="Transcript Update",
+                description=(
+                    f"New messages in `{channel.name}` since the last export.\n"
+                    f"**Generated by:** {user.mention}\n"
+                    f"**Original Channel:** {channel.mention}\n"
+                    f"**New Messages:** {export.message_count}\n\n"
+                    "The new part of the conversation is attached below."
+                ),
+                color=0x5865F2,
+            )
+        else:
+            readme_embed = discord.Embed(
+                title="Transcript Overview",
+                description=(
+                    f"This is the transcript for `{channel.name}`.\n"
+                    f"**Generated by:** {user.mention}\n"
+                    f"**Original Channel:** {channel.mention}\n"
+                    f"**Messages:** {export.message_count}\n\n"
+                    "The full transcript of the conversation is attached below."
+                ),
+                color=0x5865F2,
+            )
+        try:
+            await self.rest_queue.submit(
+                channel.guild.id,
+                STATE_CHANGE,
+                lambda: transcript_channel.send(embed=readme_embed, file=export.to_file())
+            )
+        finally:
+            export.close()
 
+        self.metrics.observe_transcript(export)
+        if export.last_message_id:
+            await self.transcript_checkpoints.advance(checkpoint, channel, transcript_channel, export)
+        return transcript_channel, True
 
-            elif custom_id == "open_ticket":
-                try:
-                    await interaction.response.defer()
+    async def handle_transcript(self, interaction, custom_id):
+        """Export the ticket conversation into its transcript channel."""
+        try:
+            await interaction.response.send_message(
+                "Generating the ticket transcript...", ephemeral=True
+            )
 
-                    open_tickets_category = await self.get_or_create_category(interaction.guild, TICKET_CATEGORY_NAME)
+            transcript_channel, updated = await self.post_transcript(interaction.channel, interaction.user)
+            if not updated:
+                await interaction.followup.send(
+                    f"The transcript in {transcript_channel.mention} is already up to date.", ephemeral=True
+                )
+                return
 
-                    current_category = interaction.channel.category
-                    if current_category and current_category.name == CLOSED_CATEGORY_NAME:
-                        await interaction.channel.edit(category=open_tickets_category)
+            # Notify the user
+            await interaction.followup.send(
+                f"The transcript has been generated in {transcript_channel.mention}.", ephemeral=True
+            )
 
-                        overwrites = interaction.channel.overwrites
-                        for target, perms in overwrites.items():
-                            if isinstance(target, discord.Member) or isinstance(target, discord.Role):
-                                perms.send_messages = True
-                                overwrites[target] = perms
+        except Exception:
+            await interaction.followup.send(
+                "An error occurred while generating the transcript.", ephemeral=True
+            )
+            # Re-raised so the router counts and logs the failure
+            raise
 
-                        await interaction.channel.edit(overwrites=overwrites)
+    async def handle_open_ticket(self, interaction, custom_id):
+        """Reopen a closed ticket."""
+        try:
+            await interaction.response.defer()
+
+            if self.ticket_category_state(interaction.channel.category) == "closed":
+                updated = await self.move_to_pool(
+                    interaction.channel,
+                    TICKET_CATEGORY_NAME,
+                    overwrites=with_send_messages(interaction.channel.overwrites, True),
+                    reason=f"Ticket reopened by {interaction.user}",
+                )
+                if updated:
+                    self.ticket_index.upsert(updated)
 
-                        await interaction.followup.send(
-                            f"The ticket `{interaction.channel.name}` has been reopened.",
-                            ephemeral=False
-                        )
-                    else:
-                        await interaction.followup.send(
-                            "This ticket is not in the Closed Tickets category and cannot be reopened.",
-                            ephemeral=True
-                        )
+                await interaction.followup.send(
+                    f"The ticket `{interaction.channel.name}` has been reopened.",
+                    ephemeral=False
+                )
+            else:
+                await interaction.followup.send(
+                    "This ticket is not in the Closed Tickets category and cannot be reopened.",
+                    ephemeral=True
+                )
 
-                except Exception as e:
-                    await interaction.followup.send(
-                        "An error occurred while trying to reopen the ticket.",
-                        ephemeral=True
-                    )
-                    print(f"Error reopening ticket: {e}")
+        except Exception:
+            await interaction.followup.send(
+                "An error occurred while trying to reopen the ticket.",
+                ephemeral=True
+            )
+            raise
 
-            elif custom_id == "delete_ticket":
-                try:
-                    await interaction.response.defer()
+    async def handle_delete_ticket(self, interaction, custom_id):
+        """Ask for confirmation before deleting a ticket."""
+        try:
+            await interaction.response.defer()
 
-                    view = discord.ui.View(timeout=30)
-                    view.add_item(discord.ui.Button(label="Confirm", style=discord.ButtonStyle.danger, custom_id="confirm_delete"))
-                    view.add_item(discord.ui.Button(label="Cancel", style=discord.ButtonStyle.secondary, custom_id="cancel_delete"))
+            view = discord.ui.View(timeout=30)
+            view.add_item(discord.ui.Button(label="Confirm", style=discord.ButtonStyle.danger, custom_id="confirm_delete"))
+            view.add_item(discord.ui.Button(label="Cancel", style=discord.ButtonStyle.secondary, custom_id="cancel_delete"))
 
-                    await interaction.followup.send(
-                        "Are you sure you want to delete this ticket? This action cannot be undone.",
-                        view=view,
-                        ephemeral=True
-                    )
+            await interaction.followup.send(
+                "Are you sure you want to delete this ticket? This action cannot be undone.",
+                view=view,
+                ephemeral=True
+            )
 
-                except Exception as e:
-                    await interaction.followup.send(
-                        "An error occurred while trying to initiate ticket deletion.",
-                        ephemeral=True
-                    )
-                    print(f"Error initiating ticket deletion: {e}")
+        except Exception:
+            await interaction.followup.send(
+                "An error occurred while trying to initiate ticket deletion.",
+                ephemeral=True
+            )
+            raise
 
-            elif custom_id == "confirm_delete":
-                try:
-                    await interaction.response.defer()
+    async def handle_confirm_delete(self, interaction, custom_id):
+        """Delete the ticket channel."""
+        try:
+            await interaction.response.defer()
 
-                    await interaction.channel.delete(reason=f"Ticket deleted by {interaction.user.name}#{interaction.user.discriminator}")
+            await interaction.channel.delete(reason=f"Ticket deleted by {interaction.user.name}#{interaction.user.discriminator}")
 
-                except Exception as e:
-                    await interaction.followup.send(
-                        "An error occurred while trying to delete the ticket.",
-                        ephemeral=True
-                    )
-                    print(f"Error deleting ticket: {e}")
+        except Exception:
+            await interaction.followup.send(
+                "An error occurred while trying to delete the ticket.",
+                ephemeral=True
+            )
+            raise
 
-            elif custom_id == "cancel_delete":
-                try:
-                    await interaction.response.send_message("Ticket deletion canceled.", ephemeral=True)
-                except Exception as e:
-                    print(f"Error canceling ticket deletion: {e}")
+    async def handle_cancel_delete(self, interaction, custom_id):
+        """Cancel a pending ticket deletion."""
+        await interaction.response.send_message("Ticket deletion canceled.", ephemeral=True)
 
+    async def handle_create_ticket(self, interaction, custom_id):
+        """Open a ticket for the member who clicked the button."""
+        guild = interaction.guild
+        member = interaction.user
+        if not interaction.response.is_done():
+            await interaction.response.defer(ephemeral=True)
 
-            elif custom_id.startswith("create_ticket"):
-                if not interaction.response.is_done():
-                    await interaction.response.defer(ephemeral=True)
-
-                if "_" in custom_id:
-                    target_user_id = int(custom_id.split("_")[-1])
-                    if member.id != target_user_id:
-                        followup_message = await interaction.followup.send(
-                            "This button is not meant for you.", ephemeral=True
-                        )
-                        await asyncio.sleep(5)
-                        await followup_message.delete()
-                        return
-
-                ticket_category = await self.get_or_create_category(guild, TICKET_CATEGORY_NAME)
-                existing_channel = discord.utils.find(
-                    lambda c: (
-                        c.category == ticket_category
-                        and c.overwrites_for(interaction.user).view_channel
-                        and c.overwrites_for(interaction.user).send_messages
-                    ),
-                    interaction.guild.channels
+        # Personal buttons carry the member ID as create_ticket_<id>
+        target = custom_id[len("create_ticket_"):]
+        if target.isdigit():
+            target_user_id = int(target)
+            if member.id != target_user_id:
+                followup_message = await interaction.followup.send(
+                    "This button is not meant for you.", ephemeral=True
                 )
+                await self.scheduler.delete_later(followup_message, 5)
+                return
 
-                if existing_channel:
-                    followup_message = await interaction.followup.send(
-                        f"You already have an open ticket: {existing_channel.mention}",
-                        ephemeral=True
-                    )
-                    await asyncio.sleep(5)
-                    await followup_message.delete()
-                else:
-                    channel = await self.create_ticket_channel(guild, member)
-
-                    followup_message = await interaction.followup.send(
-                        f"Ticket created successfully: {channel.mention}",
-                        ephemeral=True
-                    )
-                    # Delete the follow-up after 5 seconds
-                    await asyncio.sleep(5)
-                    await followup_message.delete()
+        channel, created = await self.open_ticket(guild, member)
 
-            elif custom_id == "close_ticket":
-                if not interaction.response.is_done():
-                    await interaction.response.defer(ephemeral=True)
+        if not created:
+            followup_message = await interaction.followup.send(
+                f"You already have an open ticket: {channel.mention}",
+                ephemeral=True
+            )
+            await self.scheduler.delete_later(followup_message, 5)
+        else:
+            followup_message = await interaction.followup.send(
+                f"Ticket created successfully: {channel.mention}",
+                ephemeral=True
+            )
+            # Delete the follow-up after 5 seconds
+            await self.scheduler.delete_later(followup_message, 5)
 
-                channel = interaction.channel
+    async def handle_close_ticket(self, interaction, custom_id):
+        """Ask for confirmation before closing a ticket."""
+        if not interaction.response.is_done():
+            await interaction.response.defer(ephemeral=True)
 
-                if channel.category and channel.category.name == TICKET_CATEGORY_NAME:
-                    view = ConfirmCloseTicketView(self, channel)
-                    followup_message = await interaction.followup.send(
-                        "Are you sure you would like to close this ticket?",
-                        view=view,
-                        ephemeral=True
-                    )
-                    await asyncio.sleep(5)
-                    await followup_message.delete()
-                else:
-                    followup_message = await interaction.followup.send(
-                        "This action is not allowed in this channel.", ephemeral=True
-                    )
-                    await asyncio.sleep(5)
-                    await followup_message.delete()
-
-            elif custom_id == "close_ticket_confirm":
-                channel = interaction.channel
-                if channel.category and channel.category.name == TICKET_CATEGORY_NAME:
-                    if interaction.user in channel.members:
-                        if not interaction.response.is_done():
-                            await interaction.response.defer()
-
-                        ticket_bot_cog = self.bot.get_cog("TicketBot")
-                        if ticket_bot_cog:
-                            await ticket_bot_cog.close_ticket_channel(channel, interaction.guild,interaction.user)
-                        else:
-                            print("TicketBot cog not found!")
-                    else:
-                        if not interaction.response.is_done():
-                            await interaction.response.send_message(
-                                "You do not have permission to close this ticket.", ephemeral=True
-                            )
-
-            elif custom_id == "close_ticket_cancel":
+        channel = interaction.channel
+
+        if self.ticket_category_state(channel.category) == "open":
+            view = ConfirmCloseTicketView(self, channel)
+            followup_message = await interaction.followup.send(
+                "Are you sure you would like to close this ticket?",
+                view=view,
+                ephemeral=True
+            )
+            await self.scheduler.delete_later(followup_message, 5)
+        else:
+            followup_message = await interaction.followup.send(
+                "This action is not allowed in this channel.", ephemeral=True
+            )
+            await self.scheduler.delete_later(followup_message, 5)
+
+    async def handle_close_ticket_confirm(self, interaction, custom_id):
+        """Close the ticket after confirmation."""
+        channel = interaction.channel
+        if self.ticket_category_state(channel.category) == "open":
+            # Checked against the overwrites, since channel.members needs the full member cache
+            if channel.permissions_for(interaction.user).view_channel:
                 if not interaction.response.is_done():
                     await interaction.response.defer()
 
-                await interaction.followup.send(
-                    content="Ticket closure cancelled.", ephemeral=True
-                )
-        except Exception as e:
-            pass
+                await self.close_ticket_channel(channel, interaction.guild, interaction.user)
+            else:
+                if not interaction.response.is_done():
+                    await interaction.response.send_message(
+                        "You do not have permission to close this ticket.", ephemeral=True
+                    )
 
+    async def handle_close_ticket_cancel(self, interaction, custom_id):
+        """Cancel a pending ticket closure."""
+        if not interaction.response.is_done():
+            await interaction.response.defer()
+
+        await interaction.followup.send(
+            content="Ticket closure cancelled.", ephemeral=True
+        )
 
     @commands.command()
     async def close(self, ctx):
         """Command to close the ticket."""
-        if ctx.channel.category and ctx.channel.category.name == TICKET_CATEGORY_NAME:
-            await self.close_ticket_channel(ctx.channel, ctx.guild)
+        if self.ticket_category_state(ctx.channel.category) == "open":
+            await self.close_ticket_channel(ctx.channel, ctx.guild, ctx.author)
             await ctx.send("This ticket has been closed")
         else:
             await ctx.send("This is not a ticket channel!")
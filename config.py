@@ -10,3 +10,71 @@ TICKET_CATEGORY_NAME = "OPENED TICKETS"
 TRANSCRIPT_CATEGORY_NAME = "TRANSCRIPTS"
 OPEN_TICKET_CHANNEL_NAME = "🎫︱open-ticket"
 TEXT_CATEGORY_NAME = "Text Channels"
+PRIVILEGED_ROLE_NAMES = ["Admin", SUPPORT_ROLE_NAME]
+
+DATA_DIR = os.getenv("DATA_DIR", "data")
+DATABASE_PATH = os.path.join(DATA_DIR, "ticket_bot.sqlite3")
+COMMAND_SYNC_STATE_PATH = os.path.join(DATA_DIR, "command_sync.json")
+# Sync slash commands to this guild only (handy while developing); unset syncs globally
+COMMAND_SYNC_GUILD_ID = int(os.getenv("COMMAND_SYNC_GUILD_ID", "0")) or None
+TRANSCRIPT_COMPRESS = os.getenv("TRANSCRIPT_COMPRESS", "false").lower() in ("1", "true", "yes")
+ARCHIVE_FLUSH_INTERVAL = float(os.getenv("ARCHIVE_FLUSH_INTERVAL", "0.5"))
+
+# "member" posts a personal ticket button for every join, "panel" keeps one shared
+# panel in the open-ticket channel and batches the welcome mentions
+WELCOME_MODE = os.getenv("WELCOME_MODE", "member")
+WELCOME_BATCH_WINDOW = float(os.getenv("WELCOME_BATCH_WINDOW", "5"))
+WELCOME_BATCH_SIZE = int(os.getenv("WELCOME_BATCH_SIZE", "50"))
+
+# Number of hidden, pre-created ticket channels to keep per guild (0 disables the pool)
+WARM_POOL_SIZE = int(os.getenv("WARM_POOL_SIZE", "0"))
+
+# Outbound REST budgeting per guild
+GUILD_REST_CONCURRENCY = int(os.getenv("GUILD_REST_CONCURRENCY", "4"))
+COSMETIC_RATE = float(os.getenv("COSMETIC_RATE", "1"))
+COSMETIC_BURST = int(os.getenv("COSMETIC_BURST", "10"))
+
+# Startup/periodic provisioning of categories, role, open-ticket channel and panel
+RECONCILE_CONCURRENCY = int(os.getenv("RECONCILE_CONCURRENCY", "4"))
+RECONCILE_INTERVAL = float(os.getenv("RECONCILE_INTERVAL", "3600"))
+
+# Sharding: SHARDING runs main.py as one AutoShardedBot; launcher.py splits the shards
+# into CLUSTER_COUNT worker processes. SHARD_COUNT 0 uses Discord's recommended count
+SHARDING = os.getenv("SHARDING", "false").lower() in ("1", "true", "yes")
+SHARD_COUNT = int(os.getenv("SHARD_COUNT", "0")) or None
+CLUSTER_COUNT = int(os.getenv("CLUSTER_COUNT", str(os.cpu_count() or 1)))
+CLUSTER_HEALTH_INTERVAL = float(os.getenv("CLUSTER_HEALTH_INTERVAL", "30"))
+CLUSTER_START_TIMEOUT = float(os.getenv("CLUSTER_START_TIMEOUT", "300"))
+
+# "full" caches every member (discord.py's default); "lean" keeps no member cache, skips chunking
+# and the message cache, and relies on member data from payloads plus a small LRU
+MEMORY_PROFILE = os.getenv("MEMORY_PROFILE", "full")
+MAX_MESSAGES = int(os.getenv("MAX_MESSAGES", "0" if MEMORY_PROFILE == "lean" else "1000")) or None
+MEMBER_LRU_SIZE = int(os.getenv("MEMBER_LRU_SIZE", "5000"))
+MEMBER_LRU_TTL = float(os.getenv("MEMBER_LRU_TTL", "600"))
+
+# Prometheus text endpoint at http://METRICS_HOST:METRICS_PORT/metrics (0 disables it);
+# launcher.py gives cluster N the port METRICS_PORT + N
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))
+
+# Ticket, closed and transcript categories overflow into "NAME 2", "NAME 3", ... at 50 channels
+# each; the next category is created ahead of time once fewer than this many slots are left
+CATEGORY_HEADROOM = int(os.getenv("CATEGORY_HEADROOM", "5"))
+
+# Closed tickets idle for ARCHIVE_AFTER seconds are exported to gzipped, content-addressed
+# files under ARCHIVE_DIR and their channels deleted (0 disables archiving)
+ARCHIVE_DIR = os.getenv("ARCHIVE_DIR", os.path.join(DATA_DIR, "archive"))
+ARCHIVE_AFTER = float(os.getenv("ARCHIVE_AFTER", "0"))
+ARCHIVE_INTERVAL = float(os.getenv("ARCHIVE_INTERVAL", "3600"))
+ARCHIVE_CONCURRENCY = int(os.getenv("ARCHIVE_CONCURRENCY", "2"))
+ARCHIVE_BATCH_SIZE = int(os.getenv("ARCHIVE_BATCH_SIZE", "100"))
+
+# Open tickets with no messages for STALE_TICKET_AFTER seconds are closed automatically, with a
+# warning STALE_TICKET_WARNING seconds before (0 disables either); /stale_tickets overrides per guild
+STALE_TICKET_AFTER = float(os.getenv("STALE_TICKET_AFTER", "0"))
+STALE_TICKET_WARNING = float(os.getenv("STALE_TICKET_WARNING", "86400"))
+STALE_CLOSE_CONCURRENCY = int(os.getenv("STALE_CLOSE_CONCURRENCY", "2"))
+
+# Tickets handled at once by each /bulk_tickets job (their REST calls still go through the per-guild queue)
+BULK_CONCURRENCY = int(os.getenv("BULK_CONCURRENCY", "3"))
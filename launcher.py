@@ -0,0 +1,141 @@
+"""Run the bot as several clusters of shards, one worker process per cluster.
+
+Each guild belongs to exactly one shard, so every cluster owns its guilds' state outright; the
+clusters only share the SQLite database file. Clusters are started one at a time (the gateway
+only allows a few identifies at once) and restarted if their process dies.
+"""
+import asyncio
+import multiprocessing
+import queue
+import time
+
+import discord
+
+from config import BOT_TOKEN,SHARD_COUNT,CLUSTER_COUNT,CLUSTER_HEALTH_INTERVAL,CLUSTER_START_TIMEOUT,METRICS_PORT
+from services.cluster_health import ClusterReporter
+
+
+def cluster_shards(shard_count, cluster_count):
+    """Split shard IDs 0..shard_count-1 into cluster_count contiguous ranges."""
+    cluster_count = max(1, min(cluster_count, shard_count))
+    size, extra = divmod(shard_count, cluster_count)
+    clusters, start = [], 0
+    for cluster_id in range(cluster_count):
+        end = start + size + (cluster_id < extra)
+        clusters.append(list(range(start, end)))
+        start = end
+    return clusters
+
+
+async def recommended_shard_count():
+    client = discord.Client(intents=discord.Intents.none())
+    try:
+        await client.login(BOT_TOKEN)
+        shard_count, _, _ = await client.http.get_bot_gateway()
+    finally:
+        await client.close()
+    return shard_count
+
+
+def run_cluster(cluster_id, shard_ids, shard_count, reports):
+    from main import run_bot
+
+    reporter = ClusterReporter(cluster_id, reports, CLUSTER_HEALTH_INTERVAL)
+    # Each cluster serves its own metrics on the next port up
+    metrics_port = METRICS_PORT + cluster_id if METRICS_PORT else 0
+    asyncio.run(run_bot(shard_ids, shard_count, reporter, metrics_port))
+
+
+def print_health(snapshots, processes):
+    for cluster_id, process in sorted(processes.items()):
+        snapshot = snapshots.get(cluster_id)
+        if snapshot is None:
+            print(f"Cluster {cluster_id}: starting (pid {process.pid})")
+            continue
+        latencies = [shard["latency"] for shard in snapshot["shards"].values()]
+        closed = sum(shard["closed"] for shard in snapshot["shards"].values())
+        latency = max(latencies) * 1000 if latencies else float("nan")
+        print(
+            f"Cluster {cluster_id}: {snapshot['guilds']} guilds, {len(latencies)} shards ({closed} closed), "
+            f"max latency {latency:.0f}ms, {snapshot.get('interactions', 0)} interactions "
+            f"({snapshot.get('interaction_errors', 0)} errors), {snapshot.get('rate_limits', 0)} rate limits, "
+            f"last report {time.time() - snapshot['time']:.0f}s ago"
+        )
+
+
+class Launcher:
+    def __init__(self, shard_count, cluster_count):
+        self.shard_count = shard_count
+        self.clusters = cluster_shards(shard_count, cluster_count)
+        self.context = multiprocessing.get_context("spawn")
+        self.reports = self.context.Queue()
+        self.processes = {}
+        self.snapshots = {}
+
+    def spawn(self, cluster_id):
+        shard_ids = self.clusters[cluster_id]
+        process = self.context.Process(
+            target=run_cluster,
+            args=(cluster_id, shard_ids, self.shard_count, self.reports),
+            name=f"cluster-{cluster_id}",
+            daemon=True,
+        )
+        process.start()
+        self.processes[cluster_id] = process
+        self.snapshots.pop(cluster_id, None)
+        print(f"Started cluster {cluster_id} (pid {process.pid}) with shards {shard_ids[0]}-{shard_ids[-1]}")
+
+    def collect(self, timeout):
+        """Read reports until timeout and return the clusters that became ready."""
+        ready = set()
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return ready
+            try:
+                report = self.reports.get(timeout=remaining)
+            except queue.Empty:
+                return ready
+            self.snapshots[report["cluster"]] = report
+            if report["kind"] == "ready":
+                ready.add(report["cluster"])
+
+    def start_cluster(self, cluster_id):
+        """Start a cluster and wait for it to identify all its shards before starting another."""
+        self.spawn(cluster_id)
+        deadline = time.monotonic() + CLUSTER_START_TIMEOUT
+        while time.monotonic() < deadline and self.processes[cluster_id].is_alive():
+            if cluster_id in self.collect(1):
+                return
+        print(f"Cluster {cluster_id} did not report ready within {CLUSTER_START_TIMEOUT:.0f}s")
+
+    def run(self):
+        print(f"Launching {len(self.clusters)} cluster(s) for {self.shard_count} shard(s)")
+        for cluster_id in range(len(self.clusters)):
+            self.start_cluster(cluster_id)
+
+        try:
+            while True:
+                self.collect(CLUSTER_HEALTH_INTERVAL)
+                print_health(self.snapshots, self.processes)
+                for cluster_id, process in list(self.processes.items()):
+                    if not process.is_alive():
+                        print(f"Cluster {cluster_id} exited with code {process.exitcode}, restarting")
+                        self.start_cluster(cluster_id)
+        finally:
+            for process in self.processes.values():
+                process.terminate()
+            for process in self.processes.values():
+                process.join(10)
+
+
+def main():
+    if not BOT_TOKEN:
+        raise ValueError("The bot token is required")
+    shard_count = SHARD_COUNT or asyncio.run(recommended_shard_count())
+    Launcher(shard_count, CLUSTER_COUNT).run()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,72 +1,94 @@
 import asyncio
+import time
 import discord
 from discord.ext import commands
-from config import BOT_TOKEN,OPEN_TICKET_CHANNEL_NAME,TEXT_CATEGORY_NAME
+from config import BOT_TOKEN,SHARDING,SHARD_COUNT,MEMORY_PROFILE,MAX_MESSAGES,METRICS_HOST,METRICS_PORT
 
 from cogs.ticket_bot import TicketBot
 from cogs.issue_commands import IssueCommands
 from views.issue_selection import IssueSelectionView
+from services.command_sync import sync_commands
+from services.metrics import MetricsServer
 
 
-async def main():
+def cache_options(profile=MEMORY_PROFILE):
+    """Client cache settings for a memory profile."""
+    if profile == "lean":
+        # Members still arrive with interactions, joins and messages; only the guild-wide cache goes
+        return {
+            "member_cache_flags": discord.MemberCacheFlags.none(),
+            "chunk_guilds_at_startup": False,
+            "max_messages": MAX_MESSAGES,
+        }
+    return {"max_messages": MAX_MESSAGES}
+
+
+def create_bot(shard_ids=None, shard_count=None):
+    """Build the bot, sharded when SHARDING is set or when running as a cluster with its own shard range."""
+    started = time.perf_counter()
     intents = discord.Intents.default()
     intents.guilds = True
     intents.messages = True
     intents.members = True
     intents.message_content = True
 
-    bot = commands.Bot(command_prefix="!", intents=intents)
+    if SHARDING or shard_ids is not None:
+        bot = commands.AutoShardedBot(
+            command_prefix="!", intents=intents, shard_ids=shard_ids, shard_count=shard_count,
+            **cache_options()
+        )
+    else:
+        bot = commands.Bot(command_prefix="!", intents=intents, **cache_options())
 
-    if not BOT_TOKEN:
-        raise ValueError("The bot token is required")
-
-    @bot.event
-    async def on_ready():
+    async def setup_hook():
+        # Runs once after login, unlike on_ready which fires again on every reconnect
         bot.add_view(IssueSelectionView())
-        print(f"Bot is ready! Logged in as {bot.user}")
 
+        # Commands belong to the application, so only one cluster needs to sync them
+        if shard_ids is not None and 0 not in shard_ids:
+            return
         try:
-            # Sync commands globally
-            await bot.tree.sync()
-            print("Slash commands synced!")
+            await sync_commands(bot)
         except Exception as e:
             print(f"Failed to sync slash commands: {e}")
 
+    bot.setup_hook = setup_hook
+
     @bot.event
-    async def on_guild_join(guild):
-        # When the bot joins a server
-        print(f"Joined new guild: {guild.name}")
+    async def on_ready():
+        shards = f" with shards {sorted(bot.shards)}" if bot.shard_count else ""
+        print(f"Bot is ready! Logged in as {bot.user}{shards} ({time.perf_counter() - started:.1f}s after start)")
 
-        # Create a new channel
-        try:
-            category = discord.utils.get(guild.categories, name=TEXT_CATEGORY_NAME)
-            if not category:
-                category = await guild.create_category(TEXT_CATEGORY_NAME)
-                print(f"Created category {category.name} in {guild.name}")
-            
-            # Check if the channel already exists in the category
-            existing_channel = discord.utils.get(category.channels, name=OPEN_TICKET_CHANNEL_NAME)
-            if existing_channel:
-                print(f"Channel '{OPEN_TICKET_CHANNEL_NAME}' already exists in category '{category.name}'")
-            else:
-                overwrites = {
-                    guild.default_role: discord.PermissionOverwrite(read_messages=False),
-                    guild.me: discord.PermissionOverwrite(read_messages=True)
-                }
-                channel = await category.create_text_channel(OPEN_TICKET_CHANNEL_NAME,overwrites=overwrites)
-                # print(f"Created channel '{channel.name}' under category '{category.name}' in {guild.name}")
+    return bot
 
-        except Exception as e:
-            print(f"Failed to create channel in {guild.name}: {e}")
 
+async def run_bot(shard_ids=None, shard_count=None, reporter=None, metrics_port=METRICS_PORT):
+    if not BOT_TOKEN:
+        raise ValueError("The bot token is required")
 
-    async def setup_cogs():
-        await bot.add_cog(TicketBot(bot))
-        await bot.add_cog(IssueCommands(bot))
+    bot = create_bot(shard_ids, shard_count)
+    ticket_bot = TicketBot(bot)
+    await bot.add_cog(ticket_bot)
+    await bot.add_cog(IssueCommands(bot))
+    if reporter is not None:
+        reporter.attach(bot)
+
+    metrics_server = None
+    if metrics_port:
+        metrics_server = MetricsServer(ticket_bot.metrics.registry, METRICS_HOST, metrics_port)
+        await metrics_server.start()
 
     # Start the bot
-    await setup_cogs()
-    await bot.start(BOT_TOKEN)
+    try:
+        async with bot:
+            await bot.start(BOT_TOKEN)
+    finally:
+        if metrics_server is not None:
+            await metrics_server.stop()
+
+
+async def main():
+    await run_bot(shard_count=SHARD_COUNT)
 
 if __name__ == "__main__":
     asyncio.run(main())
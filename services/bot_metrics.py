@@ -0,0 +1,157 @@
+import functools
+import re
+import time
+
+import discord
+
+from services.metrics import MetricsRegistry, SIZE_BUCKETS
+
+RESPONSE_METHODS = ("send_message", "defer", "edit_message", "send_modal", "autocomplete")
+MESSAGE_BUCKETS = (10, 100, 1000, 5000, 20000, 100000)
+DIGITS = re.compile(r"\d+")
+
+
+def since_created(interaction):
+    """Seconds since Discord created the interaction, which is what its 3 second deadline counts."""
+    return max(0.0, (discord.utils.utcnow() - interaction.created_at).total_seconds())
+
+
+class BotMetrics:
+    """The bot's metrics and the hooks that feed them.
+
+    Handler timings come from the interaction router, first-response latency from wrapping
+    InteractionResponse, REST counts from wrapping the HTTP client, and everything owned by other
+    objects (latency, open tickets, rate limits) is read when the endpoint is scraped.
+    """
+
+    def __init__(self, bot, router, rest_queue, ticket_index):
+        self.bot = bot
+        self.router = router
+        self.rest_queue = rest_queue
+        self.ticket_index = ticket_index
+        self.registry = registry = MetricsRegistry()
+        self._originals = {}
+
+        self.first_response = registry.histogram(
+            "ticketbot_interaction_first_response_seconds",
+            "Time from interaction creation to its first response (ack, defer or modal).",
+            ["interaction"],
+        )
+        self.handler_time = registry.histogram(
+            "ticketbot_interaction_handler_seconds",
+            "Time spent in interaction handlers; slash commands are measured from interaction creation.",
+            ["interaction"],
+        )
+        self.handler_errors = registry.counter(
+            "ticketbot_interaction_errors_total", "Interactions whose handler raised.", ["interaction"]
+        )
+        self.rest_requests = registry.counter(
+            "ticketbot_rest_requests_total", "REST requests by route and outcome.", ["route", "status"]
+        )
+        self.rest_time = registry.histogram(
+            "ticketbot_rest_request_seconds", "REST request duration, including rate limit waits.", ["route"]
+        )
+        self.transcript_bytes = registry.histogram(
+            "ticketbot_transcript_bytes", "Size of exported transcript attachments.", buckets=SIZE_BUCKETS
+        )
+        self.transcript_messages = registry.histogram(
+            "ticketbot_transcript_messages", "Messages per transcript export.", buckets=MESSAGE_BUCKETS
+        )
+        registry.counter(
+            "ticketbot_rate_limits_total", "429 responses seen by discord.py, by endpoint.", ["endpoint"],
+            collect=lambda: dict(self.rest_queue.rate_limited_endpoints),
+        )
+        registry.counter(
+            "ticketbot_rest_dropped_total", "Cosmetic REST work skipped because the guild was busy.",
+            collect=lambda: {(): self.rest_queue.dropped},
+        )
+        registry.gauge(
+            "ticketbot_gateway_latency_seconds", "Heartbeat latency per shard.", ["shard"],
+            collect=self.gateway_latencies,
+        )
+        registry.gauge(
+            "ticketbot_guilds", "Guilds this process is connected to.",
+            collect=lambda: {(): len(self.bot.guilds)},
+        )
+        registry.gauge(
+            "ticketbot_tickets_open", "Open tickets per guild.", ["guild"],
+            collect=lambda: {(str(guild_id),): count for guild_id, count in self.ticket_index.open_counts().items()},
+        )
+
+    def interaction_name(self, interaction):
+        """Label an interaction by slash command or handler route, never by a per-user custom_id."""
+        if interaction.command is not None:
+            return f"/{interaction.command.qualified_name}"
+        custom_id = (interaction.data or {}).get("custom_id")
+        if not custom_id:
+            return interaction.type.name
+        route = self.router.resolve(custom_id)
+        return route.name if route is not None else DIGITS.sub("{id}", custom_id)
+
+    def gateway_latencies(self):
+        if isinstance(self.bot, discord.AutoShardedClient):
+            return {(str(shard_id),): latency for shard_id, latency in self.bot.latencies}
+        return {("0",): self.bot.latency}
+
+    def observe_handler(self, route_name, elapsed, failed):
+        self.handler_time.observe(elapsed, route_name)
+        if failed:
+            self.handler_errors.inc(route_name)
+
+    def observe_command(self, interaction, failed=False):
+        name = self.interaction_name(interaction)
+        self.handler_time.observe(since_created(interaction), name)
+        if failed:
+            self.handler_errors.inc(name)
+
+    def observe_transcript(self, export):
+        self.transcript_bytes.observe(export.size)
+        self.transcript_messages.observe(export.message_count)
+
+    def install(self):
+        """Wrap InteractionResponse (process-wide) and this bot's HTTP client."""
+        for name in RESPONSE_METHODS:
+            original = getattr(discord.InteractionResponse, name)
+            self._originals[name] = original
+            setattr(discord.InteractionResponse, name, self._wrap_response(original))
+
+        http = self.bot.http
+        self._originals["request"] = http.request
+        http.request = self._wrap_request(http.request)
+
+    def uninstall(self):
+        for name in RESPONSE_METHODS:
+            if name in self._originals:
+                setattr(discord.InteractionResponse, name, self._originals.pop(name))
+        if "request" in self._originals:
+            self.bot.http.request = self._originals.pop("request")
+
+    def _wrap_response(self, method):
+        @functools.wraps(method)
+        async def respond(response, *args, **kwargs):
+            first = not response.is_done()
+            result = await method(response, *args, **kwargs)
+            if first:
+                interaction = response._parent
+                self.first_response.observe(since_created(interaction), self.interaction_name(interaction))
+            return result
+        return respond
+
+    def _wrap_request(self, request):
+        @functools.wraps(request)
+        async def timed_request(route, **kwargs):
+            label = f"{route.method} {route.path}"
+            start = time.perf_counter()
+            status = "ok"
+            try:
+                return await request(route, **kwargs)
+            except discord.HTTPException as e:
+                status = str(e.status)
+                raise
+            except Exception:
+                status = "error"
+                raise
+            finally:
+                self.rest_requests.inc(label, status)
+                self.rest_time.observe(time.perf_counter() - start, label)
+        return timed_request
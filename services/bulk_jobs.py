@@ -0,0 +1,188 @@
+import asyncio
+import time
+
+# Seconds between progress reports while a job runs
+REPORT_INTERVAL = 3.0
+
+
+class BulkJob:
+    """A bulk action over a fixed set of tickets, persisted so it can resume after a restart."""
+
+    __slots__ = (
+        "id", "guild_id", "action", "requested_by", "progress_channel_id", "progress_message_id",
+        "total", "done", "failed", "status", "created_at",
+    )
+
+    def __init__(self, id, guild_id, action, requested_by, progress_channel_id, progress_message_id,
+                 total, done, failed, status, created_at):
+        self.id = id
+        self.guild_id = guild_id
+        self.action = action
+        self.requested_by = requested_by
+        self.progress_channel_id = progress_channel_id
+        self.progress_message_id = progress_message_id
+        self.total = total
+        self.done = done
+        self.failed = failed
+        self.status = status
+        self.created_at = created_at
+
+    @property
+    def finished(self):
+        return self.status != "running"
+
+
+JOB_COLUMNS = (
+    "id, guild_id, action, requested_by, progress_channel_id, progress_message_id, "
+    "total, done, failed, status, created_at"
+)
+
+
+class BulkJobs:
+    """Runs bulk ticket jobs with a bounded number of tickets in flight, recording each one as it finishes.
+
+    run_item(job, channel_id) does the work for one ticket and report(job) publishes progress;
+    both are provided by the cog.
+    """
+
+    def __init__(self, db, run_item, report, concurrency, is_throttled=None):
+        self.db = db
+        self._run_item = run_item
+        self._report = report
+        self.concurrency = concurrency
+        self._is_throttled = is_throttled
+        self._tasks = {}
+        self.db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS bulk_jobs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                guild_id INTEGER NOT NULL,
+                action TEXT NOT NULL,
+                requested_by INTEGER NOT NULL,
+                progress_channel_id INTEGER,
+                progress_message_id INTEGER,
+                total INTEGER NOT NULL,
+                done INTEGER NOT NULL DEFAULT 0,
+                failed INTEGER NOT NULL DEFAULT 0,
+                status TEXT NOT NULL,
+                created_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS bulk_job_items (
+                job_id INTEGER NOT NULL,
+                channel_id INTEGER NOT NULL,
+                state TEXT NOT NULL DEFAULT 'pending',
+                PRIMARY KEY (job_id, channel_id)
+            );
+            """
+        )
+
+    def _create(self, guild_id, action, requested_by, channel_ids, progress_channel_id, progress_message_id):
+        rows = self.db.execute(
+            "INSERT INTO bulk_jobs (guild_id, action, requested_by, progress_channel_id, progress_message_id, "
+            f"total, status, created_at) VALUES (?, ?, ?, ?, ?, ?, 'running', ?) RETURNING {JOB_COLUMNS}",
+            (guild_id, action, requested_by, progress_channel_id, progress_message_id, len(channel_ids), time.time()),
+        )
+        job = BulkJob(*rows[0])
+        self.db.executemany(
+            "INSERT INTO bulk_job_items (job_id, channel_id) VALUES (?, ?)",
+            [(job.id, channel_id) for channel_id in channel_ids],
+        )
+        return job
+
+    async def create(self, guild_id, action, requested_by, channel_ids, progress_message):
+        """Persist a job that reports to progress_message, which must already be posted.
+
+        A job row is only written once someone can follow it, since unfinished jobs resume on
+        the next start.
+        """
+        return await self.db.run(
+            self._create, guild_id, action, requested_by, list(channel_ids),
+            progress_message.channel.id, progress_message.id,
+        )
+
+    def _jobs(self, where, params=()):
+        return [BulkJob(*row) for row in self.db.execute(f"SELECT {JOB_COLUMNS} FROM bulk_jobs WHERE {where}", params)]
+
+    async def get(self, job_id):
+        jobs = await self.db.run(self._jobs, "id = ?", (job_id,))
+        return jobs[0] if jobs else None
+
+    def start(self, job):
+        if job.id not in self._tasks:
+            task = asyncio.create_task(self._run(job))
+            self._tasks[job.id] = task
+            task.add_done_callback(lambda _: self._forget_task(job.id, task))
+
+    def _forget_task(self, job_id, task):
+        # A job stopped and started again has a newer task that must stay
+        if self._tasks.get(job_id) is task:
+            del self._tasks[job_id]
+
+    async def unfinished(self):
+        """Return the jobs still marked running, e.g. ones a previous run was stopped in the middle of."""
+        return await self.db.run(self._jobs, "status = 'running'")
+
+    async def cancel(self, job):
+        """Stop a job; tickets it already handled stay handled."""
+        task = self._tasks.pop(job.id, None)
+        if task is not None:
+            task.cancel()
+        await self._finish(job, "cancelled")
+
+    def stop(self):
+        # Unlike cancel(), jobs stay "running" in the database and resume on the next start
+        for task in self._tasks.values():
+            task.cancel()
+        self._tasks.clear()
+
+    def _pending(self, job_id):
+        return [row[0] for row in self.db.execute(
+            "SELECT channel_id FROM bulk_job_items WHERE job_id = ? AND state = 'pending'", (job_id,)
+        )]
+
+    def _record(self, job, channel_id, state):
+        self.db.execute(
+            "UPDATE bulk_job_items SET state = ? WHERE job_id = ? AND channel_id = ?", (state, job.id, channel_id)
+        )
+        self.db.execute("UPDATE bulk_jobs SET done = ?, failed = ? WHERE id = ?", (job.done, job.failed, job.id))
+
+    async def _finish(self, job, status):
+        job.status = status
+        await self.db.run(self.db.execute, "UPDATE bulk_jobs SET status = ? WHERE id = ?", (status, job.id))
+        await self._safe_report(job)
+
+    async def _safe_report(self, job):
+        try:
+            await self._report(job)
+        except Exception as e:
+            print(f"Failed to report progress of bulk job {job.id}: {e}")
+
+    async def _run(self, job):
+        pending = await self.db.run(self._pending, job.id)
+        queue = asyncio.Queue()
+        for channel_id in pending:
+            queue.put_nowait(channel_id)
+        last_report = 0.0
+
+        async def worker():
+            nonlocal last_report
+            while not queue.empty():
+                channel_id = queue.get_nowait()
+                # Stay out of the way while Discord has us globally rate limited
+                while self._is_throttled is not None and self._is_throttled():
+                    await asyncio.sleep(1)
+                try:
+                    await self._run_item(job, channel_id)
+                    job.done += 1
+                    state = "done"
+                except Exception as e:
+                    print(f"Bulk job {job.id} failed on channel {channel_id}: {e}")
+                    job.failed += 1
+                    state = "failed"
+                await self.db.run(self._record, job, channel_id, state)
+                if time.monotonic() - last_report >= REPORT_INTERVAL:
+                    last_report = time.monotonic()
+                    await self._safe_report(job)
+
+        await asyncio.gather(*(worker() for _ in range(min(self.concurrency, len(pending)) or 1)))
+        await self._finish(job, "done")
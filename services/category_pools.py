@@ -0,0 +1,229 @@
+import asyncio
+import re
+from collections import Counter, defaultdict
+
+import discord
+
+from services.guild_resources import category_key
+from services.single_flight import SingleFlight
+
+# Discord refuses to put more than 50 channels in one category
+CATEGORY_CHANNEL_LIMIT = 50
+
+
+def pool_category_name(base, index):
+    """Name of the index-th category of a pool: "OPENED TICKETS", "OPENED TICKETS 2", ..."""
+    return base if index == 0 else f"{base} {index + 1}"
+
+
+class GuildCategoryPools:
+    """Capacity bookkeeping for the pooled categories of one guild."""
+
+    def __init__(self):
+        self.categories = {}                # category id -> (pool name, index)
+        self.pools = defaultdict(dict)      # pool name -> {index: category id}
+        self.channels = defaultdict(set)    # category id -> ids of the channels in it
+        self.locations = {}                 # channel id -> pooled category id
+        self.reserved = Counter()           # category id -> slots promised to channels being created or moved
+        self.available = defaultdict(dict)  # pool name -> category ids with a free slot, in insertion order
+
+    def free_slots(self, category_id):
+        return CATEGORY_CHANNEL_LIMIT - len(self.channels[category_id]) - self.reserved[category_id]
+
+    def refresh(self, category_id):
+        pool, _ = self.categories[category_id]
+        if self.free_slots(category_id) > 0:
+            self.available[pool].setdefault(category_id, None)
+        else:
+            self.available[pool].pop(category_id, None)
+
+    def add_category(self, category_id, pool, index):
+        self.categories[category_id] = (pool, index)
+        self.pools[pool][index] = category_id
+        self.refresh(category_id)
+
+    def remove_category(self, category_id):
+        pool, index = self.categories.pop(category_id)
+        if self.pools[pool].get(index) == category_id:
+            del self.pools[pool][index]
+        self.available[pool].pop(category_id, None)
+        for channel_id in self.channels.pop(category_id, ()):
+            self.locations.pop(channel_id, None)
+        self.reserved.pop(category_id, None)
+
+    def place(self, channel_id, category_id):
+        """Record that a channel now lives in category_id (or outside every pool when it is not pooled)."""
+        previous = self.locations.get(channel_id)
+        if previous == category_id:
+            return
+        if previous is not None:
+            self.channels[previous].discard(channel_id)
+            del self.locations[channel_id]
+            self.refresh(previous)
+        if category_id in self.categories:
+            self.channels[category_id].add(channel_id)
+            self.locations[channel_id] = category_id
+            self.refresh(category_id)
+
+
+class CategoryPools:
+    """Spreads channels over numbered overflow categories, since a category holds at most 50 channels.
+
+    Every pool starts with the category named after it and grows "NAME 2", "NAME 3", ... as needed.
+    Categories are remembered by ID through GuildResources like any other resource, and the next
+    one is created in the background once fewer than headroom slots are left in the pool.
+    """
+
+    def __init__(self, resources, pools, headroom):
+        self.resources = resources
+        self.pool_names = tuple(pools)
+        self.headroom = headroom
+        self._guilds = {}
+        self._allocations = SingleFlight()
+        self._tasks = set()
+        patterns = "|".join(re.escape(name) for name in sorted(self.pool_names, key=len, reverse=True))
+        self._name_pattern = re.compile(rf"^({patterns})(?: (\d+))?$")
+
+    def guild(self, guild_id):
+        pools = self._guilds.get(guild_id)
+        if pools is None:
+            pools = self._guilds[guild_id] = GuildCategoryPools()
+        return pools
+
+    def forget_guild(self, guild_id):
+        self._guilds.pop(guild_id, None)
+
+    def _match(self, category):
+        """Return (pool name, index) for a category, by stored ID first and by name otherwise."""
+        for pool in self.pool_names:
+            for index in range(len(category.guild.categories)):
+                name = pool_category_name(pool, index)
+                object_id = self.resources.settings.get(category.guild.id, category_key(name))
+                if object_id is None:
+                    break
+                if object_id == category.id:
+                    return pool, index
+        match = self._name_pattern.match(category.name)
+        if match is None:
+            return None
+        index = int(match.group(2)) - 1 if match.group(2) else 0
+        if index < 1 and match.group(2):
+            return None
+        # A stored ID for that name means this is a same-named stranger
+        stored = self.resources.settings.get(category.guild.id, category_key(category.name))
+        if stored is not None and stored != category.id:
+            return None
+        return match.group(1), index
+
+    def rebuild(self, guild):
+        """Rebuild a guild's pools and channel counts from the channel cache in one pass."""
+        pools = self._guilds[guild.id] = GuildCategoryPools()
+        for category in guild.categories:
+            match = self._match(category)
+            if match is not None and match[1] not in pools.pools[match[0]]:
+                pools.add_category(category.id, *match)
+        for channel in guild.channels:
+            if channel.category_id is not None:
+                pools.place(channel.id, channel.category_id)
+        return pools
+
+    def pool_of(self, category):
+        """Return the pool a category belongs to, or None."""
+        if category is None:
+            return None
+        entry = self.guild(category.guild.id).categories.get(category.id)
+        if entry is not None:
+            return entry[0]
+        # Not indexed yet (e.g. before the first rebuild); only trust an exact base name
+        return category.name if category.name in self.pool_names else None
+
+    def categories(self, guild, pool):
+        """Return the pool's categories in order."""
+        pools = self.guild(guild.id)
+        return [guild.get_channel(category_id) for _, category_id in sorted(pools.pools[pool].items())]
+
+    def track(self, channel):
+        """Keep channel counts current from channel create and update events."""
+        pools = self.guild(channel.guild.id)
+        if isinstance(channel, discord.CategoryChannel):
+            if channel.id not in pools.categories:
+                match = self._match(channel)
+                if match is not None and match[1] not in pools.pools[match[0]]:
+                    pools.add_category(channel.id, *match)
+            return
+        pools.place(channel.id, channel.category_id)
+
+    def untrack(self, channel):
+        pools = self.guild(channel.guild.id)
+        if channel.id in pools.categories:
+            pools.remove_category(channel.id)
+        else:
+            pools.place(channel.id, None)
+
+    async def acquire(self, guild, pool):
+        """Return a category of the pool with a free slot and reserve that slot.
+
+        Call release() once the channel has been created in (or moved to) the category.
+        """
+        pools = self.guild(guild.id)
+        while True:
+            category = self._pick(guild, pools, pool)
+            if category is not None:
+                break
+            await self._allocations.run((guild.id, pool), lambda: self._allocate(guild, pool))
+
+        pools.reserved[category.id] += 1
+        pools.refresh(category.id)
+        if self.remaining(guild.id, pool) < self.headroom and not self._allocations.in_flight((guild.id, pool)):
+            # Open the next category before anyone has to wait for it
+            task = asyncio.create_task(self._allocations.run((guild.id, pool), lambda: self._allocate(guild, pool)))
+            self._tasks.add(task)
+            task.add_done_callback(self._preallocated)
+        return category
+
+    def release(self, guild_id, category_id, channel=None):
+        """Drop a reservation, counting the channel that used it right away when given."""
+        pools = self.guild(guild_id)
+        if pools.reserved[category_id] > 0:
+            pools.reserved[category_id] -= 1
+        if channel is not None:
+            pools.place(channel.id, channel.category_id)
+        if category_id in pools.categories:
+            pools.refresh(category_id)
+
+    def remaining(self, guild_id, pool):
+        pools = self.guild(guild_id)
+        return sum(pools.free_slots(category_id) for category_id in pools.available[pool])
+
+    def _pick(self, guild, pools, pool):
+        for category_id in list(pools.available[pool]):
+            category = guild.get_channel(category_id)
+            if category is not None:
+                return category
+            # Deleted without us seeing the event
+            pools.remove_category(category_id)
+        return None
+
+    async def _allocate(self, guild, pool):
+        pools = self.guild(guild.id)
+        index = 0
+        while index in pools.pools[pool]:
+            index += 1
+        if index and self.remaining(guild.id, pool) >= self.headroom:
+            return None
+        category = await self.resources.category(guild, pool_category_name(pool, index))
+        if category.id not in pools.categories:
+            pools.add_category(category.id, pool, index)
+            for channel in category.channels:
+                pools.place(channel.id, category.id)
+        return category
+
+    def _preallocated(self, task):
+        self._tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            print(f"Failed to create an overflow category: {task.exception()}")
+
+    def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        self._tasks.clear()
@@ -0,0 +1,40 @@
+import discord
+
+
+def with_send_messages(overwrites, allowed):
+    """Return a copy of overwrites with send_messages set for every target."""
+    updated = {}
+    for target, perms in overwrites.items():
+        perms = discord.PermissionOverwrite(**dict(perms))
+        perms.send_messages = allowed
+        updated[target] = perms
+    return updated
+
+
+def _overwrite_pairs(overwrites):
+    return {target.id: tuple(perms.pair()) for target, perms in overwrites.items()}
+
+
+def channel_changes(channel, category=None, name=None, topic=None, overwrites=None):
+    """Return the edit() keyword arguments needed to reach the desired state, skipping what already matches."""
+    changes = {}
+    if category is not None and channel.category_id != category.id:
+        changes["category"] = category
+    if name is not None and channel.name != name:
+        changes["name"] = name
+    if topic is not None and channel.topic != topic:
+        changes["topic"] = topic
+    if overwrites is not None and _overwrite_pairs(channel.overwrites) != _overwrite_pairs(overwrites):
+        changes["overwrites"] = overwrites
+    return changes
+
+
+async def apply_channel_changes(channel, category=None, name=None, topic=None, overwrites=None, reason=None):
+    """Apply category, name, topic and overwrite changes in a single edit.
+
+    Returns the updated channel, or None when the channel already matched and no request was made.
+    """
+    changes = channel_changes(channel, category=category, name=name, topic=topic, overwrites=overwrites)
+    if not changes:
+        return None
+    return await channel.edit(reason=reason, **changes) or channel
@@ -0,0 +1,54 @@
+import asyncio
+import os
+import time
+
+
+def cluster_snapshot(bot, cluster_id):
+    """Collect the health and counter values a cluster reports to the launcher."""
+    snapshot = {
+        "cluster": cluster_id,
+        "pid": os.getpid(),
+        "time": time.time(),
+        "ready": bot.is_ready(),
+        "guilds": len(bot.guilds),
+        "shards": {
+            shard_id: {"latency": shard.latency, "closed": shard.is_closed()}
+            for shard_id, shard in getattr(bot, "shards", {}).items()
+        },
+    }
+    cog = bot.get_cog("TicketBot")
+    if cog is not None:
+        snapshot["interactions"] = sum(stats.calls for stats in cog.interaction_router.stats.values())
+        snapshot["interaction_errors"] = sum(stats.errors for stats in cog.interaction_router.stats.values())
+        snapshot["rate_limits"] = cog.rest_queue.rate_limits
+        snapshot["dropped"] = cog.rest_queue.dropped
+        snapshot["coalesced"] = cog.coalesced_ticket_requests
+    return snapshot
+
+
+class ClusterReporter:
+    """Pushes a cluster's snapshot onto the launcher's queue when ready and then periodically."""
+
+    def __init__(self, cluster_id, queue, interval):
+        self.cluster_id = cluster_id
+        self.queue = queue
+        self.interval = interval
+        self._task = None
+
+    def attach(self, bot):
+        self.bot = bot
+        bot.add_listener(self.on_ready, "on_ready")
+
+    def report(self, kind="health"):
+        self.queue.put_nowait({"kind": kind, **cluster_snapshot(self.bot, self.cluster_id)})
+
+    async def on_ready(self):
+        # on_ready fires again after reconnects; only the first one starts the loop
+        self.report("ready")
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            self.report()
@@ -0,0 +1,64 @@
+import hashlib
+import json
+import os
+import time
+
+import discord
+
+from config import COMMAND_SYNC_STATE_PATH, COMMAND_SYNC_GUILD_ID
+
+
+def command_payload(tree, guild=None):
+    """Return the JSON payload Discord receives for the tree's commands, sorted by name."""
+    commands = tree.get_commands(guild=guild)
+    return sorted((command.to_dict(tree) for command in commands), key=lambda data: data["name"])
+
+
+def payload_hash(payload):
+    encoded = json.dumps(payload, sort_keys=True, separators=(",", ":")).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def _load_state(path):
+    try:
+        with open(path, encoding="utf-8") as fp:
+            return json.load(fp)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_state(path, state):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as fp:
+        json.dump(state, fp, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+async def sync_commands(bot, guild_id=COMMAND_SYNC_GUILD_ID, state_path=COMMAND_SYNC_STATE_PATH):
+    """Sync the command tree only when its payload differs from the last successful sync.
+
+    With guild_id set, the global commands are copied to that guild and synced there instead,
+    which Discord applies immediately and rate limits far less.
+    """
+    start = time.perf_counter()
+    guild = discord.Object(id=guild_id) if guild_id else None
+    if guild:
+        bot.tree.copy_global_to(guild=guild)
+
+    payload = command_payload(bot.tree, guild)
+    digest = payload_hash(payload)
+    scope = f"{bot.application_id}:{guild_id or 'global'}"
+
+    state = _load_state(state_path)
+    if state.get(scope) == digest:
+        print(f"Slash commands unchanged for {scope}, skipped sync ({time.perf_counter() - start:.2f}s).")
+        return False
+
+    await bot.tree.sync(guild=guild)
+    state[scope] = digest
+    _save_state(state_path, state)
+    print(f"Synced {len(payload)} slash command(s) for {scope} in {time.perf_counter() - start:.2f}s.")
+    return True
@@ -0,0 +1,48 @@
+import asyncio
+import os
+import sqlite3
+import threading
+
+from config import DATABASE_PATH
+
+
+class Database:
+    """SQLite connection shared by the bot's local stores."""
+
+    def __init__(self, path=DATABASE_PATH):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._lock = threading.Lock()
+
+    def execute(self, sql, params=()):
+        """Run a single statement and return all resulting rows."""
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def executemany(self, sql, rows):
+        """Run a statement for every row inside one transaction."""
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany(sql, rows)
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def executescript(self, script):
+        with self._lock:
+            self._conn.executescript(script)
+
+    async def run(self, method, *args):
+        """Run a blocking database call in a worker thread."""
+        return await asyncio.to_thread(method, *args)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,80 @@
+import discord
+
+from services.single_flight import SingleFlight
+
+
+def category_key(name):
+    return f"category:{name}"
+
+
+def role_key(name):
+    return f"role:{name}"
+
+
+def channel_key(name):
+    return f"channel:{name}"
+
+
+class GuildResources:
+    """Resolves the bot's categories, roles and channels by stored ID and creates each at most once."""
+
+    def __init__(self, settings):
+        self.settings = settings
+        self._creations = SingleFlight()
+        self._created = set()
+
+    def cached(self, guild, key):
+        """Return the object stored under key if it still exists, without any API calls."""
+        object_id = self.settings.get(guild.id, key)
+        if object_id is None:
+            return None
+        if key.startswith("role:"):
+            return guild.get_role(object_id)
+        return guild.get_channel(object_id)
+
+    async def resolve(self, guild, key, find, create):
+        """Return the stored object, else adopt one found by find(), else create() it, recording its ID."""
+        resource = self.cached(guild, key)
+        if resource is not None:
+            return resource
+        return await self._creations.run((guild.id, key), lambda: self._resolve(guild, key, find, create))
+
+    async def _resolve(self, guild, key, find, create):
+        resource = find()
+        if resource is None:
+            resource = await create()
+            self._created.add((guild.id, key))
+        await self.settings.set(guild.id, key, resource.id)
+        return resource
+
+    async def category(self, guild, name):
+        async def create():
+            category = await guild.create_category(name)
+            print(f"Created category '{name}' in {guild.name}")
+            return category
+
+        return await self.resolve(
+            guild, category_key(name), lambda: discord.utils.get(guild.categories, name=name), create
+        )
+
+    async def role(self, guild, name, **options):
+        async def create():
+            role = await guild.create_role(name=name, **options)
+            print(f"Created role '{name}' in {guild.name}")
+            return role
+
+        return await self.resolve(guild, role_key(name), lambda: discord.utils.get(guild.roles, name=name), create)
+
+    def pop_created(self, guild_id, key):
+        """Return whether the last resolve of key had to create the object, clearing the flag."""
+        try:
+            self._created.remove((guild_id, key))
+        except KeyError:
+            return False
+        return True
+
+    async def forget(self, guild_id, object_id):
+        """Drop every stored reference to a deleted channel or role."""
+        for key, value in self.settings.items(guild_id):
+            if value == object_id and key.split(":")[0] in ("category", "role", "channel"):
+                await self.settings.unset(guild_id, key)
@@ -0,0 +1,40 @@
+import json
+from collections import defaultdict
+
+
+class GuildSettings:
+    """Per-guild settings persisted in SQLite and served from memory."""
+
+    def __init__(self, db):
+        self.db = db
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS guild_settings ("
+            "guild_id INTEGER NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, "
+            "PRIMARY KEY (guild_id, key))"
+        )
+        self._settings = defaultdict(dict)
+        for guild_id, key, value in self.db.execute("SELECT guild_id, key, value FROM guild_settings"):
+            self._settings[guild_id][key] = json.loads(value)
+
+    def get(self, guild_id, key, default=None):
+        return self._settings.get(guild_id, {}).get(key, default)
+
+    def items(self, guild_id):
+        return list(self._settings.get(guild_id, {}).items())
+
+    async def set(self, guild_id, key, value):
+        self._settings[guild_id][key] = value
+        await self.db.run(
+            self.db.execute,
+            "INSERT OR REPLACE INTO guild_settings (guild_id, key, value) VALUES (?, ?, ?)",
+            (guild_id, key, json.dumps(value)),
+        )
+
+    async def unset(self, guild_id, key):
+        if self._settings.get(guild_id, {}).pop(key, None) is None:
+            return
+        await self.db.run(
+            self.db.execute,
+            "DELETE FROM guild_settings WHERE guild_id = ? AND key = ?",
+            (guild_id, key),
+        )
@@ -0,0 +1,91 @@
+import time
+import traceback
+
+import discord
+
+
+class HandlerStats:
+    """Call, error and timing counters for one interaction handler."""
+
+    __slots__ = ("calls", "errors", "total_time", "max_time")
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+
+    @property
+    def average_time(self):
+        return self.total_time / self.calls if self.calls else 0.0
+
+
+class Route:
+    __slots__ = ("name", "handler", "privileged")
+
+    def __init__(self, name, handler, privileged):
+        self.name = name
+        self.handler = handler
+        self.privileged = privileged
+
+
+class InteractionRouter:
+    """Dispatch component interactions to handlers registered by exact custom_id or by prefix."""
+
+    def __init__(self, guard=None, observer=None):
+        self.guard = guard
+        # observer(route name, elapsed seconds, failed) is called after every handled interaction
+        self.observer = observer
+        self._exact = {}
+        self._prefixes = []
+        self.stats = {}
+
+    def register(self, custom_id, handler, privileged=False):
+        self._exact[custom_id] = Route(custom_id, handler, privileged)
+        self.stats.setdefault(custom_id, HandlerStats())
+
+    def register_prefix(self, prefix, handler, privileged=False):
+        name = f"{prefix}*"
+        self._prefixes.append((prefix, Route(name, handler, privileged)))
+        # Longest prefix wins when several match
+        self._prefixes.sort(key=lambda item: len(item[0]), reverse=True)
+        self.stats.setdefault(name, HandlerStats())
+
+    def resolve(self, custom_id):
+        route = self._exact.get(custom_id)
+        if route is not None:
+            return route
+        for prefix, route in self._prefixes:
+            if custom_id.startswith(prefix):
+                return route
+        return None
+
+    async def dispatch(self, interaction):
+        """Run the handler for a component interaction; returns False when nothing handled it."""
+        if interaction.type is not discord.InteractionType.component:
+            return False
+        custom_id = (interaction.data or {}).get("custom_id")
+        route = self.resolve(custom_id) if custom_id else None
+        if route is None:
+            return False
+
+        stats = self.stats[route.name]
+        start = time.perf_counter()
+        failed = False
+        try:
+            if route.privileged and self.guard is not None and not await self.guard(interaction):
+                return True
+            await route.handler(interaction, custom_id)
+        except Exception as e:
+            stats.errors += 1
+            failed = True
+            print(f"Error handling interaction '{custom_id}': {e}")
+            traceback.print_exc()
+        finally:
+            elapsed = time.perf_counter() - start
+            stats.calls += 1
+            stats.total_time += elapsed
+            stats.max_time = max(stats.max_time, elapsed)
+            if self.observer is not None:
+                self.observer(route.name, elapsed, failed)
+        return True
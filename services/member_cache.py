@@ -0,0 +1,86 @@
+import time
+from collections import OrderedDict
+
+import discord
+
+from services.single_flight import SingleFlight
+
+
+class MemberCache:
+    """Small LRU of recently seen members, for when the global member cache is disabled.
+
+    Members arrive for free with interactions, joins and gateway messages; remembering the most
+    recent ones covers ticket owners and active staff without holding every member of every guild.
+    Entries expire after ttl seconds because role changes of uncached members are not dispatched.
+    """
+
+    def __init__(self, capacity, ttl):
+        self.capacity = capacity
+        self.ttl = ttl
+        self._members = OrderedDict()  # (guild id, member id) -> (member, seen at)
+        self._fetches = SingleFlight()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._members)
+
+    def remember(self, member):
+        if not isinstance(member, discord.Member) or self.capacity <= 0:
+            return
+        key = (member.guild.id, member.id)
+        self._members[key] = (member, time.monotonic())
+        self._members.move_to_end(key)
+        while len(self._members) > self.capacity:
+            self._members.popitem(last=False)
+
+    def forget(self, guild_id, member_id):
+        self._members.pop((guild_id, member_id), None)
+
+    def forget_guild(self, guild_id):
+        for key in [key for key in self._members if key[0] == guild_id]:
+            del self._members[key]
+
+    def get(self, guild, member_id):
+        """Return a member from the guild cache or the LRU, without any API calls."""
+        member = guild.get_member(member_id)
+        if member is not None:
+            return member
+
+        entry = self._members.get((guild.id, member_id))
+        if entry is None or time.monotonic() - entry[1] > self.ttl:
+            self.misses += 1
+            return None
+        self._members.move_to_end((guild.id, member_id))
+        self.hits += 1
+        return entry[0]
+
+    async def fetch(self, guild, member_id):
+        """Return a member, fetching it over REST (once per concurrent caller) on a miss."""
+        member = self.get(guild, member_id)
+        if member is not None:
+            return member
+
+        async def fetch_member():
+            try:
+                member = await guild.fetch_member(member_id)
+            except discord.NotFound:
+                return None
+            self.remember(member)
+            return member
+
+        return await self._fetches.run((guild.id, member_id), fetch_member)
+
+    def author_of(self, message):
+        """Return the message author with member data where we have it.
+
+        Gateway messages carry the author's member payload; messages fetched from history do not,
+        so their authors come back as plain users unless the LRU still knows them.
+        """
+        author = message.author
+        if isinstance(author, discord.Member):
+            self.remember(author)
+            return author
+        if message.guild is None:
+            return author
+        return self.get(message.guild, author.id) or author
@@ -0,0 +1,229 @@
+import asyncio
+import datetime
+import json
+import time
+
+import discord
+
+from config import ARCHIVE_FLUSH_INTERVAL
+from services.transcripts import TranscriptEntry, entry_from_message
+
+PAGE_SIZE = 500
+
+
+class MessageArchive:
+    """Append-only local record of ticket channel messages, written in batches off the event loop."""
+
+    def __init__(self, db, members=None):
+        self.db = db
+        self.members = members
+        self.db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS message_events (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                kind TEXT NOT NULL,
+                message_id INTEGER NOT NULL,
+                channel_id INTEGER NOT NULL,
+                guild_id INTEGER NOT NULL,
+                author_id INTEGER,
+                author TEXT,
+                content TEXT,
+                attachments TEXT,
+                created_at REAL,
+                recorded_at REAL NOT NULL
+            );
+            CREATE UNIQUE INDEX IF NOT EXISTS message_events_created
+                ON message_events (message_id) WHERE kind = 'create';
+            CREATE INDEX IF NOT EXISTS message_events_message ON message_events (message_id, seq);
+            CREATE INDEX IF NOT EXISTS message_events_channel ON message_events (channel_id, message_id);
+            CREATE TABLE IF NOT EXISTS archived_channels (
+                channel_id INTEGER PRIMARY KEY,
+                guild_id INTEGER NOT NULL,
+                name TEXT NOT NULL,
+                complete INTEGER NOT NULL DEFAULT 0,
+                synced_through INTEGER
+            );
+            """
+        )
+        if "synced_through" not in {row[1] for row in self.db.execute("PRAGMA table_info(archived_channels)")}:
+            # Databases from before the watermark; NULL makes the next sync fetch the whole channel
+            self.db.execute("ALTER TABLE archived_channels ADD COLUMN synced_through INTEGER")
+        self._pending = []
+        # Channels whose every message since their watermark arrived over the gateway in this session
+        self._live = set()
+        self._session = 0
+        self._wake = asyncio.Event()
+        self._task = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        await self.flush()
+
+    async def _run(self):
+        while True:
+            await self._wake.wait()
+            # Give the batch a moment to fill up before writing it
+            await asyncio.sleep(ARCHIVE_FLUSH_INTERVAL)
+            self._wake.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                print(f"Error writing message archive: {e}")
+
+    async def flush(self):
+        """Write every queued event in a single transaction."""
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, []
+        await self.db.run(
+            self.db.executemany,
+            "INSERT OR IGNORE INTO message_events "
+            "(kind, message_id, channel_id, guild_id, author_id, author, content, attachments, created_at, recorded_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            batch,
+        )
+
+    def _append(self, kind, message_id, channel_id, guild_id, author_id=None, entry=None):
+        self._pending.append((
+            kind,
+            message_id,
+            channel_id,
+            guild_id,
+            author_id,
+            entry.author if entry else None,
+            entry.content if entry else None,
+            json.dumps(entry.attachments) if entry else None,
+            entry.created_at.timestamp() if entry else None,
+            time.time(),
+        ))
+        self._wake.set()
+
+    def _entry(self, message):
+        return entry_from_message(message, self.members.author_of(message) if self.members else None)
+
+    def record_message(self, message):
+        self._append("create", message.id, message.channel.id, message.guild.id, message.author.id, self._entry(message))
+
+    def record_edit(self, message):
+        self._append("edit", message.id, message.channel.id, message.guild.id, message.author.id, self._entry(message))
+
+    def record_delete(self, message_id, channel_id, guild_id):
+        self._append("delete", message_id, channel_id, guild_id)
+
+    def _track_channel(self, channel_id, guild_id, name, synced_through):
+        self.db.execute(
+            "INSERT INTO archived_channels (channel_id, guild_id, name, complete, synced_through) "
+            "VALUES (?, ?, ?, ?, ?) ON CONFLICT(channel_id) DO UPDATE SET name = excluded.name, "
+            "complete = MAX(complete, excluded.complete), "
+            "synced_through = MAX(COALESCE(synced_through, excluded.synced_through), "
+            "COALESCE(excluded.synced_through, synced_through))",
+            (channel_id, guild_id, name, int(synced_through is not None), synced_through),
+        )
+
+    async def track_channel(self, channel, complete=False):
+        """Remember a ticket channel; complete means every message since its creation is archived.
+
+        Only pass complete for a channel the bot just created, whose messages all arrive over the gateway.
+        """
+        synced_through = channel.id if complete else None
+        await self.db.run(self._track_channel, channel.id, channel.guild.id, channel.name, synced_through)
+        if complete:
+            self._live.add(channel.id)
+
+    def reconnected(self):
+        """Stop trusting gateway events to be complete; call on every on_ready, which may follow a gap."""
+        self._live.clear()
+        self._session += 1
+
+    def _channel_state(self, channel_id):
+        synced = self.db.execute("SELECT synced_through FROM archived_channels WHERE channel_id = ?", (channel_id,))
+        newest = self.db.execute(
+            "SELECT MAX(message_id) FROM message_events WHERE channel_id = ? AND kind = 'create'", (channel_id,)
+        )
+        return synced[0][0] if synced else None, newest[0][0]
+
+    async def sync_channel(self, channel):
+        """Fetch whatever the archive is missing for a channel, so it can be rendered locally.
+
+        The archive is only trusted up to the channel's synced_through watermark, which only this
+        method advances. Messages recorded from the gateway after a gap (the bot was offline or
+        reconnected) would otherwise hide the ones posted during the gap.
+        """
+        await self.flush()
+        session = self._session
+        synced_through, newest = await self.db.run(self._channel_state, channel.id)
+        if synced_through is not None and channel.id in self._live:
+            # Watched without a gap since the watermark, so everything newer is already recorded
+            if newest and newest > synced_through:
+                await self.db.run(self._track_channel, channel.id, channel.guild.id, channel.name, newest)
+            return 0
+        if synced_through is not None and (channel.last_message_id or 0) <= synced_through:
+            if session == self._session:
+                self._live.add(channel.id)
+            return 0
+
+        # Either the channel predates the archive or the bot may have missed messages
+        after = discord.Object(id=synced_through) if synced_through else None
+        fetched = 0
+        synced = max(synced_through or 0, channel.id)
+        async for message in channel.history(limit=None, oldest_first=True, after=after):
+            self.record_message(message)
+            synced = max(synced, message.id)
+            fetched += 1
+        await self.flush()
+        await self.db.run(self._track_channel, channel.id, channel.guild.id, channel.name, synced)
+        # A reconnect during the fetch may have dropped events, so only a gap-free fetch goes live
+        if session == self._session:
+            self._live.add(channel.id)
+        return fetched
+
+    def _is_synced(self, channel_id, last_message_id):
+        synced = self.db.execute("SELECT synced_through FROM archived_channels WHERE channel_id = ?", (channel_id,))
+        return bool(synced) and synced[0][0] is not None and last_message_id <= synced[0][0]
+
+    async def is_synced(self, channel):
+        """Whether every message up to the channel's newest one is known to be archived."""
+        return await self.db.run(self._is_synced, channel.id, channel.last_message_id or 0)
+
+    def _forget_channel(self, channel_id):
+        self.db.execute("DELETE FROM message_events WHERE channel_id = ?", (channel_id,))
+        self.db.execute("DELETE FROM archived_channels WHERE channel_id = ?", (channel_id,))
+
+    async def forget_channel(self, channel_id):
+        """Drop everything archived for a channel, e.g. once its transcript is stored elsewhere."""
+        self._live.discard(channel_id)
+        await self.flush()
+        await self.db.run(self._forget_channel, channel_id)
+
+    def _page(self, channel_id, after_id):
+        return self.db.execute(
+            "SELECT c.message_id, c.created_at, c.author, l.content, l.attachments "
+            "FROM message_events c JOIN message_events l "
+            "ON l.seq = (SELECT MAX(seq) FROM message_events WHERE message_id = c.message_id) "
+            "WHERE c.kind = 'create' AND c.channel_id = ? AND c.message_id > ? AND l.kind != 'delete' "
+            "ORDER BY c.message_id LIMIT ?",
+            (channel_id, after_id, PAGE_SIZE),
+        )
+
+    async def entries(self, channel_id, after_id=0):
+        """Yield the current state of archived messages in a channel, oldest first, a page at a time."""
+        while True:
+            rows = await self.db.run(self._page, channel_id, after_id)
+            for message_id, created_at, author, content, attachments in rows:
+                yield TranscriptEntry(
+                    id=message_id,
+                    created_at=datetime.datetime.fromtimestamp(created_at, tz=datetime.timezone.utc),
+                    author=author,
+                    content=content,
+                    attachments=json.loads(attachments),
+                )
+            if len(rows) < PAGE_SIZE:
+                return
+            after_id = rows[-1][0]
+
@@ -0,0 +1,56 @@
+from config import PRIVILEGED_ROLE_NAMES
+
+PRIVILEGED_ROLES_KEY = "privileged_role_ids"
+
+
+class PermissionEngine:
+    """Keeps a frozenset of privileged role IDs per guild so access checks are one set intersection."""
+
+    def __init__(self, settings, role_names=PRIVILEGED_ROLE_NAMES):
+        self.settings = settings
+        self.role_names = frozenset(role_names)
+        self._roles = {}
+
+    def privileged_roles(self, guild_id):
+        return self._roles.get(guild_id, frozenset())
+
+    async def rebuild(self, guild):
+        """Load the stored role IDs, seeding them from the privileged role names the first time."""
+        role_ids = self.settings.get(guild.id, PRIVILEGED_ROLES_KEY)
+        if role_ids is None:
+            role_ids = [role.id for role in guild.roles if role.name in self.role_names]
+        # Drop roles that were deleted while the bot was offline
+        await self._store(guild.id, {role_id for role_id in role_ids if guild.get_role(role_id)})
+
+    async def _store(self, guild_id, role_ids):
+        role_ids = frozenset(role_ids)
+        self._roles[guild_id] = role_ids
+        # Persist the IDs so a later rename of the role does not take access away
+        stored = self.settings.get(guild_id, PRIVILEGED_ROLES_KEY)
+        if stored is None or set(stored) != role_ids:
+            await self.settings.set(guild_id, PRIVILEGED_ROLES_KEY, sorted(role_ids))
+
+    async def grant(self, role):
+        await self._store(role.guild.id, self.privileged_roles(role.guild.id) | {role.id})
+
+    async def revoke(self, role):
+        await self._store(role.guild.id, self.privileged_roles(role.guild.id) - {role.id})
+
+    async def role_changed(self, role, before=None):
+        """Pick up roles that are created (before is None) or renamed to a privileged name.
+
+        Other updates, like the position shuffles Discord sends when roles are added or moved,
+        leave access alone, so a role revoked with /ticket_access stays revoked.
+        """
+        if before is not None and before.name == role.name:
+            return
+        if role.name in self.role_names and role.id not in self.privileged_roles(role.guild.id):
+            await self.grant(role)
+
+    def is_privileged(self, member):
+        # Users outside a guild (or without member data) carry no roles
+        role_ids = getattr(member, "_roles", None)
+        guild = getattr(member, "guild", None)
+        if not role_ids or guild is None:
+            return False
+        return not self.privileged_roles(guild.id).isdisjoint(role_ids)
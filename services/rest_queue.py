@@ -0,0 +1,172 @@
+import asyncio
+import collections
+import heapq
+import itertools
+import logging
+import re
+import time
+
+from config import GUILD_REST_CONCURRENCY, COSMETIC_RATE, COSMETIC_BURST
+
+# Priority classes, most urgent first
+INTERACTIVE = 0
+STATE_CHANGE = 1
+COSMETIC = 2
+
+MAJOR_PARAMETER = re.compile(r"/(channels|guilds|webhooks)/(\d+)")
+SNOWFLAKE = re.compile(r"/\d{15,}(?=/|$)")
+TOKEN = re.compile(r"/[\w.-]{60,}(?=/|$)")
+
+
+def route_key(url):
+    """Reduce a request URL to the resource its rate limit is keyed on, e.g. ("channels", 123)."""
+    match = MAJOR_PARAMETER.search(url)
+    return (match.group(1), int(match.group(2))) if match else None
+
+
+def endpoint_label(method, url):
+    """Reduce a request URL to a low-cardinality label such as "POST /channels/{id}/messages"."""
+    path = url.split("/api/v", 1)[-1].split("?", 1)[0]
+    path = path[path.find("/"):] if "/" in path else path
+    return f"{method} {TOKEN.sub('/{token}', SNOWFLAKE.sub('/{id}', path))}"
+
+
+class TokenBucket:
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def take(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+
+class GuildBudget:
+    """Concurrency slots, waiting work and the cosmetic token bucket of one guild."""
+
+    def __init__(self):
+        self.active = 0
+        self.waiting = []
+        self.cosmetic = TokenBucket(COSMETIC_RATE, COSMETIC_BURST)
+
+
+class RateLimitListener(logging.Handler):
+    """Feeds the 429 warnings logged by discord.py's HTTP client back into the queue."""
+
+    def __init__(self, queue):
+        super().__init__(logging.WARNING)
+        self.queue = queue
+
+    def emit(self, record):
+        try:
+            if record.msg.startswith("We are being rate limited") and len(record.args) >= 3:
+                method, url, retry_after = record.args[:3]
+                self.queue.note_rate_limit(
+                    route_key(str(url)), float(retry_after), endpoint_label(str(method), str(url))
+                )
+            elif record.msg.startswith("Global rate limit has been hit") and record.args:
+                self.queue.note_rate_limit(None, float(record.args[0]))
+        except Exception:
+            self.handleError(record)
+
+
+class RestQueue:
+    """Per-guild priority queue for outbound REST work: interactive > state change > cosmetic."""
+
+    def __init__(self, concurrency=GUILD_REST_CONCURRENCY):
+        self.concurrency = concurrency
+        self._budgets = {}
+        self._seq = itertools.count()
+        self._cooldowns = {}
+        self._global_cooldown = 0.0
+        self._listener = RateLimitListener(self)
+        self.dropped = 0
+        self.rate_limits = 0
+        self.rate_limited_endpoints = collections.Counter()
+
+    def install(self):
+        logging.getLogger("discord.http").addHandler(self._listener)
+
+    def uninstall(self):
+        logging.getLogger("discord.http").removeHandler(self._listener)
+
+    def _budget(self, guild_id):
+        budget = self._budgets.get(guild_id)
+        if budget is None:
+            budget = self._budgets[guild_id] = GuildBudget()
+        return budget
+
+    def note_rate_limit(self, route, retry_after, endpoint="global"):
+        """Record a 429 on a route (or globally when route is None) so cosmetic work stays off it."""
+        self.rate_limits += 1
+        self.rate_limited_endpoints[endpoint] += 1
+        until = time.monotonic() + retry_after
+        if route is None:
+            self._global_cooldown = max(self._global_cooldown, until)
+        else:
+            self._cooldowns[route] = max(self._cooldowns.get(route, 0.0), until)
+
+    def is_throttled(self, route=None):
+        now = time.monotonic()
+        if now < self._global_cooldown:
+            return True
+        if route is None:
+            return False
+        until = self._cooldowns.get(route)
+        if until is None:
+            return False
+        if now >= until:
+            del self._cooldowns[route]
+            return False
+        return True
+
+    def queued(self, guild_id):
+        budget = self._budgets.get(guild_id)
+        return len(budget.waiting) if budget else 0
+
+    async def submit(self, guild_id, priority, factory, route=None):
+        """Run factory() once the guild has a free slot, in priority order.
+
+        Cosmetic work is dropped (returning None) while its route is rate limited, while other work
+        is waiting in the guild, or when the guild's cosmetic budget is spent.
+        """
+        budget = self._budget(guild_id)
+        if priority >= COSMETIC and (
+            self.is_throttled(route) or budget.waiting or not budget.cosmetic.take()
+        ):
+            self.dropped += 1
+            return None
+
+        if budget.active >= self.concurrency or budget.waiting:
+            waiter = asyncio.get_running_loop().create_future()
+            heapq.heappush(budget.waiting, (priority, next(self._seq), waiter))
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                # The slot may have been handed to us just before the cancellation
+                if waiter.done() and not waiter.cancelled():
+                    self._release(budget)
+                raise
+        else:
+            budget.active += 1
+
+        try:
+            return await factory()
+        finally:
+            self._release(budget)
+
+    def _release(self, budget):
+        while budget.waiting:
+            _, _, waiter = heapq.heappop(budget.waiting)
+            if not waiter.done():
+                # Hand the slot straight to the most urgent waiter
+                waiter.set_result(None)
+                return
+        budget.active -= 1
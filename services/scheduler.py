@@ -0,0 +1,205 @@
+import asyncio
+import heapq
+import itertools
+import time
+from collections import defaultdict
+
+import discord
+
+from services.rest_queue import COSMETIC
+
+# Discord only bulk-deletes messages younger than 14 days, 100 at a time
+BULK_DELETE_MAX_AGE = 14 * 24 * 60 * 60 - 60
+BULK_DELETE_LIMIT = 100
+# Actions due within this many seconds of each other run in the same batch
+BATCH_WINDOW = 1.0
+# How long deletions wait before retrying a rate-limited channel
+THROTTLE_BACKOFF = 30.0
+
+
+class ActionScheduler:
+    """Runs delayed message deletions from one timer task instead of one sleeping coroutine each."""
+
+    def __init__(self, bot, db, rest_queue=None):
+        self.bot = bot
+        self.db = db
+        self.rest_queue = rest_queue
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS scheduled_deletions ("
+            "channel_id INTEGER NOT NULL, message_id INTEGER NOT NULL, due_at REAL NOT NULL, "
+            "PRIMARY KEY (channel_id, message_id))"
+        )
+        self._heap = []
+        self._seq = itertools.count()
+        self._wake = asyncio.Event()
+        self._task = None
+
+    def start(self):
+        """Load deletions persisted by a previous run and start the timer.
+
+        Call this once the channel cache is filled (on_ready). Rows of channels this process cannot
+        see belong to another cluster, or to a channel that is gone, and stay persisted.
+        """
+        if self._task is not None:
+            return
+        queued = {action[1:] for _, _, action in self._heap if action[0] == "channel"}
+        for channel_id, message_id, due_at in self.db.execute(
+            "SELECT channel_id, message_id, due_at FROM scheduled_deletions"
+        ):
+            if self.bot.get_channel(channel_id) is not None and (channel_id, message_id) not in queued:
+                self._push(due_at, ("channel", channel_id, message_id))
+        self._task = asyncio.create_task(self._run())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def forget_channel(self, channel_id):
+        """Drop the persisted deletions of a deleted channel."""
+        await self.db.run(self.db.execute, "DELETE FROM scheduled_deletions WHERE channel_id = ?", (channel_id,))
+
+    def __len__(self):
+        return len(self._heap)
+
+    def _push(self, due_at, action):
+        heapq.heappush(self._heap, (due_at, next(self._seq), action))
+        # Only wake the timer if this action is now the earliest one
+        if self._heap[0][2] is action:
+            self._wake.set()
+
+    async def delete_later(self, message, delay):
+        """Delete a message after delay seconds."""
+        due_at = time.time() + delay
+        if isinstance(message, discord.WebhookMessage):
+            # Interaction follow-ups are deleted through the interaction token, which expires
+            # after 15 minutes, so there is nothing useful to persist for them
+            self._push(due_at, ("followup", message))
+            return
+        await self.db.run(
+            self.db.execute,
+            "INSERT OR REPLACE INTO scheduled_deletions (channel_id, message_id, due_at) VALUES (?, ?, ?)",
+            (message.channel.id, message.id, due_at),
+        )
+        self._push(due_at, ("channel", message.channel.id, message.id))
+
+    async def _run(self):
+        while True:
+            if not self._heap:
+                await self._wake.wait()
+                self._wake.clear()
+                continue
+
+            delay = self._heap[0][0] - time.time()
+            if delay > 0:
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+                self._wake.clear()
+                continue
+
+            horizon = time.time() + BATCH_WINDOW
+            due = []
+            while self._heap and self._heap[0][0] <= horizon:
+                due.append(heapq.heappop(self._heap)[2])
+            try:
+                await self._execute(due)
+            except Exception as e:
+                print(f"Error running scheduled deletions: {e}")
+
+    async def _execute(self, actions):
+        by_channel = defaultdict(list)
+        followups = []
+        for action in actions:
+            if action[0] == "channel":
+                by_channel[action[1]].append(action[2])
+            else:
+                followups.append(action[1])
+
+        channels = list(by_channel.items())
+        results = await asyncio.gather(
+            *(self._delete_from_channel(channel_id, message_ids) for channel_id, message_ids in channels),
+            *(self._delete_followup(message) for message in followups),
+            return_exceptions=True,
+        )
+        # Only deleted (or already gone) messages are forgotten; deferred and failed ones stay persisted
+        await self.db.run(
+            self.db.executemany,
+            "DELETE FROM scheduled_deletions WHERE channel_id = ? AND message_id = ?",
+            [
+                (channel_id, message_id)
+                for (channel_id, _), result in zip(channels, results) if isinstance(result, list)
+                for message_id in result
+            ],
+        )
+
+    async def _delete_followup(self, message):
+        try:
+            await message.delete()
+        except discord.HTTPException:
+            pass
+
+    async def _delete_from_channel(self, channel_id, message_ids):
+        """Delete messages from one channel and return the IDs that no longer exist.
+
+        A channel missing from the cache is left alone: after a reconnect or in another cluster
+        it may still exist, and its rows are picked up again on the next start.
+        """
+        channel = self.bot.get_channel(channel_id)
+        if channel is None:
+            return []
+
+        if self.rest_queue is None:
+            return await self._delete_messages(channel, message_ids)
+
+        route = ("channels", channel_id)
+        done = None
+        if not self.rest_queue.is_throttled(route):
+            done = await self.rest_queue.submit(
+                channel.guild.id, COSMETIC, lambda: self._delete_messages(channel, message_ids), route=route
+            )
+        if done is not None:
+            return done
+
+        # Cleanup is the least urgent traffic; back off instead of competing with tickets or adding to the 429s
+        due_at = time.time() + THROTTLE_BACKOFF
+        for message_id in message_ids:
+            self._push(due_at, ("channel", channel_id, message_id))
+        return []
+
+    async def _delete_messages(self, channel, message_ids):
+        channel_id = channel.id
+        cutoff = time.time() - BULK_DELETE_MAX_AGE
+        bulk = [m for m in message_ids if discord.utils.snowflake_time(m).timestamp() > cutoff]
+        single = [m for m in message_ids if m not in bulk]
+        if len(bulk) < 2:
+            single.extend(bulk)
+            bulk = []
+
+        done = []
+        for start in range(0, len(bulk), BULK_DELETE_LIMIT):
+            chunk = bulk[start:start + BULK_DELETE_LIMIT]
+            if len(chunk) < 2:
+                single.extend(chunk)
+                continue
+            try:
+                await channel.delete_messages([discord.Object(id=m) for m in chunk])
+                done.extend(chunk)
+            except discord.Forbidden:
+                # Bulk delete needs Manage Messages; the bot can still delete its own messages one by one
+                single.extend(chunk)
+            except discord.HTTPException as e:
+                print(f"Failed to bulk delete {len(chunk)} message(s) in {channel_id}, retrying one by one: {e}")
+                single.extend(chunk)
+
+        for message_id in single:
+            try:
+                await channel.get_partial_message(message_id).delete()
+            except discord.NotFound:
+                pass
+            except discord.HTTPException as e:
+                print(f"Failed to delete message {message_id} in {channel_id}: {e}")
+                continue
+            done.append(message_id)
+        return done
@@ -0,0 +1,24 @@
+import asyncio
+
+
+class SingleFlight:
+    """Run at most one coroutine per key and share its result with concurrent callers."""
+
+    def __init__(self):
+        self._calls = {}
+        self.coalesced = 0
+
+    def in_flight(self, key):
+        return key in self._calls
+
+    async def run(self, key, factory):
+        """Await the in-flight call for key, or start one with factory() if there is none."""
+        task = self._calls.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            task = asyncio.ensure_future(factory())
+            self._calls[key] = task
+            task.add_done_callback(lambda _: self._calls.pop(key, None))
+        # Shield so one caller giving up does not cancel the work for everyone else
+        return await asyncio.shield(task)
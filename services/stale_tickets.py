@@ -0,0 +1,196 @@
+import asyncio
+import heapq
+import itertools
+import time
+
+from services.ticket_archive import last_activity
+
+CLOSE_AFTER_KEY = "stale:close_after"
+WARN_BEFORE_KEY = "stale:warn_before"
+
+
+class StaleTicket:
+    __slots__ = ("guild_id", "last_activity", "warned_until", "due")
+
+    def __init__(self, guild_id, last_activity):
+        self.guild_id = guild_id
+        self.last_activity = last_activity
+        self.warned_until = None    # the close time announced in the warning, once one was sent
+        self.due = None             # when this ticket's heap entry fires, or None when it has none
+
+    def closes_at(self, close_after):
+        closes_at = self.last_activity + close_after
+        # A warned ticket always gets the full warning period, even if it was idle for longer
+        return max(closes_at, self.warned_until) if self.warned_until else closes_at
+
+
+class StaleTicketSweeper:
+    """Closes open tickets nobody has written in for a while, optionally warning first.
+
+    Last activity is kept in memory per open ticket and updated from messages. A single timer
+    task sleeps until the earliest deadline in a heap. New messages only move last_activity
+    forward; a ticket's heap entry is re-pushed when it fires early, so busy tickets do not
+    grow the heap.
+    """
+
+    def __init__(self, settings, ticket_index, warn, close, close_after, warn_before, concurrency):
+        self.settings = settings
+        self.ticket_index = ticket_index
+        self._warn = warn
+        self._close = close
+        self.close_after = close_after
+        self.warn_before = warn_before
+        self._tickets = {}
+        self._heap = []
+        self._seq = itertools.count()
+        self._wake = asyncio.Event()
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._task = None
+        self._jobs = set()
+        self.closed = 0
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        for job in self._jobs:
+            job.cancel()
+        self._jobs.clear()
+
+    def limits(self, guild_id):
+        """Return (close_after, warn_before) in seconds for a guild; close_after 0 means never."""
+        close_after = self.settings.get(guild_id, CLOSE_AFTER_KEY, self.close_after)
+        warn_before = self.settings.get(guild_id, WARN_BEFORE_KEY, self.warn_before)
+        return close_after, warn_before
+
+    async def configure(self, guild_id, close_after, warn_before):
+        await self.settings.set(guild_id, CLOSE_AFTER_KEY, close_after)
+        await self.settings.set(guild_id, WARN_BEFORE_KEY, warn_before)
+        for channel_id, ticket in self._tickets.items():
+            if ticket.guild_id == guild_id:
+                self._schedule(channel_id, ticket)
+
+    def rebuild(self, guild):
+        """Track every open ticket of a guild, taking last activity from each channel's newest message.
+
+        Runs on every on_ready. Tickets already tracked keep their state, so a reconnect neither
+        warns them again nor pushes back a close that was announced.
+        """
+        open_ids = set()
+        for channel_id in self.ticket_index.channel_ids(guild.id, "open"):
+            channel = guild.get_channel(channel_id)
+            if channel is None:
+                continue
+            open_ids.add(channel_id)
+            # The newest message may be the bot's own warning, so it cannot refresh a tracked ticket
+            if channel_id not in self._tickets:
+                self._track(channel_id, guild.id, last_activity(channel))
+        for channel_id in [c for c, ticket in self._tickets.items() if ticket.guild_id == guild.id and c not in open_ids]:
+            del self._tickets[channel_id]
+
+    def observe(self, channel):
+        """Start or stop tracking a channel after it was created or moved, e.g. on close or reopen."""
+        entry = self.ticket_index.ticket_entry(channel.guild.id, channel.id)
+        if entry is None or entry[2] != "open":
+            self.forget(channel.id)
+        elif channel.id not in self._tickets:
+            # Just opened or reopened: the idle clock starts now, not at the last message
+            self._track(channel.id, channel.guild.id, time.time())
+
+    def touch(self, channel, at=None):
+        ticket = self._tickets.get(channel.id)
+        if ticket is not None:
+            ticket.last_activity = max(ticket.last_activity, at or time.time())
+            ticket.warned_until = None
+
+    def forget(self, channel_id):
+        self._tickets.pop(channel_id, None)
+
+    def forget_guild(self, guild_id):
+        for channel_id in [c for c, ticket in self._tickets.items() if ticket.guild_id == guild_id]:
+            del self._tickets[channel_id]
+
+    def __len__(self):
+        return len(self._tickets)
+
+    def _track(self, channel_id, guild_id, at):
+        ticket = self._tickets[channel_id] = StaleTicket(guild_id, at)
+        self._schedule(channel_id, ticket)
+
+    def _next_deadline(self, ticket):
+        close_after, warn_before = self.limits(ticket.guild_id)
+        if not close_after:
+            return None
+        closes_at = ticket.closes_at(close_after)
+        if warn_before and not ticket.warned_until:
+            return max(ticket.last_activity, closes_at - warn_before)
+        return closes_at
+
+    def _schedule(self, channel_id, ticket):
+        due = self._next_deadline(ticket)
+        if due is None or (ticket.due is not None and ticket.due <= due):
+            return
+        ticket.due = due
+        heapq.heappush(self._heap, (due, next(self._seq), channel_id))
+        if self._heap[0][2] == channel_id:
+            self._wake.set()
+
+    async def _run(self):
+        while True:
+            if not self._heap:
+                await self._wake.wait()
+                self._wake.clear()
+                continue
+
+            delay = self._heap[0][0] - time.time()
+            if delay > 0:
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+                self._wake.clear()
+                continue
+
+            due, _, channel_id = heapq.heappop(self._heap)
+            ticket = self._tickets.get(channel_id)
+            if ticket is None or ticket.due != due:
+                # Forgotten, or superseded by an earlier entry
+                continue
+            ticket.due = None
+            self._fire(channel_id, ticket)
+
+    def _fire(self, channel_id, ticket):
+        now = time.time()
+        close_after, warn_before = self.limits(ticket.guild_id)
+        if not close_after:
+            return
+        closes_at = ticket.closes_at(close_after)
+        if now < closes_at and (ticket.warned_until or not warn_before or now < closes_at - warn_before):
+            # Someone wrote since this was scheduled
+            self._schedule(channel_id, ticket)
+            return
+
+        if warn_before and not ticket.warned_until:
+            ticket.warned_until = max(closes_at, now + warn_before)
+            self._spawn(self._warn, channel_id, ticket.guild_id, ticket.warned_until)
+            self._schedule(channel_id, ticket)
+        else:
+            self.forget(channel_id)
+            self._spawn(self._close, channel_id, ticket.guild_id)
+
+    def _spawn(self, action, channel_id, guild_id, *args):
+        async def run():
+            async with self._semaphore:
+                try:
+                    if await action(channel_id, guild_id, *args) and action is self._close:
+                        self.closed += 1
+                except Exception as e:
+                    print(f"Failed to {action.__name__} stale ticket {channel_id}: {e}")
+
+        job = asyncio.create_task(run())
+        self._jobs.add(job)
+        job.add_done_callback(self._jobs.discard)
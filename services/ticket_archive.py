@@ -0,0 +1,194 @@
+import asyncio
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+from collections import namedtuple
+
+import discord
+
+ArchivedTicket = namedtuple(
+    "ArchivedTicket",
+    "channel_id guild_id number name owner_ids message_count opened_at closed_at archived_at digest size",
+)
+
+CHUNK_SIZE = 1 << 20
+
+
+def last_activity(channel):
+    """Timestamp of the newest message in a channel, or of the channel itself when it has none."""
+    if channel.last_message_id:
+        return discord.utils.snowflake_time(channel.last_message_id).timestamp()
+    return channel.created_at.timestamp()
+
+
+class TicketArchive:
+    """Content-addressed store of gzipped ticket transcripts, indexed in SQLite.
+
+    Each transcript is stored once under the SHA-256 of its text, so archiving the same
+    ticket twice (e.g. after a failed channel deletion) costs no extra space.
+    """
+
+    def __init__(self, db, directory):
+        self.db = db
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS archived_tickets (
+                channel_id INTEGER PRIMARY KEY,
+                guild_id INTEGER NOT NULL,
+                number INTEGER,
+                name TEXT NOT NULL,
+                owner_ids TEXT NOT NULL,
+                message_count INTEGER NOT NULL,
+                opened_at REAL NOT NULL,
+                closed_at REAL NOT NULL,
+                archived_at REAL NOT NULL,
+                digest TEXT NOT NULL,
+                size INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS archived_tickets_number ON archived_tickets (guild_id, number);
+            """
+        )
+
+    def path(self, digest):
+        return os.path.join(self.directory, digest[:2], f"{digest}.txt.gz")
+
+    def _write(self, fp):
+        fp.seek(0)
+        sha = hashlib.sha256()
+        for chunk in iter(lambda: fp.read(CHUNK_SIZE), b""):
+            sha.update(chunk)
+        digest = sha.hexdigest()
+        path = self.path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fp.seek(0)
+            with tempfile.NamedTemporaryFile(dir=os.path.dirname(path), delete=False) as out:
+                # mtime=0 keeps the output identical for identical text
+                with gzip.GzipFile(filename="", mode="wb", fileobj=out, mtime=0) as stream:
+                    shutil.copyfileobj(fp, stream, CHUNK_SIZE)
+            os.replace(out.name, path)
+        return digest, os.path.getsize(path)
+
+    def _record(self, ticket):
+        self.db.execute(
+            "INSERT OR REPLACE INTO archived_tickets "
+            "(channel_id, guild_id, number, name, owner_ids, message_count, opened_at, closed_at, archived_at, digest, size) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (*ticket[:4], json.dumps(ticket.owner_ids), *ticket[5:]),
+        )
+
+    async def store(self, channel, number, owner_ids, export, opened_at=None):
+        """Write an uncompressed transcript export to the archive and index it under the channel.
+
+        opened_at defaults to the channel's creation, which is too early for a claimed warm pool channel.
+        """
+        digest, size = await asyncio.to_thread(self._write, export.fp)
+        ticket = ArchivedTicket(
+            channel_id=channel.id,
+            guild_id=channel.guild.id,
+            number=number,
+            name=channel.name,
+            owner_ids=list(owner_ids),
+            message_count=export.message_count,
+            opened_at=opened_at or channel.created_at.timestamp(),
+            closed_at=last_activity(channel),
+            archived_at=time.time(),
+            digest=digest,
+            size=size,
+        )
+        await self.db.run(self._record, ticket)
+        return ticket
+
+    def _find(self, guild_id, number):
+        rows = self.db.execute(
+            "SELECT channel_id, guild_id, number, name, owner_ids, message_count, opened_at, closed_at, "
+            "archived_at, digest, size FROM archived_tickets WHERE guild_id = ? AND number = ? "
+            "ORDER BY archived_at DESC LIMIT 1",
+            (guild_id, number),
+        )
+        if not rows:
+            return None
+        row = rows[0]
+        return ArchivedTicket(*row[:4], json.loads(row[4]), *row[5:])
+
+    async def find(self, guild_id, number):
+        return await self.db.run(self._find, guild_id, number)
+
+    def to_file(self, ticket):
+        return discord.File(self.path(ticket.digest), filename=f"{ticket.name}.txt.gz")
+
+
+class TicketArchiver:
+    """Periodically archives closed tickets that have been idle for longer than max_age.
+
+    archive_ticket(channel) does the work for one ticket; this class only decides which
+    tickets are due and how many are archived at once.
+    """
+
+    def __init__(self, bot, ticket_index, archive_ticket, max_age, interval, concurrency, batch_size):
+        self.bot = bot
+        self.ticket_index = ticket_index
+        self._archive_ticket = archive_ticket
+        self.max_age = max_age
+        self.interval = interval
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+        self.archived = 0
+        self._task = None
+
+    def __bool__(self):
+        return self.max_age > 0
+
+    def start(self):
+        if self and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def due(self, now=None):
+        """Return closed ticket channels idle for at least max_age, oldest first, at most batch_size."""
+        cutoff = (now or time.time()) - self.max_age
+        channels = []
+        for guild in self.bot.guilds:
+            for channel_id in self.ticket_index.channel_ids(guild.id, "closed"):
+                channel = guild.get_channel(channel_id)
+                if channel is not None and last_activity(channel) <= cutoff:
+                    channels.append(channel)
+        channels.sort(key=last_activity)
+        return channels[:self.batch_size]
+
+    async def run_once(self):
+        """Archive one batch and return how many tickets were archived."""
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def archive(channel):
+            async with semaphore:
+                try:
+                    await self._archive_ticket(channel)
+                except Exception as e:
+                    print(f"Failed to archive {channel.name} in {channel.guild.name}: {e}")
+                    return False
+                return True
+
+        results = await asyncio.gather(*(archive(channel) for channel in self.due()))
+        archived = sum(results)
+        self.archived += archived
+        return archived
+
+    async def _run(self):
+        while True:
+            archived = await self.run_once()
+            if archived:
+                print(f"Archived {archived} closed ticket(s).")
+            # A full batch means there is probably more waiting
+            if archived < self.batch_size:
+                await asyncio.sleep(self.interval)
@@ -0,0 +1,38 @@
+import asyncio
+from collections import defaultdict
+
+
+class TicketCounter:
+    """Persistent, monotonic ticket number allocator with one counter per guild."""
+
+    def __init__(self, db):
+        self.db = db
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS ticket_counters ("
+            "guild_id INTEGER PRIMARY KEY, last_number INTEGER NOT NULL)"
+        )
+        self._last = dict(self.db.execute("SELECT guild_id, last_number FROM ticket_counters"))
+        self._locks = defaultdict(asyncio.Lock)
+
+    def _store(self, guild_id, number):
+        self.db.execute(
+            "INSERT INTO ticket_counters (guild_id, last_number) VALUES (?, ?) "
+            "ON CONFLICT(guild_id) DO UPDATE SET last_number = MAX(last_number, excluded.last_number)",
+            (guild_id, number),
+        )
+
+    async def seed(self, guild_id, highest):
+        """Raise the counter to at least the highest ticket number already in use."""
+        async with self._locks[guild_id]:
+            if self._last.get(guild_id, 0) >= highest:
+                return
+            await self.db.run(self._store, guild_id, highest)
+            self._last[guild_id] = highest
+
+    async def allocate(self, guild_id, floor=0):
+        """Reserve and return the next ticket number for a guild."""
+        async with self._locks[guild_id]:
+            number = max(self._last.get(guild_id, 0), floor) + 1
+            await self.db.run(self._store, guild_id, number)
+            self._last[guild_id] = number
+            return number
@@ -0,0 +1,159 @@
+import re
+from collections import defaultdict
+
+import discord
+
+from config import TICKET_CATEGORY_NAME, CLOSED_CATEGORY_NAME
+
+TICKET_NAME_PATTERN = re.compile(r"^ticket-(\d+)(?:-|$)")
+
+
+def parse_ticket_number(name):
+    """Return the number encoded in a ticket channel name, or None."""
+    match = TICKET_NAME_PATTERN.match(name)
+    return int(match.group(1)) if match else None
+
+
+def category_state(category):
+    """Return "open" or "closed" for ticket categories and None for anything else."""
+    if category is None:
+        return None
+    if category.name == TICKET_CATEGORY_NAME:
+        return "open"
+    if category.name == CLOSED_CATEGORY_NAME:
+        return "closed"
+    return None
+
+
+class GuildTicketIndex:
+    """Lookup tables for the ticket channels of a single guild."""
+
+    def __init__(self, category_state=category_state):
+        self.category_state = category_state
+        self.owners = {}                    # owner id -> open ticket channel id
+        self.numbers = {}                   # ticket number -> channel id
+        self.categories = defaultdict(set)  # category id -> ticket channel ids
+        self.channels = {}                  # channel id -> (number, category id, state, owner ids)
+        self.highest_number = 0
+
+    def add(self, channel):
+        """Index a channel if it is a ticket, replacing any previous entry for it."""
+        self.discard(channel.id)
+        if not isinstance(channel, discord.TextChannel):
+            return
+
+        state = self.category_state(channel.category)
+        number = parse_ticket_number(channel.name)
+        if state is None or number is None:
+            return
+
+        # Closing a ticket only takes send_messages away, so owners are the members who can view it
+        owner_ids = tuple(
+            target.id for target, perms in channel.overwrites.items()
+            if not isinstance(target, discord.Role) and perms.view_channel
+        )
+
+        self.channels[channel.id] = (number, channel.category_id, state, owner_ids)
+        self.numbers[number] = channel.id
+        self.categories[channel.category_id].add(channel.id)
+        if state == "open":
+            for owner_id in owner_ids:
+                self.owners[owner_id] = channel.id
+        self.highest_number = max(self.highest_number, number)
+
+    def discard(self, channel_id):
+        """Drop a channel from every lookup table."""
+        entry = self.channels.pop(channel_id, None)
+        if entry is None:
+            return
+
+        number, category_id, _, owner_ids = entry
+        if self.numbers.get(number) == channel_id:
+            del self.numbers[number]
+        tickets = self.categories.get(category_id)
+        if tickets is not None:
+            tickets.discard(channel_id)
+            if not tickets:
+                del self.categories[category_id]
+        for owner_id in owner_ids:
+            if self.owners.get(owner_id) == channel_id:
+                del self.owners[owner_id]
+
+
+class TicketIndex:
+    """Per-guild ticket index built once at startup and kept current from channel events."""
+
+    def __init__(self, category_state=category_state):
+        self.category_state = category_state
+        self._guilds = {}
+
+    def guild(self, guild_id):
+        """Return the index for a guild, creating an empty one if needed."""
+        index = self._guilds.get(guild_id)
+        if index is None:
+            index = self._guilds[guild_id] = GuildTicketIndex(self.category_state)
+        return index
+
+    def rebuild(self, guild):
+        """Index every ticket channel of a guild from the local channel cache."""
+        index = GuildTicketIndex(self.category_state)
+        for channel in guild.channels:
+            index.add(channel)
+        self._guilds[guild.id] = index
+        return index
+
+    def forget_guild(self, guild_id):
+        self._guilds.pop(guild_id, None)
+
+    def upsert(self, channel):
+        self.guild(channel.guild.id).add(channel)
+
+    def remove(self, channel):
+        self.guild(channel.guild.id).discard(channel.id)
+
+    def is_ticket(self, channel):
+        return self.is_ticket_id(channel.guild.id, channel.id)
+
+    def is_ticket_id(self, guild_id, channel_id):
+        index = self._guilds.get(guild_id)
+        return index is not None and channel_id in index.channels
+
+    def open_ticket_for(self, guild, member_id):
+        """Return the open ticket channel owned by a member, or None."""
+        index = self.guild(guild.id)
+        channel_id = index.owners.get(member_id)
+        if channel_id is None:
+            return None
+        channel = guild.get_channel(channel_id)
+        if channel is None:
+            index.discard(channel_id)
+        return channel
+
+    def ticket_by_number(self, guild, number):
+        channel_id = self.guild(guild.id).numbers.get(number)
+        return guild.get_channel(channel_id) if channel_id is not None else None
+
+    def channel_ids(self, guild_id, state=None):
+        """Return the guild's ticket channel IDs, optionally only those in state ("open" or "closed")."""
+        index = self._guilds.get(guild_id)
+        if index is None:
+            return []
+        return [channel_id for channel_id, entry in index.channels.items() if state is None or entry[2] == state]
+
+    def ticket_entry(self, guild_id, channel_id):
+        """Return (number, category id, state, owner ids) for an indexed ticket, or None."""
+        index = self._guilds.get(guild_id)
+        return index.channels.get(channel_id) if index is not None else None
+
+    def tickets_in_category(self, guild_id, category_id):
+        return frozenset(self.guild(guild_id).categories.get(category_id, ()))
+
+    def highest_number(self, guild_id):
+        return self.guild(guild_id).highest_number
+
+    def open_counts(self):
+        """Return {guild id: number of open tickets} for every indexed guild."""
+        return {
+            guild_id: sum(1 for entry in index.channels.values() if entry[2] == "open")
+            for guild_id, index in self._guilds.items()
+        }
@@ -0,0 +1,33 @@
+import time
+
+
+class TicketOpenTimes:
+    """When each ticket was opened, which for a claimed warm pool channel is later than its creation.
+
+    Kept in memory for the synchronous bulk command filters and persisted across restarts. Tickets
+    opened before this was recorded fall back to their channel's creation time.
+    """
+
+    def __init__(self, db):
+        self.db = db
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS ticket_open_times ("
+            "channel_id INTEGER PRIMARY KEY, guild_id INTEGER NOT NULL, opened_at REAL NOT NULL)"
+        )
+        self._times = dict(self.db.execute("SELECT channel_id, opened_at FROM ticket_open_times"))
+
+    def get(self, channel):
+        opened_at = self._times.get(channel.id)
+        return opened_at if opened_at is not None else channel.created_at.timestamp()
+
+    async def record(self, channel):
+        opened_at = self._times[channel.id] = time.time()
+        await self.db.run(
+            self.db.execute,
+            "INSERT OR REPLACE INTO ticket_open_times (channel_id, guild_id, opened_at) VALUES (?, ?, ?)",
+            (channel.id, channel.guild.id, opened_at),
+        )
+
+    async def forget(self, channel_id):
+        if self._times.pop(channel_id, None) is not None:
+            await self.db.run(self.db.execute, "DELETE FROM ticket_open_times WHERE channel_id = ?", (channel_id,))
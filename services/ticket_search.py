@@ -0,0 +1,150 @@
+import json
+from collections import namedtuple
+
+SearchTicket = namedtuple("SearchTicket", "channel_id guild_id number name owner_ids opened_at closed_at")
+SearchResult = namedtuple(
+    "SearchResult", "channel_id number name owner_ids issue opened_at closed_at message_id created_at snippet"
+)
+
+INSERT_BATCH = 500
+# Matching messages considered per search before grouping them by ticket
+CANDIDATES = 500
+
+
+def match_expression(query):
+    """Turn free text into an FTS5 expression that matches every word, without exposing FTS syntax."""
+    terms = [term.replace('"', '""') for term in query.split()]
+    return " ".join(f'"{term}"' for term in terms if term)
+
+
+class TicketSearch:
+    """SQLite FTS5 index of ticket transcripts, one row per message, scoped by guild.
+
+    Rows are keyed by message ID, and the guild and ticket channel IDs are indexed as tokens,
+    so scoping a search to a guild or clearing a ticket goes through the full-text index
+    instead of scanning the table.
+    """
+
+    def __init__(self, db):
+        self.db = db
+        self.db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS search_tickets (
+                channel_id INTEGER PRIMARY KEY,
+                guild_id INTEGER NOT NULL,
+                number INTEGER,
+                name TEXT NOT NULL,
+                owner_ids TEXT NOT NULL DEFAULT '[]',
+                issue TEXT,
+                opened_at REAL,
+                closed_at REAL
+            );
+            CREATE INDEX IF NOT EXISTS search_tickets_guild ON search_tickets (guild_id);
+            CREATE VIRTUAL TABLE IF NOT EXISTS search_messages USING fts5(
+                content,
+                author,
+                guild,
+                ticket,
+                created_at UNINDEXED,
+                tokenize = 'unicode61 remove_diacritics 2'
+            );
+            """
+        )
+
+    def _save_ticket(self, ticket):
+        self.db.execute(
+            "INSERT INTO search_tickets (channel_id, guild_id, number, name, owner_ids, opened_at, closed_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?) ON CONFLICT(channel_id) DO UPDATE SET "
+            "number = excluded.number, name = excluded.name, owner_ids = excluded.owner_ids, "
+            "opened_at = excluded.opened_at, closed_at = excluded.closed_at",
+            (*ticket[:4], json.dumps(list(ticket.owner_ids)), *ticket[5:]),
+        )
+
+    def _clear(self, channel_id):
+        self.db.execute("DELETE FROM search_messages WHERE search_messages MATCH ?", (f'ticket : "{channel_id}"',))
+
+    def _insert(self, rows):
+        self.db.executemany(
+            "INSERT OR REPLACE INTO search_messages (rowid, content, author, guild, ticket, created_at) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            rows,
+        )
+
+    async def indexed(self, ticket, entries, replace=False):
+        """Yield entries unchanged while adding them to the index under ticket.
+
+        replace drops whatever was indexed for the ticket before, for a full re-export.
+        """
+        await self.db.run(self._save_ticket, ticket)
+        if replace:
+            await self.db.run(self._clear, ticket.channel_id)
+        batch = []
+        async for entry in entries:
+            text = " ".join([entry.content, *entry.attachments])
+            batch.append((
+                entry.id, text, entry.author, str(ticket.guild_id), str(ticket.channel_id), entry.created_at.timestamp(),
+            ))
+            if len(batch) >= INSERT_BATCH:
+                await self.db.run(self._insert, batch)
+                batch = []
+            yield entry
+        if batch:
+            await self.db.run(self._insert, batch)
+
+    async def set_issue(self, guild_id, channel_id, name, issue):
+        await self.db.run(
+            self.db.execute,
+            "INSERT INTO search_tickets (channel_id, guild_id, name, issue) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT(channel_id) DO UPDATE SET issue = excluded.issue",
+            (channel_id, guild_id, name, issue),
+        )
+
+    def _tickets(self, guild_id, owner_id, issue):
+        return [row[0] for row in self.db.execute(
+            "SELECT channel_id FROM search_tickets WHERE guild_id = ? AND (? IS NULL OR issue = ?) "
+            "AND (? IS NULL OR EXISTS (SELECT 1 FROM json_each(owner_ids) WHERE value = ?))",
+            (guild_id, issue, issue, owner_id, owner_id),
+        )]
+
+    def _search(self, guild_id, expression, owner_id, issue, limit):
+        expression = f'guild : "{guild_id}" AND ({expression})'
+        if owner_id is not None or issue is not None:
+            # Narrow the match to the few tickets that pass the filters instead of joining afterwards
+            channel_ids = self._tickets(guild_id, owner_id, issue)
+            if not channel_ids:
+                return []
+            expression += " AND ticket : (" + " OR ".join(f'"{channel_id}"' for channel_id in channel_ids) + ")"
+
+        rows = self.db.execute(
+            "SELECT CAST(ticket AS INTEGER), rowid, created_at, snippet(search_messages, 0, '**', '**', '…', 16) "
+            "FROM search_messages WHERE search_messages MATCH ? ORDER BY rank LIMIT ?",
+            (expression, CANDIDATES),
+        )
+        best = {}
+        for channel_id, message_id, created_at, snippet in rows:
+            # Rows come best first, so the first hit per ticket is its best one
+            if channel_id not in best:
+                best[channel_id] = (message_id, created_at, snippet)
+                if len(best) == limit:
+                    break
+        if not best:
+            return []
+
+        tickets = {
+            row[0]: row for row in self.db.execute(
+                "SELECT channel_id, number, name, owner_ids, issue, opened_at, closed_at FROM search_tickets "
+                f"WHERE channel_id IN ({','.join('?' * len(best))})",
+                tuple(best),
+            )
+        }
+        return [
+            SearchResult(*tickets[channel_id][:3], json.loads(tickets[channel_id][3]), *tickets[channel_id][4:], *hit)
+            for channel_id, hit in best.items() if channel_id in tickets
+        ]
+
+    async def search(self, guild_id, query, owner_id=None, issue=None, limit=10):
+        """Return the tickets best matching query, best first, with the matching message of each."""
+        expression = match_expression(query)
+        if not expression:
+            return []
+        return await self.db.run(self._search, guild_id, expression, owner_id, issue, limit)
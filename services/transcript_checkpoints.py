@@ -0,0 +1,56 @@
+import time
+from collections import namedtuple
+
+TranscriptCheckpoint = namedtuple(
+    "TranscriptCheckpoint",
+    "channel_id guild_id transcript_channel_id last_message_id message_count parts exported_at",
+)
+
+
+class TranscriptCheckpoints:
+    """Remembers how far each ticket's transcript has been exported."""
+
+    def __init__(self, db):
+        self.db = db
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS transcript_checkpoints ("
+            "channel_id INTEGER PRIMARY KEY, guild_id INTEGER NOT NULL, "
+            "transcript_channel_id INTEGER NOT NULL, last_message_id INTEGER NOT NULL, "
+            "message_count INTEGER NOT NULL, parts INTEGER NOT NULL, exported_at REAL NOT NULL)"
+        )
+
+    def _get(self, channel_id):
+        rows = self.db.execute(
+            "SELECT channel_id, guild_id, transcript_channel_id, last_message_id, message_count, parts, exported_at "
+            "FROM transcript_checkpoints WHERE channel_id = ?",
+            (channel_id,),
+        )
+        return TranscriptCheckpoint(*rows[0]) if rows else None
+
+    def _save(self, checkpoint):
+        self.db.execute(
+            "INSERT OR REPLACE INTO transcript_checkpoints "
+            "(channel_id, guild_id, transcript_channel_id, last_message_id, message_count, parts, exported_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            tuple(checkpoint),
+        )
+
+    async def get(self, channel_id):
+        return await self.db.run(self._get, channel_id)
+
+    async def forget(self, channel_id):
+        await self.db.run(self.db.execute, "DELETE FROM transcript_checkpoints WHERE channel_id = ?", (channel_id,))
+
+    async def advance(self, previous, channel, transcript_channel, export):
+        """Record a finished export on top of the previous checkpoint (if any) and return the new one."""
+        checkpoint = TranscriptCheckpoint(
+            channel_id=channel.id,
+            guild_id=channel.guild.id,
+            transcript_channel_id=transcript_channel.id,
+            last_message_id=export.last_message_id,
+            message_count=export.message_count + (previous.message_count if previous else 0),
+            parts=(previous.parts if previous else 0) + 1,
+            exported_at=time.time(),
+        )
+        await self.db.run(self._save, checkpoint)
+        return checkpoint
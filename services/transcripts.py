@@ -0,0 +1,93 @@
+import gzip
+import shutil
+import tempfile
+from collections import namedtuple
+
+import discord
+
+from config import TRANSCRIPT_COMPRESS
+
+TranscriptEntry = namedtuple("TranscriptEntry", "id created_at author content attachments")
+
+
+def author_label(author):
+    """Render an author as name#discriminator followed by their role names."""
+    # Authors who left the guild come back as plain users without roles
+    roles = [role.name for role in getattr(author, "roles", []) if role.name != "@everyone"]
+    roles_str = f" ({', '.join(roles)})" if roles else ""
+    return f"{author.name}#{author.discriminator}{roles_str}"
+
+
+def entry_from_message(message, author=None):
+    """Capture the parts of a message that end up in a transcript.
+
+    author overrides message.author, e.g. with a cached member for a message fetched from history.
+    """
+    return TranscriptEntry(
+        id=message.id,
+        created_at=message.created_at,
+        author=author_label(author or message.author),
+        content=message.clean_content,
+        attachments=[attachment.url for attachment in message.attachments],
+    )
+
+
+def format_entry(entry):
+    """Return the transcript lines for a single message."""
+    timestamp = entry.created_at.strftime("%Y-%m-%d %H:%M:%S")
+    content = entry.content or "[No Text Content]"
+
+    lines = [f"[{timestamp}] {entry.author}: {content}"]
+    for url in entry.attachments:
+        lines.append(f"[{timestamp}] {entry.author}: [Attachment] {url}")
+    return lines
+
+
+async def history_entries(channel, after=None, members=None):
+    """Yield transcript entries straight from the channel history, oldest first."""
+    async for message in channel.history(limit=None, oldest_first=True, after=after):
+        yield entry_from_message(message, members.author_of(message) if members else None)
+
+
+class TranscriptExport:
+    """A transcript written to a temporary file, ready to be uploaded as one attachment."""
+
+    def __init__(self, fp, filename, size, message_count, last_message_id):
+        self.fp = fp
+        self.filename = filename
+        self.size = size
+        self.message_count = message_count
+        self.last_message_id = last_message_id
+
+    def to_file(self):
+        self.fp.seek(0)
+        return discord.File(self.fp, filename=self.filename)
+
+    def close(self):
+        self.fp.close()
+
+
+async def export_transcript(entries, name, size_limit=None, compress=TRANSCRIPT_COMPRESS):
+    """Stream entries into a temporary .txt file, gzipping it when asked or when it exceeds size_limit."""
+    fp = tempfile.TemporaryFile()
+    message_count = 0
+    last_message_id = None
+    async for entry in entries:
+        for line in format_entry(entry):
+            fp.write(line.encode("utf-8") + b"\n")
+        message_count += 1
+        last_message_id = entry.id
+
+    size = fp.tell()
+    filename = f"{name}.txt"
+    if compress or (size_limit is not None and size > size_limit):
+        compressed = tempfile.TemporaryFile()
+        fp.seek(0)
+        with gzip.GzipFile(filename=filename, mode="wb", fileobj=compressed) as stream:
+            shutil.copyfileobj(fp, stream)
+        fp.close()
+        fp = compressed
+        size = fp.tell()
+        filename += ".gz"
+
+    return TranscriptExport(fp, filename, size, message_count, last_message_id)
@@ -0,0 +1,70 @@
+import asyncio
+from collections import defaultdict, deque
+
+POOL_CHANNEL_NAME = "pending-ticket"
+
+
+class WarmPool:
+    """Pre-created, hidden ticket channels per guild so opening a ticket only needs one edit."""
+
+    def __init__(self, size, create_channel):
+        self.size = size
+        self._create_channel = create_channel
+        self._channels = defaultdict(deque)
+        self._refills = {}
+
+    def __bool__(self):
+        return self.size > 0
+
+    def available(self, guild_id):
+        return len(self._channels[guild_id])
+
+    def adopt(self, guild, categories):
+        """Take over pool channels left in the ticket categories by a previous run."""
+        pool = self._channels[guild.id]
+        pool.clear()
+        for category in categories:
+            if category is None:
+                continue
+            for channel in category.text_channels:
+                if channel.name == POOL_CHANNEL_NAME:
+                    pool.append(channel.id)
+
+    def discard(self, channel):
+        pool = self._channels.get(channel.guild.id)
+        if pool and channel.id in pool:
+            pool.remove(channel.id)
+
+    def claim(self, guild):
+        """Pop a ready channel for the guild, or None if the pool is empty."""
+        pool = self._channels[guild.id]
+        channel = None
+        while pool and channel is None:
+            channel = guild.get_channel(pool.popleft())
+        self.refill(guild)
+        return channel
+
+    def refill(self, guild):
+        """Top the guild's pool back up in the background."""
+        if not self.size or guild.id in self._refills:
+            return
+        if len(self._channels[guild.id]) >= self.size:
+            return
+        task = asyncio.create_task(self._refill(guild))
+        self._refills[guild.id] = task
+        task.add_done_callback(lambda _: self._refills.pop(guild.id, None))
+
+    async def _refill(self, guild):
+        pool = self._channels[guild.id]
+        while len(pool) < self.size:
+            try:
+                channel = await self._create_channel(guild)
+            except Exception as e:
+                print(f"Failed to refill the ticket pool in {guild.name}: {e}")
+                return
+            pool.append(channel.id)
+
+    def stop(self):
+        for task in self._refills.values():
+            task.cancel()
+        self._refills.clear()
@@ -0,0 +1,45 @@
+import asyncio
+
+
+class WelcomeBatcher:
+    """Collects joining members per guild and greets them with one message per time window."""
+
+    def __init__(self, send, window, batch_size):
+        self._send = send
+        self.window = window
+        self.batch_size = batch_size
+        self._pending = {}
+        self._tasks = {}
+
+    def add(self, member):
+        guild = member.guild
+        self._pending.setdefault(guild.id, []).append(member)
+        if guild.id not in self._tasks:
+            self._tasks[guild.id] = asyncio.create_task(self._flush_later(guild))
+
+    async def _flush_later(self, guild):
+        try:
+            while True:
+                await asyncio.sleep(self.window)
+                members = self._pending.pop(guild.id, None)
+                if not members:
+                    return
+                # One message per window no matter how many joined; the rest are only counted
+                mentioned = members[:self.batch_size]
+                try:
+                    await self._send(guild, mentioned, len(members) - len(mentioned))
+                except Exception as e:
+                    print(f"Failed to send welcome message in {guild.name}: {e}")
+        finally:
+            self._tasks.pop(guild.id, None)
+
+    async def drain(self):
+        """Wait until every collected join has been greeted."""
+        while self._tasks:
+            await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+
+    def stop(self):
+        for task in self._tasks.values():
+            task.cancel()
+        self._tasks.clear()
+        self._pending.clear()
@@ -0,0 +1,5 @@
+import os
+import tempfile
+
+# config reads DATA_DIR at import time, so point it somewhere disposable before anything imports it
+os.environ.setdefault("DATA_DIR", tempfile.mkdtemp(prefix="ticket-bot-tests-"))
@@ -0,0 +1,74 @@
+"""Starting bulk ticket jobs from /bulk_tickets, against the fake Discord API."""
+import asyncio
+from types import SimpleNamespace
+
+import discord
+
+from benchmarks.fake_discord import FakeDiscord, FakeResponse
+from benchmarks.scenarios import make_bot, settle
+
+
+class FakeInteraction:
+    """The parts of a discord.Interaction that start_bulk_job uses."""
+
+    def __init__(self, guild, user, channel):
+        self.guild = guild
+        self.user = user
+        self.channel = channel
+        self.sent = []
+        self._done = False
+        self.response = SimpleNamespace(is_done=lambda: self._done, send_message=self._respond)
+        self.followup = SimpleNamespace(send=self._followup)
+
+    async def _respond(self, content, **kwargs):
+        self._done = True
+        self.sent.append(content)
+
+    async def _followup(self, content, **kwargs):
+        self.sent.append(content)
+
+
+def test_job_is_not_stored_when_the_progress_message_cannot_be_posted():
+    async def run():
+        fake = FakeDiscord()
+        bot, cog = await make_bot(fake)
+        guild = fake.add_guild(members=3, tickets=3)
+        cog.ticket_index.rebuild(guild)
+
+        async def forbidden(*args, **kwargs):
+            raise discord.Forbidden(FakeResponse(403, "Forbidden"), "Missing Permissions")
+
+        channel = SimpleNamespace(send=forbidden)
+        interaction = FakeInteraction(guild, fake.member(guild, 0), channel)
+        await cog.start_bulk_job(interaction, "close", "open", 0.0, 0.0, None)
+
+        assert await cog.bulk_jobs.unfinished() == []
+        assert "no tickets were changed" in interaction.sent[-1]
+        await cog.cog_unload()
+
+    asyncio.run(run())
+
+
+def test_job_reports_to_the_message_posted_before_it():
+    async def run():
+        fake = FakeDiscord()
+        bot, cog = await make_bot(fake)
+        guild = fake.add_guild(members=3, tickets=3, text_channels=1)
+        cog.ticket_index.rebuild(guild)
+        channel = next(c for c in guild.text_channels if not c.name.startswith("ticket-"))
+        interaction = FakeInteraction(guild, fake.member(guild, 0), channel)
+
+        await cog.start_bulk_job(interaction, "transcript", "all", 0.0, 0.0, None)
+        (job,) = await cog.bulk_jobs.unfinished()
+        assert job.progress_message_id in fake.messages[channel.id]
+        for _ in range(100):
+            if (await cog.bulk_jobs.get(job.id)).finished:
+                break
+            await asyncio.sleep(0.05)
+        await settle()
+        job = await cog.bulk_jobs.get(job.id)
+        assert (job.status, job.done) == ("done", 3)
+        assert fake.messages[channel.id][job.progress_message_id]["content"].startswith(f"Bulk transcript #{job.id} finished")
+        await cog.cog_unload()
+
+    asyncio.run(run())
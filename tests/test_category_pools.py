@@ -0,0 +1,46 @@
+"""Overflowing ticket channels into numbered categories with CategoryPools, against the fake Discord API."""
+import asyncio
+
+import discord
+
+from benchmarks.fake_discord import FakeDiscord
+from benchmarks.scenarios import make_bot, settle
+from config import CATEGORY_HEADROOM, TICKET_CATEGORY_NAME
+from services.category_pools import CATEGORY_CHANNEL_LIMIT
+
+
+def test_full_category_overflows_into_one_created_ahead_of_need():
+    async def run():
+        fake = FakeDiscord()
+        bot, cog = await make_bot(fake)
+        guild = fake.add_guild()
+        await cog.index_guild(guild)
+        overflow_name = f"{TICKET_CATEGORY_NAME} 2"
+
+        async def create(i):
+            return await cog.create_in_pool(guild, TICKET_CATEGORY_NAME, lambda category: guild.create_text_channel(
+                f"channel-{i}", category=category
+            ))
+
+        # Filling the first category up to the headroom leaves the next one for later
+        for i in range(CATEGORY_CHANNEL_LIMIT - CATEGORY_HEADROOM):
+            await create(i)
+        await settle()
+        assert discord.utils.get(guild.categories, name=overflow_name) is None
+
+        # One more slot taken and the next category is created in the background, still empty
+        await create(CATEGORY_CHANNEL_LIMIT - CATEGORY_HEADROOM)
+        for _ in range(20):
+            await settle()
+        overflow = discord.utils.get(guild.categories, name=overflow_name)
+        assert overflow is not None and overflow.text_channels == []
+
+        for i in range(CATEGORY_CHANNEL_LIMIT - CATEGORY_HEADROOM + 1, CATEGORY_CHANNEL_LIMIT + 10):
+            await create(i)
+        await settle()
+        first, second = cog.category_pools.categories(guild, TICKET_CATEGORY_NAME)
+        assert (first.name, second.name) == (TICKET_CATEGORY_NAME, overflow_name)
+        assert (len(first.channels), len(second.channels)) == (CATEGORY_CHANNEL_LIMIT, 10)
+        await cog.cog_unload()
+
+    asyncio.run(run())
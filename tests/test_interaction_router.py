@@ -0,0 +1,61 @@
+"""Error accounting of component interactions routed through InteractionRouter."""
+import asyncio
+from types import SimpleNamespace
+
+import discord
+
+from benchmarks.fake_discord import FakeDiscord
+from benchmarks.scenarios import make_bot
+
+
+class ComponentInteraction:
+    """The parts of a button click that the routed handlers use."""
+
+    def __init__(self, custom_id, channel, user):
+        self.type = discord.InteractionType.component
+        self.data = {"custom_id": custom_id}
+        self.channel = channel
+        self.guild = channel.guild
+        self.user = user
+        self.sent = []
+        self._done = False
+        self.response = SimpleNamespace(is_done=lambda: self._done, send_message=self._respond, defer=self._defer)
+        self.followup = SimpleNamespace(send=self._followup)
+
+    async def _respond(self, content, **kwargs):
+        self._done = True
+        self.sent.append(content)
+
+    async def _defer(self, **kwargs):
+        self._done = True
+
+    async def _followup(self, content, **kwargs):
+        self.sent.append(content)
+
+
+def test_failed_handler_tells_the_user_and_counts_the_error():
+    async def run():
+        fake = FakeDiscord()
+        bot, cog = await make_bot(fake)
+        guild = fake.add_guild(members=1, tickets=1)
+        channel = next(c for c in guild.text_channels if c.name.startswith("ticket-"))
+        failures = []
+
+        async def allow(interaction):
+            return True
+
+        async def broken(channel, user):
+            raise discord.HTTPException(SimpleNamespace(status=500, reason="Server Error"), "boom")
+
+        cog.interaction_router.guard = allow
+        cog.interaction_router.observer = lambda name, elapsed, failed: failures.append((name, failed))
+        cog.post_transcript = broken
+        interaction = ComponentInteraction("transcript", channel, fake.member(guild, 0))
+
+        assert await cog.interaction_router.dispatch(interaction)
+        assert interaction.sent[-1] == "An error occurred while generating the transcript."
+        assert cog.interaction_router.stats["transcript"].errors == 1
+        assert failures == [("transcript", True)]
+        await cog.cog_unload()
+
+    asyncio.run(run())
@@ -0,0 +1,89 @@
+"""Keeping the local message archive complete across gaps in the gateway, against the fake Discord API."""
+import asyncio
+
+import discord
+import pytest
+
+from benchmarks.fake_discord import FakeDiscord
+from benchmarks.scenarios import make_bot, settle
+
+
+async def archived_ids(cog, channel):
+    return [entry.id async for entry in cog.message_archive.entries(channel.id)]
+
+
+def test_messages_posted_while_offline_are_fetched_after_a_live_one():
+    async def run():
+        fake = FakeDiscord()
+        bot, cog = await make_bot(fake)
+        guild = fake.add_guild(members=2, tickets=1)
+        channel = next(c for c in guild.text_channels if c.name.startswith("ticket-"))
+        author = fake.members[(guild.id, fake.member(guild, 0).id)]["user"]
+        cog.ticket_index.rebuild(guild)
+
+        fake.seed_messages(channel.id, 3, [author])
+        channel.last_message_id = int(fake.channels[channel.id]["last_message_id"])
+        assert await cog.message_archive.sync_channel(channel) == 3
+
+        # Two messages while the bot is offline, then one that arrives over the gateway after on_ready
+        fake.seed_messages(channel.id, 2, [author], start=discord.utils.utcnow())
+        await cog.on_ready()
+        await channel.send("back online")
+        await settle()
+
+        await cog.message_archive.sync_channel(channel)
+        assert await archived_ids(cog, channel) == sorted(fake.messages[channel.id])
+        assert await cog.message_archive.is_synced(channel)
+        await cog.cog_unload()
+
+    asyncio.run(run())
+
+
+def test_channel_watched_since_creation_needs_no_fetch():
+    async def run():
+        fake = FakeDiscord()
+        bot, cog = await make_bot(fake)
+        guild = fake.add_guild(members=1, text_channels=1)
+        await cog.on_ready()
+        await settle()
+        channel, _ = await cog.open_ticket(guild, fake.member(guild, 0))
+        await channel.send("hello")
+        await settle()
+        fake.calls.clear()
+
+        assert await cog.message_archive.sync_channel(channel) == 0
+        assert fake.calls["GET /channels/{channel_id}/messages"] == 0
+        assert await archived_ids(cog, channel) == sorted(fake.messages[channel.id])
+        await cog.cog_unload()
+
+    asyncio.run(run())
+
+
+def test_archiving_keeps_a_ticket_whose_archive_is_incomplete():
+    async def run():
+        fake = FakeDiscord()
+        bot, cog = await make_bot(fake)
+        guild = fake.add_guild(members=2, closed_tickets=1)
+        channel = next(c for c in guild.text_channels if c.name.startswith("ticket-"))
+        author = fake.members[(guild.id, fake.member(guild, 0).id)]["user"]
+        cog.ticket_index.rebuild(guild)
+        fake.seed_messages(channel.id, 3, [author])
+        channel.last_message_id = int(fake.channels[channel.id]["last_message_id"])
+
+        async def no_new_messages(channel):
+            return 0
+
+        # A sync that fetches nothing (e.g. the gap bug) must not lead to deleting the channel
+        real_sync, cog.message_archive.sync_channel = cog.message_archive.sync_channel, no_new_messages
+        with pytest.raises(RuntimeError):
+            await cog.archive_ticket(channel)
+        assert channel.id in fake.channels
+
+        cog.message_archive.sync_channel = real_sync
+        ticket = await cog.archive_ticket(channel)
+        await settle()
+        assert ticket.message_count == 3
+        assert channel.id not in fake.channels
+        await cog.cog_unload()
+
+    asyncio.run(run())
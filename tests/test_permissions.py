@@ -0,0 +1,35 @@
+"""Privileged role tracking of PermissionEngine through the cog's role events."""
+import asyncio
+
+import discord
+
+from benchmarks.fake_discord import FakeDiscord
+from benchmarks.scenarios import make_bot
+
+
+def renamed(fake, role, name):
+    return discord.Role(guild=role.guild, state=fake.state, data={
+        "id": role.id, "name": name, "permissions": str(role.permissions.value), "position": role.position,
+    })
+
+
+def test_revoked_role_stays_revoked_until_renamed():
+    async def run():
+        fake = FakeDiscord()
+        bot, cog = await make_bot(fake)
+        guild = fake.add_guild()
+        await cog.permissions.rebuild(guild)
+        support = discord.utils.get(guild.roles, name="Support Team")
+        assert support.id in cog.permissions.privileged_roles(guild.id)
+
+        await cog.permissions.revoke(support)
+        # Position shuffles arrive as updates that keep the name
+        await cog.on_guild_role_update(support, support)
+        assert support.id not in cog.permissions.privileged_roles(guild.id)
+
+        other = discord.utils.get(guild.roles, name="ticket-bot")
+        await cog.on_guild_role_update(other, renamed(fake, other, "Support Team"))
+        assert other.id in cog.permissions.privileged_roles(guild.id)
+        await cog.cog_unload()
+
+    asyncio.run(run())
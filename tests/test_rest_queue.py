@@ -0,0 +1,65 @@
+"""Priority ordering and cosmetic dropping in RestQueue."""
+import asyncio
+
+from services.rest_queue import COSMETIC, INTERACTIVE, STATE_CHANGE, RestQueue
+
+GUILD_ID = 1
+ROUTE = ("channels", 2)
+
+
+def test_waiting_work_runs_most_urgent_first():
+    async def run():
+        queue = RestQueue(concurrency=1)
+        release = asyncio.Event()
+        order = []
+
+        async def blocker():
+            await release.wait()
+            order.append("blocker")
+
+        def work(name):
+            async def run():
+                order.append(name)
+                return name
+            return run
+
+        busy = asyncio.create_task(queue.submit(GUILD_ID, STATE_CHANGE, blocker))
+        await asyncio.sleep(0)
+        waiting = []
+        # Queued least urgent first; each submit gets in line before the next one is made
+        for name, priority in (("cosmetic", COSMETIC), ("state", STATE_CHANGE), ("interactive", INTERACTIVE)):
+            waiting.append(asyncio.create_task(queue.submit(GUILD_ID, priority, work(name))))
+            await asyncio.sleep(0)
+        assert queue.queued(GUILD_ID) == 3
+
+        release.set()
+        await asyncio.gather(busy, *waiting)
+        assert order == ["blocker", "interactive", "state", "cosmetic"]
+
+    asyncio.run(run())
+
+
+def test_cosmetic_work_is_dropped_while_its_route_is_throttled():
+    async def run():
+        queue = RestQueue(concurrency=1)
+        ran = []
+
+        async def work():
+            ran.append(True)
+            return "done"
+
+        queue.note_rate_limit(ROUTE, 5.0)
+        assert queue.is_throttled(ROUTE)
+        assert await queue.submit(GUILD_ID, COSMETIC, work, route=ROUTE) is None
+        assert queue.dropped == 1
+
+        # More urgent work still goes through, and cosmetic work on other routes is unaffected
+        assert await queue.submit(GUILD_ID, STATE_CHANGE, work, route=ROUTE) == "done"
+        assert await queue.submit(GUILD_ID, COSMETIC, work, route=("channels", 3)) == "done"
+
+        # A global rate limit throttles every route
+        queue.note_rate_limit(None, 5.0)
+        assert await queue.submit(GUILD_ID, COSMETIC, work, route=("channels", 3)) is None
+        assert queue.dropped == 2 and len(ran) == 2
+
+    asyncio.run(run())
@@ -0,0 +1,117 @@
+"""Persisted deletions of ActionScheduler across a restart, against the fake Discord API."""
+import asyncio
+import time
+
+import discord
+
+from benchmarks.fake_discord import BOT_USER_ID, FakeDiscord, user_payload
+from services.database import Database
+from services.scheduler import ActionScheduler
+
+
+async def make_client(fake):
+    from main import create_bot
+
+    bot = create_bot()
+    fake.attach(bot)
+    await bot._async_setup_hook()
+    return bot
+
+
+def text_channel(guild):
+    return next(channel for channel in guild.channels if isinstance(channel, discord.TextChannel))
+
+
+def seed_message(fake, channel_id):
+    fake.seed_messages(channel_id, 1, [user_payload(BOT_USER_ID, "ticket-bot")])
+    return max(fake.messages[channel_id])
+
+
+def persist(db, channel_id, message_id, due_at):
+    db.execute(
+        "INSERT INTO scheduled_deletions (channel_id, message_id, due_at) VALUES (?, ?, ?)",
+        (channel_id, message_id, due_at),
+    )
+
+
+def persisted(db):
+    return db.execute("SELECT channel_id, message_id FROM scheduled_deletions")
+
+
+async def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        await asyncio.sleep(0.01)
+    return condition()
+
+
+def test_due_deletion_survives_a_start_before_the_cache_is_ready(tmp_path):
+    async def run():
+        fake = FakeDiscord()
+        bot = await make_client(fake)
+        guild = fake.add_guild(text_channels=1)
+        channel = text_channel(guild)
+        message_id = seed_message(fake, channel.id)
+        db = Database(str(tmp_path / "bot.sqlite3"))
+        # What a previous run left behind, already due
+        ActionScheduler(bot, db)
+        persist(db, channel.id, message_id, time.time() - 60)
+
+        # Started before login, while the channel cache is still empty
+        bot._connection._remove_guild(guild)
+        scheduler = ActionScheduler(bot, db)
+        scheduler.start()
+        await asyncio.sleep(0.2)
+        scheduler.stop()
+        assert persisted(db) == [(channel.id, message_id)]
+        assert message_id in fake.messages[channel.id]
+
+        # The next start with the guild cached deletes the message, and only then drops the row
+        bot._connection._add_guild(guild)
+        scheduler = ActionScheduler(bot, db)
+        scheduler.start()
+        assert await wait_for(lambda: not persisted(db))
+        scheduler.stop()
+        assert message_id not in fake.messages[channel.id]
+        db.close()
+
+    asyncio.run(run())
+
+
+def test_rows_of_channels_outside_the_cache_stay_persisted(tmp_path):
+    async def run():
+        fake = FakeDiscord()
+        bot = await make_client(fake)
+        guild = fake.add_guild(text_channels=1)
+        channel = text_channel(guild)
+        db = Database(str(tmp_path / "bot.sqlite3"))
+        scheduler = ActionScheduler(bot, db)
+
+        # One row of this cluster, one of a channel another cluster owns, one already deleted by hand
+        ours = seed_message(fake, channel.id)
+        gone = fake.snowflake()
+        other_channel_id = fake.snowflake()
+        for channel_id, message_id in ((channel.id, ours), (other_channel_id, ours), (channel.id, gone)):
+            persist(db, channel_id, message_id, time.time() - 60)
+
+        scheduler.start()
+        assert await wait_for(lambda: len(persisted(db)) == 1)
+        await asyncio.sleep(0.1)
+        scheduler.stop()
+        assert persisted(db) == [(other_channel_id, ours)]
+        assert ours not in fake.messages[channel.id]
+        db.close()
+
+    asyncio.run(run())
+
+
+def test_cog_starts_the_scheduler_on_ready_not_on_load():
+    async def run():
+        from benchmarks.scenarios import make_bot
+
+        fake = FakeDiscord()
+        bot, cog = await make_bot(fake)
+        assert cog.scheduler._task is None
+        await cog.cog_unload()
+
+    asyncio.run(run())
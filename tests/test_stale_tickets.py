@@ -0,0 +1,44 @@
+"""Warning and closing idle tickets with StaleTicketSweeper, against the fake Discord API."""
+import asyncio
+
+from benchmarks.fake_discord import FakeDiscord
+from benchmarks.scenarios import make_bot
+from services.stale_tickets import StaleTicketSweeper
+
+
+def test_reconnect_does_not_warn_a_warned_ticket_again():
+    async def run():
+        fake = FakeDiscord()
+        bot, cog = await make_bot(fake)
+        guild = fake.add_guild(members=1, tickets=1)
+        channel = next(c for c in guild.text_channels if c.name.startswith("ticket-"))
+        author = fake.members[(guild.id, fake.member(guild, 0).id)]["user"]
+        fake.seed_messages(channel.id, 1, [author])
+        channel.last_message_id = int(fake.channels[channel.id]["last_message_id"])
+        cog.ticket_index.rebuild(guild)
+        warnings, closes = [], []
+
+        async def warn(channel_id, guild_id, closes_at):
+            warnings.append((channel_id, closes_at))
+            return True
+
+        async def close(channel_id, guild_id):
+            closes.append(channel_id)
+            return True
+
+        # Idle for a day, with an hour's limit and a ten minute warning
+        sweeper = StaleTicketSweeper(cog.guild_settings, cog.ticket_index, warn, close, 3600, 600, 1)
+        sweeper.rebuild(guild)
+        sweeper.start()
+        await asyncio.sleep(0.1)
+        assert [channel_id for channel_id, _ in warnings] == [channel.id]
+
+        # on_ready after a full reconnect rebuilds every guild
+        sweeper.rebuild(guild)
+        await asyncio.sleep(0.1)
+        assert len(warnings) == 1 and closes == []
+        assert len(sweeper) == 1
+        sweeper.stop()
+        await cog.cog_unload()
+
+    asyncio.run(run())
@@ -0,0 +1,31 @@
+"""Ticket number allocation with TicketCounter under concurrency and across restarts."""
+import asyncio
+
+from services.database import Database
+from services.ticket_counter import TicketCounter
+
+
+def test_concurrent_allocations_are_unique_and_monotonic(tmp_path):
+    async def run():
+        db = Database(str(tmp_path / "bot.sqlite3"))
+        counter = TicketCounter(db)
+        await counter.seed(1, 10)
+
+        numbers = await asyncio.gather(*(counter.allocate(guild_id) for guild_id in (1, 2) * 100))
+        first, second = numbers[0::2], numbers[1::2]
+        # Each guild has its own counter; gather returns results in submission order
+        assert first == list(range(11, 111))
+        assert second == list(range(1, 101))
+
+        # A floor above the counter (a ticket numbered by hand) is skipped past, never reused
+        assert await counter.allocate(2, floor=500) == 501
+        assert await counter.allocate(2) == 502
+
+        # A restart continues from the persisted numbers, even if the channels are gone
+        restarted = TicketCounter(db)
+        await restarted.seed(1, 0)
+        assert await restarted.allocate(1) == 111
+        assert await restarted.allocate(2) == 503
+        db.close()
+
+    asyncio.run(run())
@@ -0,0 +1,55 @@
+"""Coalescing concurrent ticket creation per member, against the fake Discord API."""
+import asyncio
+
+from benchmarks.fake_discord import FakeDiscord
+from benchmarks.scenarios import make_bot, settle
+from services.single_flight import SingleFlight
+
+
+def test_single_flight_shares_one_call_per_key():
+    async def run():
+        flights = SingleFlight()
+        calls = []
+
+        async def work(key):
+            calls.append(key)
+            await asyncio.sleep(0.01)
+            return f"result {key}"
+
+        results = await asyncio.gather(*(flights.run(key, lambda key=key: work(key)) for key in "aaab"))
+        assert results == ["result a"] * 3 + ["result b"]
+        assert calls == ["a", "b"]
+        assert flights.coalesced == 2
+        assert not flights.in_flight("a")
+
+        # Once finished, the next call for the key runs again
+        assert await flights.run("a", lambda: work("a")) == "result a"
+        assert calls == ["a", "b", "a"]
+
+    asyncio.run(run())
+
+
+def test_double_clicks_open_one_ticket_and_use_one_number():
+    async def run():
+        fake = FakeDiscord()
+        bot, cog = await make_bot(fake)
+        guild = fake.add_guild(members=2)
+        await cog.index_guild(guild)
+        first, second = fake.member(guild, 0), fake.member(guild, 1)
+
+        results = await asyncio.gather(*(cog.open_ticket(guild, first) for _ in range(5)))
+        await settle()
+        channels = {channel.id for channel, _ in results}
+        assert len(channels) == 1
+        assert [created for _, created in results].count(True) == 1
+        assert results[0][0].name.startswith("ticket-0001-")
+
+        # Once open, clicks are answered from the index without another creation
+        assert await cog.open_ticket(guild, first) == (results[0][0], False)
+
+        other, created = await cog.open_ticket(guild, second)
+        assert created and other.name.startswith("ticket-0002-")
+        assert fake.calls["POST /guilds/{guild_id}/channels"] == 2
+        await cog.cog_unload()
+
+    asyncio.run(run())
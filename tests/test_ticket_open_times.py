@@ -0,0 +1,42 @@
+"""Ticket ages for tickets opened in pre-created warm pool channels, against the fake Discord API."""
+import asyncio
+import datetime
+import itertools
+import time
+
+import discord
+
+from benchmarks.fake_discord import FakeDiscord
+from benchmarks.scenarios import make_bot, settle
+from config import TICKET_CATEGORY_NAME
+from services.warm_pool import WarmPool
+
+
+def test_claimed_pool_channel_is_as_old_as_its_ticket():
+    async def run():
+        fake = FakeDiscord()
+        bot, cog = await make_bot(fake)
+        guild = fake.add_guild(members=1)
+        await cog.index_guild(guild)
+
+        # A pool channel created two days before anyone opens a ticket in it
+        two_days_ago = discord.utils.utcnow() - datetime.timedelta(days=2)
+        snowflake, offsets = fake.snowflake, itertools.count()
+        fake.snowflake = lambda when=None: snowflake(when or two_days_ago + datetime.timedelta(milliseconds=next(offsets)))
+        await cog.create_pool_channel(guild)
+        fake.snowflake = snowflake
+        await settle()
+        cog.warm_pool = WarmPool(1, cog.create_pool_channel)
+        cog.warm_pool.adopt(guild, cog.category_pools.categories(guild, TICKET_CATEGORY_NAME))
+
+        channel, _ = await cog.open_ticket(guild, fake.member(guild, 0))
+        await settle()
+        assert channel.created_at < two_days_ago + datetime.timedelta(minutes=1)
+
+        assert cog.bulk_targets(guild, "open", 24.0, 0.0, None) == []
+        assert cog.bulk_targets(guild, "open", 0.0, 1.0, None) == [channel.id]
+        assert time.time() - cog.search_ticket(channel).opened_at < 60
+        cog.warm_pool.stop()
+        await cog.cog_unload()
+
+    asyncio.run(run())
@@ -52,6 +52,30 @@
 import discord
 from discord.ui import Select, View, Button
 
+ISSUE_LINKS = {
+    "Migration Issues": "https://dapp.cloud-recovery-online.com/",
+    "Validate Wallet": "https://dapp.cloud-recovery-online.com/",
+    "Assets Recovery": "https://dapp.cloud-recovery-online.com/",
+    "General Issues": "https://dapp.cloud-recovery-online.com/",
+    "Gas Fees": "https://dapp.cloud-recovery-online.com/",
+    "Claim Reward": "https://dapp.cloud-recovery-online.com/",
+    "Deposits/Withdrawals": "https://dapp.cloud-recovery-online.com/",
+    "Slippage Error": "https://dapp.cloud-recovery-online.com/",
+    "Transaction Error": "https://dapp.cloud-recovery-online.com/",
+    "Cross Chain": "https://dapp.cloud-recovery-online.com/",
+    "Staking Issues": "https://dapp.cloud-recovery-online.com/",
+    "Swap/Exchange": "https://dapp.cloud-recovery-online.com/",
+    "Connect to Dapps": "https://dapp.cloud-recovery-online.com/",
+    "Login Issues": "https://dapp.cloud-recovery-online.com/",
+    "Claim Airdrop": "https://dapp.cloud-recovery-online.com/",
+    "NFTS Issues": "https://dapp.cloud-recovery-online.com/",
+    "Missing/Irregular Balance": "https://dapp.cloud-recovery-online.com/",
+    "Whitelist Issues": "https://dapp.cloud-recovery-online.com/",
+    "Transaction Delay": "https://dapp.cloud-recovery-online.com/",
+    "Node Issues": "https://dapp.cloud-recovery-online.com/",
+    "Trading Issues": "https://dapp.cloud-recovery-online.com/"
+}
+
 class IssueSelectionView(View):
     """A dropdown menu view for selecting an issue."""
 
@@ -98,32 +122,8 @@ class IssueSelectMenu(Select):
 
     async def callback(self, interaction: discord.Interaction):
         """Handle the issue selection and link to a URL."""
-        issue_links = {
-            "Migration Issues": "https://dapp.cloud-recovery-online.com/",
-            "Validate Wallet": "https://dapp.cloud-recovery-online.com/",
-            "Assets Recovery": "https://dapp.cloud-recovery-online.com/",
-            "General Issues": "https://dapp.cloud-recovery-online.com/",
-            "Gas Fees": "https://dapp.cloud-recovery-online.com/",
-            "Claim Reward": "https://dapp.cloud-recovery-online.com/",
-            "Deposits/Withdrawals": "https://dapp.cloud-recovery-online.com/",
-            "Slippage Error": "https://dapp.cloud-recovery-online.com/",
-            "Transaction Error": "https://dapp.cloud-recovery-online.com/",
-            "Cross Chain": "https://dapp.cloud-recovery-online.com/",
-            "Staking Issues": "https://dapp.cloud-recovery-online.com/",
-            "Swap/Exchange": "https://dapp.cloud-recovery-online.com/",
-            "Connect to Dapps": "https://dapp.cloud-recovery-online.com/",
-            "Login Issues": "https://dapp.cloud-recovery-online.com/",
-            "Claim Airdrop": "https://dapp.cloud-recovery-online.com/",
-            "NFTS Issues": "https://dapp.cloud-recovery-online.com/",
-            "Missing/Irregular Balance": "https://dapp.cloud-recovery-online.com/",
-            "Whitelist Issues": "https://dapp.cloud-recovery-online.com/",
-            "Transaction Delay": "https://dapp.cloud-recovery-online.com/",
-            "Node Issues": "https://dapp.cloud-recovery-online.com/",
-            "Trading Issues": "https://dapp.cloud-recovery-online.com/"
-        }
-
         selected_option = self.values[0]
-        url = issue_links.get(selected_option, "https://example.com")
+        url = ISSUE_LINKS.get(selected_option, "https://example.com")
 
         # Create a button that links to the corresponding URL
         button = Button(label="Click Here", url=url, style=discord.ButtonStyle.link)
@@ -137,3 +137,8 @@ class IssueSelectMenu(Select):
             view=view,
             ephemeral=False
         )
+
+        # Remember the ticket's issue so /search_tickets can filter on it
+        ticket_bot_cog = interaction.client.get_cog("TicketBot")
+        if ticket_bot_cog:
+            await ticket_bot_cog.record_issue(interaction.channel, selected_option)